@@ -0,0 +1,119 @@
+"""Compare latency of webhook lookups of database backends.
+
+Usage: python benchmarks/backends.py [number_of_chats] [urls]
+
+Databases of the urls are dropped, e.g.:
+python benchmarks/backends.py 10000 \
+    mongodb://localhost:27017/benchmark,sqlite:///tmp/benchmark.sqlite3,memory://
+"""
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List
+
+from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
+from webhook_telegram_bot.database.models import Chat, Webhook
+from webhook_telegram_bot.helpers import get_db_wrapper_instance
+
+WEBHOOKS_PER_CHAT = 3
+ENGINES: Dict[str, str] = {
+    'mongodb': 'webhook_telegram_bot.database.backends.mongo',
+    'sqlite': 'webhook_telegram_bot.database.backends.sqlite',
+    'memory': 'webhook_telegram_bot.database.backends.memory',
+}
+
+
+def get_webhook_id(chat_id: int, index: int) -> str:
+    """
+    Return webhook id of the chat.
+
+    :param chat_id: chat identification number
+    :param index: webhook number
+    :return: webhook id
+    """
+    return f'{chat_id:024x}{index:08x}'
+
+
+async def fill_chats(db: DatabaseWrapperImpl, size: int) -> None:
+    """
+    Save chats with webhooks.
+
+    :param db: DatabaseWrapper implementation instance
+    :param size: number of chats
+    :return: None
+    """
+    for chat_id in range(size):
+        await db.save_chat(
+            Chat(
+                chat_id=chat_id,
+                webhooks=[
+                    Webhook(
+                        webhook_id=get_webhook_id(chat_id, index),
+                        service='bitbucket',
+                        repository_name=f'repository-{index}',
+                    )
+                    for index in range(WEBHOOKS_PER_CHAT)
+                ],
+            )
+        )
+
+
+async def measure(db: DatabaseWrapperImpl, size: int, number: int) -> float:
+    """
+    Return average latency of webhook resolving.
+
+    :param db: DatabaseWrapper implementation instance
+    :param size: number of chats in database
+    :param number: number of lookups
+    :return: latency in seconds
+    """
+    webhook_ids: List[str] = [
+        get_webhook_id(random.randrange(size), random.randrange(WEBHOOKS_PER_CHAT))
+        for _ in range(number)
+    ]
+    started_at = time.perf_counter()
+    for webhook_id in webhook_ids:
+        await db.resolve_webhook(webhook_id)
+    return (time.perf_counter() - started_at) / number
+
+
+async def run(size: int, urls: List[str]) -> None:
+    """
+    Run benchmark.
+
+    :param size: number of chats
+    :param urls: database connection strings
+    :return: None
+    """
+    for url in urls:
+        engine = ENGINES[url.split(':', 1)[0]]
+        db = get_db_wrapper_instance(engine, url)
+        try:
+            await db.drop_database()
+            await db.ensure_indexes()
+            await fill_chats(db, size)
+            latency = await measure(db, size, number=1000)
+            print(f'{engine:>48}: {latency * 1e6:8.1f} us per lookup')
+        finally:
+            await db.drop_database()
+            db.close()
+
+
+def main() -> None:
+    """
+    Run benchmark.
+
+    :return: None
+    """
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    urls = (
+        sys.argv[2]
+        if len(sys.argv) > 2
+        else 'mongodb://localhost:27017/benchmark,sqlite:///tmp/benchmark.sqlite3'
+    )
+    asyncio.run(run(size, urls.split(',')))
+
+
+if __name__ == '__main__':
+    main()
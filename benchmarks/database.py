@@ -0,0 +1,122 @@
+"""Compare latency of chat lookups with and without indexes against collection size.
+
+Usage: python benchmarks/database.py [mongodb_url] [collection_sizes]
+
+The database of the url is dropped, e.g.:
+python benchmarks/database.py mongodb://localhost:27017/benchmark 1000,10000,100000
+"""
+import asyncio
+import random
+import sys
+import time
+from typing import List
+
+from webhook_telegram_bot.database.backends.mongo import DatabaseWrapper
+
+WEBHOOKS_PER_CHAT = 3
+BATCH_SIZE = 10000
+
+
+def get_webhook_id(chat_id: int, index: int) -> str:
+    """
+    Return webhook id of the chat.
+
+    :param chat_id: chat identification number
+    :param index: webhook number
+    :return: webhook id
+    """
+    return f'{chat_id:024x}{index:08x}'
+
+
+async def fill_chats(db: DatabaseWrapper, start: int, end: int) -> None:
+    """
+    Insert chats with ids in range.
+
+    :param db: DatabaseWrapper instance
+    :param start: first chat id
+    :param end: chat id after the last one
+    :return: None
+    """
+    collection = db.get_collection('chats')
+    for batch_start in range(start, end, BATCH_SIZE):
+        batch_end = min(batch_start + BATCH_SIZE, end)
+        await collection.insert_many(
+            [
+                {
+                    'chat_id': chat_id,
+                    'webhooks': [
+                        {
+                            'webhook_id': get_webhook_id(chat_id, index),
+                            'service': 'bitbucket',
+                            'repository_name': f'repository-{index}',
+                        }
+                        for index in range(WEBHOOKS_PER_CHAT)
+                    ],
+                }
+                for chat_id in range(batch_start, batch_end)
+            ]
+        )
+
+
+async def measure(db: DatabaseWrapper, size: int, number: int) -> float:
+    """
+    Return average latency of lookup by webhook id.
+
+    :param db: DatabaseWrapper instance
+    :param size: number of chats in collection
+    :param number: number of lookups
+    :return: latency in seconds
+    """
+    webhook_ids: List[str] = [
+        get_webhook_id(random.randrange(size), random.randrange(WEBHOOKS_PER_CHAT))
+        for _ in range(number)
+    ]
+    started_at = time.perf_counter()
+    for webhook_id in webhook_ids:
+        await db.get_chat_by_webhook_id(webhook_id)
+    return (time.perf_counter() - started_at) / number
+
+
+async def run(url: str, sizes: List[int]) -> None:
+    """
+    Run benchmark.
+
+    :param url: MongoDB connection string
+    :param sizes: collection sizes
+    :return: None
+    """
+    db = DatabaseWrapper(url)
+    await db.drop_database()
+    collection = db.get_collection('chats')
+    filled = 0
+    try:
+        for size in sizes:
+            await fill_chats(db, filled, size)
+            filled = size
+
+            await collection.drop_indexes()
+            scan = await measure(db, size, number=50)
+            await db.ensure_indexes()
+            indexed = await measure(db, size, number=1000)
+            print(
+                f'{size:>8} chats: {scan * 1e3:8.2f} ms without index, '
+                f'{indexed * 1e3:6.2f} ms with index, {scan / indexed:6.1f}x'
+            )
+    finally:
+        await db.drop_database()
+        db.close()
+
+
+def main() -> None:
+    """
+    Run benchmark.
+
+    :return: None
+    """
+    url = sys.argv[1] if len(sys.argv) > 1 else 'mongodb://localhost:27017/benchmark'
+    sizes = sys.argv[2] if len(sys.argv) > 2 else '1000,10000,100000'
+    asyncio.run(run(url, sorted(int(size) for size in sizes.split(','))))
+
+
+if __name__ == '__main__':
+    main()
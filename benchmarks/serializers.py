@@ -0,0 +1,102 @@
+"""Compare stdlib json with orjson on a large Bitbucket repo:push payload.
+
+Usage: python benchmarks/serializers.py [number_of_commits]
+"""
+import json
+import sys
+import timeit
+from typing import Any, Dict, List
+
+
+def get_commit(index: int) -> Dict[str, Any]:
+    """
+    Return commit similar to the one in Bitbucket push event.
+
+    :param index: commit number
+    :return: commit
+    """
+    commit_hash = f'{index:040x}'
+    return {
+        'type': 'commit',
+        'hash': commit_hash,
+        'message': f'Commit number {index}\n\nLong description of the change.\n',
+        'summary': {'raw': f'Commit number {index}', 'markup': 'markdown'},
+        'author': {
+            'raw': 'John Doe <john@example.com>',
+            'user': {
+                'display_name': 'John Doe',
+                'uuid': '{b0f5f5f5-0000-0000-0000-000000000000}',
+                'links': {'avatar': {'href': 'https://bitbucket.org/avatar.png'}},
+            },
+        },
+        'date': '2022-01-01T00:00:00+00:00',
+        'links': {
+            'self': {'href': f'https://api.bitbucket.org/commit/{commit_hash}'},
+            'html': {'href': f'https://bitbucket.org/commits/{commit_hash}'},
+            'diff': {'href': f'https://api.bitbucket.org/diff/{commit_hash}'},
+        },
+        'parents': [{'hash': f'{index - 1:040x}', 'type': 'commit'}],
+    }
+
+
+def get_push_payload(number_of_commits: int) -> Dict[str, Any]:
+    """
+    Return repo:push payload.
+
+    :param number_of_commits: number of commits in the push
+    :return: payload
+    """
+    commits: List[Dict[str, Any]] = [get_commit(i) for i in range(number_of_commits)]
+    return {
+        'actor': {'display_name': 'John Doe', 'type': 'user'},
+        'repository': {
+            'name': 'repository',
+            'full_name': 'team/repository',
+            'links': {'html': {'href': 'https://bitbucket.org/team/repository'}},
+        },
+        'push': {
+            'changes': [
+                {
+                    'new': {'name': 'master', 'type': 'branch', 'target': commits[-1]},
+                    'old': {'name': 'master', 'type': 'branch', 'target': commits[0]},
+                    'links': {'html': {'href': 'https://bitbucket.org/branch'}},
+                    'created': False,
+                    'closed': False,
+                    'forced': False,
+                    'truncated': False,
+                    'commits': commits,
+                }
+            ]
+        },
+    }
+
+
+def main() -> None:
+    """
+    Run benchmark.
+
+    :return: None
+    """
+    import orjson
+
+    number_of_commits = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    payload = get_push_payload(number_of_commits)
+    raw = json.dumps(payload).encode()
+    number = 200
+    print(f'payload: {len(raw) / 1024:.1f} KiB, {number} iterations')
+
+    results = {
+        'json.loads': timeit.timeit(lambda: json.loads(raw), number=number),
+        'orjson.loads': timeit.timeit(lambda: orjson.loads(raw), number=number),
+        'json.dumps': timeit.timeit(lambda: json.dumps(payload), number=number),
+        'orjson.dumps': timeit.timeit(lambda: orjson.dumps(payload), number=number),
+    }
+    for name, seconds in results.items():
+        print(f'{name:>14}: {seconds / number * 1e6:10.1f} us/op')
+    for operation in ('loads', 'dumps'):
+        speedup = results[f'json.{operation}'] / results[f'orjson.{operation}']
+        print(f'{operation} speedup: {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
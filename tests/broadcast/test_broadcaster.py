@@ -0,0 +1,127 @@
+import asyncio
+from unittest.mock import Mock
+
+from webhook_telegram_bot.broadcast.broadcaster import Broadcaster
+
+
+def get_db_mock(chat_ids):
+    async def iterate_chat_ids(start_after=None):
+        for chat_id in chat_ids:
+            if start_after is None or chat_id > start_after:
+                yield chat_id
+
+    db = Mock()
+    db.iterate_chat_ids = iterate_chat_ids
+    return db
+
+
+def get_message_queue_mock(failed_chat_ids=()):
+    sent = []
+
+    async def process(message):
+        chat_id = message.payload['chat_id']
+        if chat_id in failed_chat_ids:
+            return False
+        sent.append(chat_id)
+        return True
+
+    message_queue = Mock()
+    message_queue.process = process
+    message_queue.sent = sent
+    return message_queue
+
+
+async def test_broadcaster_sends_message_to_every_chat(tmp_path):
+    message_queue = get_message_queue_mock(failed_chat_ids=(3,))
+    broadcaster = Broadcaster(
+        get_db_mock(range(1, 6)),
+        message_queue,
+        checkpoint_path=str(tmp_path / 'checkpoint'),
+        concurrency=2,
+    )
+    stats = await broadcaster.run('id', {'text': 'foo'})
+
+    assert message_queue.sent == [1, 2, 4, 5]
+    assert stats['sent'] == 4
+    assert stats['failed'] == 1
+    assert stats['finished']
+    assert stats['last_chat_id'] == 5
+
+
+async def test_broadcaster_resumes_from_checkpoint(tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint')
+    db = get_db_mock(range(1, 6))
+    broadcaster = Broadcaster(db, get_message_queue_mock(), checkpoint_path, 2)
+    broadcaster.load_checkpoint('id')
+    await broadcaster.send_batch([1, 2], {'text': 'foo'})
+
+    message_queue = get_message_queue_mock()
+    broadcaster = Broadcaster(db, message_queue, checkpoint_path, 2)
+    stats = await broadcaster.run('id', {'text': 'foo'})
+    assert message_queue.sent == [3, 4, 5]
+    assert stats['sent'] == 5
+
+    message_queue = get_message_queue_mock()
+    broadcaster = Broadcaster(db, message_queue, checkpoint_path, 2)
+    await broadcaster.run('id', {'text': 'foo'})
+    assert message_queue.sent == []
+
+    await broadcaster.run('other', {'text': 'bar'})
+    assert message_queue.sent == [1, 2, 3, 4, 5]
+
+
+async def test_broadcaster_stop(tmp_path):
+    async def process(message):
+        await asyncio.sleep(10)
+
+    message_queue = Mock()
+    message_queue.process = process
+    broadcaster = Broadcaster(
+        get_db_mock(range(1, 6)), message_queue, str(tmp_path / 'checkpoint')
+    )
+    broadcaster.start('id', {'text': 'foo'})
+    await asyncio.sleep(0)
+    assert broadcaster.is_running
+
+    await broadcaster.stop()
+    assert not broadcaster.is_running
+    assert not broadcaster.get_stats()['finished']
+
+
+async def test_broadcaster_runs_one_broadcast_per_host(tmp_path):
+    async def process(message):
+        await asyncio.sleep(10)
+
+    message_queue = Mock()
+    message_queue.process = process
+    checkpoint_path = str(tmp_path / 'checkpoint')
+    db = get_db_mock(range(1, 6))
+    broadcaster = Broadcaster(db, message_queue, checkpoint_path)
+    other_broadcaster = Broadcaster(db, get_message_queue_mock(), checkpoint_path)
+
+    assert broadcaster.start('id', {'text': 'foo'})
+    await asyncio.sleep(0)
+    assert other_broadcaster.is_running
+    assert not other_broadcaster.start('id', {'text': 'foo'})
+    assert other_broadcaster.get_stats()['broadcast_id'] == 'id'
+
+    await broadcaster.stop()
+    assert not other_broadcaster.is_running
+
+
+async def test_broadcaster_logs_failed_broadcast(tmp_path, caplog):
+    async def iterate_chat_ids(start_after=None):
+        raise RuntimeError('foo')
+        yield
+
+    db = Mock()
+    db.iterate_chat_ids = iterate_chat_ids
+    broadcaster = Broadcaster(
+        db, get_message_queue_mock(), str(tmp_path / 'checkpoint')
+    )
+    assert broadcaster.start('id', {'text': 'foo'})
+    await asyncio.gather(broadcaster.task, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert 'Broadcast id failed: foo' in caplog.text
+    assert not broadcaster.is_running
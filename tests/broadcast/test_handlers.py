@@ -0,0 +1,57 @@
+from unittest.mock import Mock
+
+from aiohttp import web
+
+from webhook_telegram_bot.broadcast.handlers import get_broadcast_id
+from webhook_telegram_bot.broadcast.routes import init_broadcast_routes
+from webhook_telegram_bot.helpers import get_broadcaster, set_broadcaster
+from webhook_telegram_bot.main import init_config
+
+
+def get_app(admin_token):
+    broadcaster = Mock()
+    broadcaster.get_stats.return_value = {'running': True}
+
+    app = web.Application()
+    init_config(app, {'ADMIN_TOKEN': admin_token})
+    set_broadcaster(app, broadcaster)
+    init_broadcast_routes(app)
+    return app
+
+
+async def test_broadcast_handler_requires_admin_token(aiohttp_client):
+    client = await aiohttp_client(get_app(''))
+    url = client.app.router['broadcast'].url_for()
+    result = await client.post(url, json={'text': 'foo'})
+    assert result.status == 403
+
+    client = await aiohttp_client(get_app('token'))
+    result = await client.post(url, json={'text': 'foo'})
+    assert result.status == 403
+    result = await client.get(url, headers={'Authorization': 'Bearer wrong'})
+    assert result.status == 403
+
+
+async def test_broadcast_handler(aiohttp_client):
+    client = await aiohttp_client(get_app('token'))
+    url = client.app.router['broadcast'].url_for()
+    headers = {'Authorization': 'Bearer token'}
+    broadcaster = get_broadcaster(client.app)
+
+    result = await client.post(url, json={}, headers=headers)
+    assert result.status == 400
+
+    result = await client.post(url, json={'text': 'foo'}, headers=headers)
+    assert result.status == 202
+    broadcaster.start.assert_called_once_with(
+        get_broadcast_id('foo'),
+        {'text': 'foo', 'parse_mode': 'HTML', 'disable_notification': True},
+    )
+
+    broadcaster.start.return_value = False
+    result = await client.post(url, json={'text': 'foo'}, headers=headers)
+    assert result.status == 409
+
+    result = await client.get(url, headers=headers)
+    assert result.status == 200
+    assert await result.json() == {'running': True}
@@ -0,0 +1,25 @@
+from unittest.mock import Mock
+
+from webhook_telegram_bot.broadcast.__main__ import broadcast
+from webhook_telegram_bot.broadcast.broadcaster import Broadcaster
+
+
+async def test_broadcast_refuses_to_run_while_other_broadcast_is_running(
+    tmp_path, monkeypatch, capsys
+):
+    checkpoint_path = str(tmp_path / 'checkpoint')
+    monkeypatch.setenv('DATABASE_URL', 'memory://')
+    monkeypatch.setenv(
+        'DATABASE_ENGINE', 'webhook_telegram_bot.database.backends.memory'
+    )
+    monkeypatch.setenv('BROADCAST_CHECKPOINT_PATH', checkpoint_path)
+    monkeypatch.setenv('TELEGRAM_API_TOKEN', 'token')
+    broadcaster = Broadcaster(Mock(), Mock(), checkpoint_path)
+    assert broadcaster.acquire_lock()
+
+    assert not await broadcast('foo', 'id')
+    assert 'Other broadcast is in progress' in capsys.readouterr().err
+
+    broadcaster.release_lock()
+    assert await broadcast('foo', 'id')
+    assert '"finished":true' in capsys.readouterr().out.replace(' ', '')
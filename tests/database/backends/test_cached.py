@@ -0,0 +1,212 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from webhook_telegram_bot.database.backends.cached import DatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+
+def get_chat():
+    return Chat(
+        chat_id=1,
+        webhooks=[Webhook(webhook_id='webhook', service='bitbucket')],
+    )
+
+
+def get_db(chat=None):
+    db = Mock()
+    db.get_chat_by_chat_id = AsyncMock(return_value=chat)
+    db.get_chat_by_webhook_id = AsyncMock(return_value=chat)
+    db.resolve_webhook = AsyncMock(
+        return_value=(chat.chat_id, chat.webhooks[0]) if chat else None
+    )
+    db.save_chat = AsyncMock(side_effect=lambda chat_: chat_)
+    if chat is None:
+        db.get_chat_by_chat_id.side_effect = ChatNotFound()
+        db.get_chat_by_webhook_id.side_effect = ChatNotFound()
+        db.resolve_webhook.side_effect = ChatNotFound()
+    return db
+
+
+async def test_get_chat_by_chat_id_is_cached(event_loop):
+    db = get_db(get_chat())
+    cached_db = DatabaseWrapper(db)
+
+    assert (await cached_db.get_chat_by_chat_id(1)).chat_id == 1
+    assert (await cached_db.get_chat_by_chat_id(1)).chat_id == 1
+    db.get_chat_by_chat_id.assert_awaited_once_with(1)
+    # the chat found by chat_id is found by its webhooks too
+    assert (await cached_db.get_chat_by_webhook_id('webhook')).chat_id == 1
+    db.get_chat_by_webhook_id.assert_not_awaited()
+    assert cached_db.get_stats()['hits'] == 2
+    assert cached_db.get_stats()['misses'] == 1
+
+
+async def test_cached_chat_is_copied(event_loop):
+    cached_db = DatabaseWrapper(get_db(get_chat()))
+
+    chat = await cached_db.get_chat_by_chat_id(1)
+    chat.delete_webhook_by_id('webhook')
+    chat = await cached_db.get_chat_by_chat_id(1)
+    assert chat.get_webhook_by_id('webhook') is not None
+
+
+async def test_missing_webhook_is_cached(event_loop):
+    db = get_db()
+    cached_db = DatabaseWrapper(db)
+
+    for _ in range(2):
+        with pytest.raises(ChatNotFound):
+            await cached_db.get_chat_by_webhook_id('webhook')
+    db.get_chat_by_webhook_id.assert_awaited_once_with('webhook')
+    assert cached_db.get_stats()['negative_hits'] == 1
+
+
+async def test_missing_chat_is_not_cached(event_loop):
+    db = get_db()
+    cached_db = DatabaseWrapper(db)
+
+    for _ in range(2):
+        with pytest.raises(ChatNotFound):
+            await cached_db.get_chat_by_chat_id(1)
+    assert db.get_chat_by_chat_id.await_count == 2
+
+
+def test_negative_ttl_is_not_longer_than_ttl():
+    cached_db = DatabaseWrapper(get_db(), ttl=10, negative_ttl=300)
+    assert cached_db.missing_webhooks.ttl == 10
+
+
+async def test_save_chat_invalidates_cache(event_loop):
+    db = get_db()
+    cached_db = DatabaseWrapper(db)
+    with pytest.raises(ChatNotFound):
+        await cached_db.get_chat_by_chat_id(1)
+    with pytest.raises(ChatNotFound):
+        await cached_db.get_chat_by_webhook_id('webhook')
+
+    chat = get_chat()
+    await cached_db.save_chat(chat)
+    db.get_chat_by_chat_id = AsyncMock(return_value=chat)
+    db.get_chat_by_webhook_id = AsyncMock(return_value=chat)
+
+    assert (await cached_db.get_chat_by_chat_id(1)).chat_id == 1
+    assert (await cached_db.get_chat_by_webhook_id('webhook')).chat_id == 1
+
+
+async def test_deleted_webhook_is_not_found_in_cache(event_loop):
+    chat = get_chat()
+    db = get_db(chat)
+    cached_db = DatabaseWrapper(db)
+    await cached_db.get_chat_by_webhook_id('webhook')
+
+    chat.delete_webhook_by_id('webhook')
+    await cached_db.save_chat(chat)
+    db.get_chat_by_webhook_id.side_effect = ChatNotFound()
+
+    with pytest.raises(ChatNotFound):
+        await cached_db.get_chat_by_webhook_id('webhook')
+
+
+async def test_lookup_started_before_save_is_not_cached(event_loop):
+    chat = get_chat()
+    db = get_db(chat)
+    cached_db = DatabaseWrapper(db)
+
+    async def get_chat_by_chat_id(chat_id):
+        await cached_db.save_chat(chat)
+        return chat
+
+    db.get_chat_by_chat_id = AsyncMock(side_effect=get_chat_by_chat_id)
+    await cached_db.get_chat_by_chat_id(1)
+    assert cached_db.get_stats()['chats'] == 0
+
+
+async def test_cached_entries_expire(event_loop):
+    db = get_db(get_chat())
+    cached_db = DatabaseWrapper(db, ttl=-1)
+
+    await cached_db.get_chat_by_chat_id(1)
+    await cached_db.get_chat_by_chat_id(1)
+    assert db.get_chat_by_chat_id.await_count == 2
+
+
+async def test_add_webhook_invalidates_cache(event_loop):
+    db = get_db()
+    cached_db = DatabaseWrapper(db)
+    with pytest.raises(ChatNotFound):
+        await cached_db.get_chat_by_webhook_id('webhook')
+
+    chat = get_chat()
+    db.add_webhook = AsyncMock(return_value=chat)
+    db.get_chat_by_webhook_id = AsyncMock(return_value=chat)
+    await cached_db.add_webhook(1, chat.webhooks[0])
+
+    assert (await cached_db.get_chat_by_webhook_id('webhook')).chat_id == 1
+
+
+async def test_remove_webhook_invalidates_cache(event_loop):
+    db = get_db(get_chat())
+    cached_db = DatabaseWrapper(db)
+    await cached_db.get_chat_by_webhook_id('webhook')
+
+    db.remove_webhook = AsyncMock(return_value=Chat(chat_id=1))
+    db.get_chat_by_webhook_id.side_effect = ChatNotFound()
+    await cached_db.remove_webhook(1, 'webhook')
+
+    with pytest.raises(ChatNotFound):
+        await cached_db.get_chat_by_webhook_id('webhook')
+
+
+async def test_resolve_webhook_is_cached(event_loop):
+    db = get_db(get_chat())
+    cached_db = DatabaseWrapper(db)
+
+    for _ in range(2):
+        chat_id, webhook = await cached_db.resolve_webhook('webhook')
+        assert chat_id == 1
+        assert webhook.webhook_id == 'webhook'
+    db.resolve_webhook.assert_awaited_once_with('webhook')
+
+
+async def test_resolve_webhook_uses_cached_chat(event_loop):
+    db = get_db(get_chat())
+    cached_db = DatabaseWrapper(db)
+    await cached_db.get_chat_by_chat_id(1)
+
+    chat_id, webhook = await cached_db.resolve_webhook('webhook')
+    assert chat_id == 1
+    db.resolve_webhook.assert_not_awaited()
+
+
+async def test_save_chat_invalidates_resolved_webhooks(event_loop):
+    chat = get_chat()
+    db = get_db(chat)
+    cached_db = DatabaseWrapper(db)
+    await cached_db.resolve_webhook('webhook')
+    await cached_db.get_chat_by_chat_id(1)
+
+    chat.delete_webhook_by_id('webhook')
+    await cached_db.save_chat(chat)
+    db.resolve_webhook.side_effect = ChatNotFound()
+
+    with pytest.raises(ChatNotFound):
+        await cached_db.resolve_webhook('webhook')
+
+
+async def test_set_webhook_repository_names_invalidates_chat(event_loop):
+    db = get_db(get_chat())
+    db.set_webhook_repository_names = AsyncMock()
+    cached_db = DatabaseWrapper(db)
+    await cached_db.resolve_webhook('webhook')
+    await cached_db.get_chat_by_chat_id(1)
+
+    await cached_db.set_webhook_repository_names([(1, 'webhook', 'repository')])
+    db.set_webhook_repository_names.assert_awaited_once_with(
+        [(1, 'webhook', 'repository')]
+    )
+    await cached_db.resolve_webhook('webhook')
+    await cached_db.get_chat_by_chat_id(1)
+    assert db.resolve_webhook.await_count == 2
+    assert db.get_chat_by_chat_id.await_count == 2
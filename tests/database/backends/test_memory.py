@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import pytest
+
+from webhook_telegram_bot.database.backends.memory import DatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+from webhook_telegram_bot.exceptions import ImproperlyConfiguredException
+
+
+@pytest.fixture
+def db_wrapper():
+    db = DatabaseWrapper('memory://')
+    yield db
+    db.close()
+
+
+def get_webhook(webhook_id='webhook'):
+    return Webhook(webhook_id=webhook_id, service='bitbucket')
+
+
+async def test_save_chat(db_wrapper: DatabaseWrapper):
+    chat = await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[get_webhook()]))
+    assert chat.id is not None
+
+    assert (await db_wrapper.get_chat_by_chat_id(1)).webhooks == [get_webhook()]
+    assert (await db_wrapper.get_chat_by_webhook_id('webhook')).chat_id == 1
+
+    chat.webhooks = [get_webhook('another_webhook')]
+    await db_wrapper.save_chat(chat)
+    assert (await db_wrapper.get_chat_by_webhook_id('another_webhook')).chat_id == 1
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id('webhook')
+
+
+async def test_returned_chat_is_a_copy(db_wrapper: DatabaseWrapper):
+    await db_wrapper.save_chat(Chat(chat_id=1))
+    chat = await db_wrapper.get_chat_by_chat_id(1)
+    chat.webhooks.append(get_webhook())
+
+    assert (await db_wrapper.get_chat_by_chat_id(1)).webhooks == []
+
+
+async def test_get_chat_raise_exception_if_chat_not_found(db_wrapper: DatabaseWrapper):
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_chat_id(1)
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id('webhook')
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.resolve_webhook('webhook')
+
+
+async def test_add_resolve_and_remove_webhook(db_wrapper: DatabaseWrapper):
+    await db_wrapper.add_webhook(1, get_webhook())
+    chat = await db_wrapper.add_webhook(1, get_webhook('another_webhook'))
+    assert chat.webhooks == [get_webhook(), get_webhook('another_webhook')]
+
+    assert await db_wrapper.resolve_webhook('webhook') == (1, get_webhook())
+
+    chat = await db_wrapper.remove_webhook(1, 'webhook')
+    assert chat.webhooks == [get_webhook('another_webhook')]
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.resolve_webhook('webhook')
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.remove_webhook(2, 'webhook')
+
+
+async def test_iterate_chat_ids(db_wrapper: DatabaseWrapper):
+    for chat_id in (3, 1, 2):
+        await db_wrapper.save_chat(Chat(chat_id=chat_id))
+
+    assert [chat_id async for chat_id in db_wrapper.iterate_chat_ids()] == [1, 2, 3]
+    assert [chat_id async for chat_id in db_wrapper.iterate_chat_ids(1)] == [2, 3]
+
+
+async def test_snapshot_is_written_on_close_and_loaded(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    db = DatabaseWrapper(f'memory://{path}?snapshot_interval=3600')
+    await db.add_webhook(1, get_webhook())
+    assert not path.exists()
+    db.close()
+
+    db = DatabaseWrapper(f'memory://{path}')
+    assert await db.resolve_webhook('webhook') == (1, get_webhook())
+    await db.drop_database()
+    assert not os.path.exists(path)
+
+
+async def test_snapshot_is_written_after_interval(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    db = DatabaseWrapper(f'memory://{path}?snapshot_interval=0')
+    await db.save_chat(Chat(chat_id=1))
+    assert db.snapshot_handle is not None
+
+    await asyncio.sleep(0.01)
+    assert db.snapshot_handle is None
+    assert (await DatabaseWrapper(f'memory://{path}').get_chat_by_chat_id(1)).id == 1
+
+
+async def test_second_worker_with_snapshot_refuses_to_start(tmp_path, caplog):
+    url = f'memory://{tmp_path}/snapshot.json'
+    db = DatabaseWrapper(url)
+    await db.connect()
+
+    other_db = DatabaseWrapper(url)
+    with pytest.raises(ImproperlyConfiguredException):
+        await other_db.connect()
+    other_db.save_snapshot()
+    assert 'snapshot is not written' in caplog.text
+
+    db.close()
+    await other_db.connect()
+    other_db.close()
+
+
+async def test_set_webhook_repository_names(db_wrapper: DatabaseWrapper):
+    await db_wrapper.add_webhook(1, get_webhook())
+    await db_wrapper.set_webhook_repository_names(
+        [(1, 'webhook', 'repository'), (2, 'unknown_webhook', 'repository')]
+    )
+
+    _, webhook = await db_wrapper.resolve_webhook('webhook')
+    assert webhook.repository_name == 'repository'
@@ -1,9 +1,11 @@
+import os
 from uuid import uuid4
 
 import pytest
 from first import first
 from motor.motor_asyncio import AsyncIOMotorCollection
 
+from webhook_telegram_bot.database.backends.mongo import DatabaseWrapper
 from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
 from webhook_telegram_bot.database.exceptions import ChatNotFound
 from webhook_telegram_bot.database.models import Chat, Webhook
@@ -44,6 +46,21 @@ async def test_get_chat_by_repository_id(db_wrapper: DatabaseWrapperImpl):
     assert first(chat.webhooks).webhook_id == webhook_id
 
 
+async def test_resolve_webhook(db_wrapper: DatabaseWrapperImpl):
+    webhook_id = uuid4().hex
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.resolve_webhook(webhook_id)
+
+    webhook = Webhook(webhook_id=webhook_id, service='bitbucket')
+    another_webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[another_webhook, webhook]))
+
+    chat_id, resolved_webhook = await db_wrapper.resolve_webhook(webhook_id)
+    assert chat_id == 1
+    assert resolved_webhook == webhook
+    assert resolved_webhook.service == 'bitbucket'
+
+
 async def test_save_chat(db_wrapper: DatabaseWrapperImpl):
     webhook_id = uuid4().hex
     webhook = Webhook(webhook_id=webhook_id, service='bitbucket')
@@ -73,3 +90,108 @@ async def test_update_chat(db_wrapper: DatabaseWrapperImpl):
 
     assert created_chat_id == updated_chat.id
     assert len(updated_chat.webhooks) == 2
+
+
+async def test_add_webhook(db_wrapper: DatabaseWrapperImpl):
+    webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    chat = await db_wrapper.add_webhook(1, webhook)
+    assert chat.id is not None
+    assert chat.webhooks == [webhook]
+
+    another_webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    chat = await db_wrapper.add_webhook(1, another_webhook)
+    assert chat.webhooks == [webhook, another_webhook]
+
+
+async def test_remove_webhook(db_wrapper: DatabaseWrapperImpl):
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.remove_webhook(1, uuid4().hex)
+
+    webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    await db_wrapper.add_webhook(1, webhook)
+    chat = await db_wrapper.remove_webhook(1, webhook.webhook_id)
+    assert chat.webhooks == []
+
+
+async def test_iterate_chat_ids(db_wrapper: DatabaseWrapperImpl):
+    collection: AsyncIOMotorCollection = db_wrapper.get_collection('chats')
+    await collection.insert_many([{'chat_id': chat_id} for chat_id in (3, -1, 2)])
+
+    assert [chat_id async for chat_id in db_wrapper.iterate_chat_ids()] == [-1, 2, 3]
+    assert [chat_id async for chat_id in db_wrapper.iterate_chat_ids(2)] == [3]
+
+
+async def test_acquire_lease(db_wrapper: DatabaseWrapperImpl):
+    assert await db_wrapper.acquire_lease('lease', 'first', 60)
+    assert await db_wrapper.acquire_lease('lease', 'first', 60)
+    assert not await db_wrapper.acquire_lease('lease', 'second', 60)
+    assert await db_wrapper.acquire_lease('expired', 'first', -1)
+    assert await db_wrapper.acquire_lease('expired', 'second', 60)
+
+
+async def test_mark_update_seen(db_wrapper: DatabaseWrapperImpl):
+    assert await db_wrapper.mark_update_seen(1, 60)
+    assert not await db_wrapper.mark_update_seen(1, 60)
+    assert await db_wrapper.mark_update_seen(2, -1)
+    assert await db_wrapper.mark_update_seen(2, 60)
+
+
+async def test_ensure_indexes(db_wrapper: DatabaseWrapperImpl):
+    await db_wrapper.ensure_indexes()
+    # indexes are created once
+    await db_wrapper.ensure_indexes()
+
+    collection: AsyncIOMotorCollection = db_wrapper.get_collection('chats')
+    indexes = await collection.index_information()
+    assert indexes['chat_id']['unique']
+    assert indexes['webhooks.webhook_id']['key'] == [('webhooks.webhook_id', 1)]
+
+
+async def test_set_webhook_repository_names(db_wrapper: DatabaseWrapperImpl):
+    webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    another_webhook = Webhook(webhook_id=uuid4().hex, service='bitbucket')
+    await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[another_webhook, webhook]))
+
+    await db_wrapper.set_webhook_repository_names(
+        [(1, webhook.webhook_id, 'repository')]
+    )
+    chat = await db_wrapper.get_chat_by_chat_id(1)
+    assert chat.webhooks[0].repository_name is None
+    assert chat.webhooks[1].repository_name == 'repository'
+
+
+def test_client_is_created_on_first_use_in_process(monkeypatch):
+    db = DatabaseWrapper('mongodb://localhost:27017/db')
+    assert db.process_client is None
+
+    client = db.client
+    assert db.client is client
+    assert db.db.name == 'db'
+
+    # forked worker does not use client of the parent process
+    pid = os.getpid()
+    monkeypatch.setattr(os, 'getpid', lambda: pid + 1)
+    assert db.client is not client
+    db.close()
+    assert db.closed
+
+
+def test_options_of_url_take_precedence(caplog):
+    db = DatabaseWrapper(
+        'mongodb://localhost:27017/db?serverSelectionTimeoutMS=200',
+        serverSelectionTimeoutMS=30000,
+        minPoolSize=2,
+    )
+    assert db.client_options == {'minPoolSize': 2}
+    assert (
+        'serverSelectionTimeoutMS=30000 is ignored, url sets '
+        'serverSelectionTimeoutMS=200' in caplog.text
+    )
+    assert db.min_pool_size == 2
+    db.close()
+
+
+def test_min_pool_size_of_url():
+    db = DatabaseWrapper('mongodb://localhost:27017/db?minPoolSize=3', minPoolSize=2)
+    assert db.min_pool_size == 3
+    db.close()
@@ -0,0 +1,89 @@
+from uuid import uuid4
+
+import pytest
+
+from webhook_telegram_bot.config import get_config
+from webhook_telegram_bot.database.backends.mongo_normalized import DatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+
+@pytest.fixture
+async def db_wrapper(event_loop):
+    db = DatabaseWrapper(get_config()['DATABASE_URL'])
+    yield db
+    await db.drop_database()
+    db.close()
+
+
+def get_webhook():
+    return Webhook(webhook_id=uuid4().hex, service='bitbucket')
+
+
+async def test_save_chat(db_wrapper: DatabaseWrapper):
+    webhook = get_webhook()
+    chat = await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[webhook]))
+    assert chat.id is not None
+
+    chat = await db_wrapper.get_chat_by_chat_id(1)
+    assert chat.webhooks == [webhook]
+    chat = await db_wrapper.get_chat_by_webhook_id(webhook.webhook_id)
+    assert chat.chat_id == 1
+
+    webhook.repository_name = 'repository'
+    another_webhook = get_webhook()
+    await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[another_webhook, webhook]))
+    chat = await db_wrapper.get_chat_by_chat_id(1)
+    assert chat.webhooks == [webhook, another_webhook]
+    assert chat.webhooks[0].repository_name == 'repository'
+
+    await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[another_webhook]))
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id(webhook.webhook_id)
+
+
+async def test_get_chat_raise_exception_if_chat_not_found(db_wrapper: DatabaseWrapper):
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_chat_id(1)
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id(uuid4().hex)
+
+
+async def test_resolve_webhook(db_wrapper: DatabaseWrapper):
+    webhook = get_webhook()
+    await db_wrapper.add_webhook(1, webhook)
+
+    chat_id, resolved_webhook = await db_wrapper.resolve_webhook(webhook.webhook_id)
+    assert chat_id == 1
+    assert resolved_webhook == webhook
+
+
+async def test_add_and_remove_webhook(db_wrapper: DatabaseWrapper):
+    webhook = get_webhook()
+    another_webhook = get_webhook()
+    await db_wrapper.add_webhook(1, webhook)
+    chat = await db_wrapper.add_webhook(1, another_webhook)
+    assert chat.webhooks == [webhook, another_webhook]
+
+    chat = await db_wrapper.remove_webhook(1, webhook.webhook_id)
+    assert chat.webhooks == [another_webhook]
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.remove_webhook(2, webhook.webhook_id)
+
+
+async def test_ensure_indexes(db_wrapper: DatabaseWrapper):
+    await db_wrapper.ensure_indexes()
+
+    indexes = await db_wrapper.get_collection('webhooks').index_information()
+    assert indexes['chat_id']['key'] == [('chat_id', 1), ('added_at', 1), ('_id', 1)]
+
+
+async def test_set_webhook_repository_names(db_wrapper: DatabaseWrapper):
+    webhook = get_webhook()
+    await db_wrapper.add_webhook(1, webhook)
+    await db_wrapper.set_webhook_repository_names(
+        [(1, webhook.webhook_id, 'repository')]
+    )
+
+    _, webhook = await db_wrapper.resolve_webhook(webhook.webhook_id)
+    assert webhook.repository_name == 'repository'
@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+from webhook_telegram_bot.database.backends.sqlite import DatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+
+@pytest.fixture
+def db_wrapper(tmp_path):
+    db = DatabaseWrapper(f'sqlite://{tmp_path}/db.sqlite3?pool_size=2')
+    yield db
+    db.close()
+
+
+def get_webhook(webhook_id='webhook'):
+    return Webhook(webhook_id=webhook_id, service='bitbucket')
+
+
+async def test_database_is_in_wal_mode(db_wrapper: DatabaseWrapper):
+    connection = db_wrapper.get_connection()
+    assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+
+
+async def test_connection_is_opened_on_connect(tmp_path):
+    db = DatabaseWrapper(f'sqlite://{tmp_path}/db.sqlite3')
+    assert db.connections == []
+    assert not (tmp_path / 'db.sqlite3').exists()
+    await db.connect()
+    assert len(db.connections) == 1
+    with pytest.raises(ChatNotFound):
+        await db.get_chat_by_chat_id(1)
+    db.close()
+
+
+async def test_process_does_not_use_connections_of_parent(db_wrapper, monkeypatch):
+    await db_wrapper.connect()
+    parent_executor = db_wrapper.executor
+    parent_connection = db_wrapper.get_connection()
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    assert db_wrapper.get_connection() is not parent_connection
+    assert db_wrapper.executor is not parent_executor
+    assert db_wrapper.connections == [db_wrapper.get_connection()]
+    monkeypatch.undo()
+    parent_executor.shutdown()
+    parent_connection.close()
+
+
+async def test_save_chat(db_wrapper: DatabaseWrapper):
+    chat = await db_wrapper.save_chat(Chat(chat_id=1, webhooks=[get_webhook()]))
+    assert chat.id == 1
+
+    assert (await db_wrapper.get_chat_by_chat_id(1)).webhooks == [get_webhook()]
+    assert (await db_wrapper.get_chat_by_webhook_id('webhook')).chat_id == 1
+
+    webhook = get_webhook()
+    webhook.repository_name = 'repository'
+    chat.webhooks = [get_webhook('another_webhook'), webhook]
+    await db_wrapper.save_chat(chat)
+    chat = await db_wrapper.get_chat_by_chat_id(1)
+    assert chat.webhooks == [get_webhook('another_webhook'), webhook]
+    assert chat.webhooks[1].repository_name == 'repository'
+
+    chat.webhooks = []
+    await db_wrapper.save_chat(chat)
+    assert (await db_wrapper.get_chat_by_chat_id(1)).webhooks == []
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id('webhook')
+
+
+async def test_get_chat_raise_exception_if_chat_not_found(db_wrapper: DatabaseWrapper):
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_chat_id(1)
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_webhook_id('webhook')
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.resolve_webhook('webhook')
+
+
+async def test_add_resolve_and_remove_webhook(db_wrapper: DatabaseWrapper):
+    await db_wrapper.add_webhook(1, get_webhook())
+    chat = await db_wrapper.add_webhook(1, get_webhook('another_webhook'))
+    assert chat.webhooks == [get_webhook(), get_webhook('another_webhook')]
+
+    assert await db_wrapper.resolve_webhook('webhook') == (1, get_webhook())
+
+    chat = await db_wrapper.remove_webhook(1, 'webhook')
+    assert chat.webhooks == [get_webhook('another_webhook')]
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.resolve_webhook('webhook')
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.remove_webhook(2, 'webhook')
+
+
+async def test_iterate_chat_ids(db_wrapper: DatabaseWrapper, monkeypatch):
+    monkeypatch.setattr(
+        'webhook_telegram_bot.database.backends.sqlite.CURSOR_BATCH_SIZE', 2
+    )
+    for chat_id in (3, 1, 2, -1):
+        await db_wrapper.save_chat(Chat(chat_id=chat_id))
+
+    chat_ids = [chat_id async for chat_id in db_wrapper.iterate_chat_ids()]
+    assert chat_ids == [-1, 1, 2, 3]
+    assert [chat_id async for chat_id in db_wrapper.iterate_chat_ids(1)] == [2, 3]
+
+
+async def test_acquire_lease(db_wrapper: DatabaseWrapper):
+    assert await db_wrapper.acquire_lease('lease', 'owner', 60)
+    assert await db_wrapper.acquire_lease('lease', 'owner', 60)
+    assert not await db_wrapper.acquire_lease('lease', 'another_owner', 60)
+    assert await db_wrapper.acquire_lease('expired_lease', 'owner', -1)
+    assert await db_wrapper.acquire_lease('expired_lease', 'another_owner', 60)
+
+
+async def test_mark_update_seen(db_wrapper: DatabaseWrapper):
+    assert await db_wrapper.mark_update_seen(1, 60)
+    assert not await db_wrapper.mark_update_seen(1, 60)
+    assert await db_wrapper.mark_update_seen(2, -1)
+    # expired updates are deleted
+    assert await db_wrapper.mark_update_seen(2, 60)
+
+
+async def test_ensure_indexes_and_drop_database(db_wrapper: DatabaseWrapper):
+    await db_wrapper.ensure_indexes()
+    await db_wrapper.add_webhook(1, get_webhook())
+    await db_wrapper.drop_database()
+
+    with pytest.raises(ChatNotFound):
+        await db_wrapper.get_chat_by_chat_id(1)
+    indexes = (
+        db_wrapper.get_connection().execute('PRAGMA index_list(webhooks)').fetchall()
+    )
+    assert 'webhooks_chat_id' in [index[1] for index in indexes]
+
+
+async def test_set_webhook_repository_names(db_wrapper: DatabaseWrapper):
+    await db_wrapper.add_webhook(1, get_webhook())
+    await db_wrapper.set_webhook_repository_names(
+        [(1, 'webhook', 'repository'), (2, 'unknown_webhook', 'repository')]
+    )
+
+    _, webhook = await db_wrapper.resolve_webhook('webhook')
+    assert webhook.repository_name == 'repository'
@@ -0,0 +1,68 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from webhook_telegram_bot.database.write_behind import RepositoryNameWriter
+
+
+def get_db():
+    db = Mock()
+    db.set_webhook_repository_names = AsyncMock()
+    return db
+
+
+async def test_repository_names_are_flushed_after_interval():
+    db = get_db()
+    writer = RepositoryNameWriter(db, flush_interval=0.01)
+    writer.start()
+    writer.set(1, 'webhook', 'repository')
+    writer.set(1, 'webhook', 'repository')
+    writer.set(2, 'another_webhook', 'another_repository')
+    db.set_webhook_repository_names.assert_not_awaited()
+
+    await asyncio.sleep(0.05)
+    db.set_webhook_repository_names.assert_awaited_once_with(
+        [(1, 'webhook', 'repository'), (2, 'another_webhook', 'another_repository')]
+    )
+    await writer.stop()
+    assert writer.get_stats() == {
+        'pending': 0,
+        'batches': 1,
+        'written': 2,
+        'failed': 0,
+    }
+
+
+async def test_full_batch_is_flushed_without_waiting_for_interval():
+    db = get_db()
+    writer = RepositoryNameWriter(db, flush_interval=3600, max_batch_size=2)
+    writer.start()
+    writer.set(1, 'webhook', 'repository')
+    writer.set(2, 'another_webhook', 'another_repository')
+
+    await asyncio.sleep(0)
+    db.set_webhook_repository_names.assert_awaited_once()
+    await writer.stop()
+
+
+async def test_repository_names_are_flushed_on_stop():
+    db = get_db()
+    writer = RepositoryNameWriter(db, flush_interval=3600)
+    writer.start()
+    writer.set(1, 'webhook', 'repository')
+
+    await writer.stop()
+    db.set_webhook_repository_names.assert_awaited_once_with(
+        [(1, 'webhook', 'repository')]
+    )
+
+
+async def test_failed_batch_is_dropped(caplog):
+    db = get_db()
+    db.set_webhook_repository_names.side_effect = Exception('error')
+    writer = RepositoryNameWriter(db)
+    writer.set(1, 'webhook', 'repository')
+
+    await writer.flush()
+    assert writer.get_stats()['failed'] == 1
+    assert writer.get_stats()['pending'] == 0
+    assert 'Failed to save 1 repository names: error' in caplog.messages
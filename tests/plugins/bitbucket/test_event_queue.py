@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from webhook_telegram_bot.plugins.bitbucket.event_queue import BitbucketEventQueue
+from webhook_telegram_bot.telegram.outbox import Outbox
+
+
+async def test_bitbucket_event_queue_process_events(event_loop):
+    processed = []
+
+    async def processor(webhook_id, event_key, payload):
+        processed.append((webhook_id, event_key, payload))
+
+    event_queue = BitbucketEventQueue(processor, workers=2)
+    event_queue.start()
+    assert event_queue.put('webhook', 'repo:push', b'{}')
+    await event_queue.stop()
+
+    assert processed == [('webhook', 'repo:push', b'{}')]
+    stats = event_queue.get_stats()
+    assert stats['accepted'] == 1
+    assert stats['processed'] == 1
+
+
+async def test_bitbucket_event_queue_process_events_left_in_outbox(
+    event_loop, tmp_path
+):
+    release = asyncio.Event()
+    processed = []
+
+    async def processor(webhook_id, event_key, payload):
+        await release.wait()
+        processed.append((webhook_id, event_key, payload))
+
+    event_queue = BitbucketEventQueue(processor, outbox=Outbox(str(tmp_path)))
+    event_queue.start()
+    assert event_queue.put('webhook', 'repo:push', b'{}')
+    # stopped before the event is processed
+    await event_queue.stop(timeout=0)
+    assert processed == []
+
+    release.set()
+    event_queue = BitbucketEventQueue(processor, outbox=Outbox(str(tmp_path)))
+    event_queue.start()
+    await asyncio.sleep(0)
+    await event_queue.stop()
+
+    assert processed == [('webhook', 'repo:push', b'{}')]
+    assert event_queue.get_stats()['outbox']['pending'] == 0
+
+
+async def test_bitbucket_event_queue_reject_event_if_full(event_loop):
+    release = asyncio.Event()
+
+    async def processor(webhook_id, event_key, payload):
+        await release.wait()
+
+    event_queue = BitbucketEventQueue(processor, max_size=1, workers=1)
+    event_queue.start()
+    assert event_queue.put('webhook', 'repo:push', b'{}')
+    # the worker takes the first event and waits
+    await asyncio.sleep(0)
+    assert event_queue.put('webhook', 'repo:push', b'{}')
+    assert not event_queue.put('webhook', 'repo:push', b'{}')
+    release.set()
+    await event_queue.stop()
+
+    assert event_queue.get_stats()['rejected'] == 1
+
+
+async def test_bitbucket_event_queue_continue_after_failed_event(event_loop):
+    async def processor(webhook_id, event_key, payload):
+        if payload == b'':
+            raise ValueError('Invalid JSON')
+
+    event_queue = BitbucketEventQueue(processor, workers=1)
+    event_queue.start()
+    event_queue.put('webhook', 'repo:push', b'')
+    event_queue.put('webhook', 'repo:push', b'{}')
+    await event_queue.stop()
+
+    stats = event_queue.get_stats()
+    assert stats['failed'] == 1
+    assert stats['processed'] == 1
+
+
+def test_bitbucket_event_queue_raise_exception_if_not_started():
+    async def processor(webhook_id, event_key, payload):
+        pass
+
+    with pytest.raises(RuntimeError):
+        BitbucketEventQueue(processor).put('webhook', 'repo:push', b'{}')
@@ -0,0 +1,129 @@
+from unittest.mock import AsyncMock, Mock
+
+from aiohttp import web
+
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Webhook
+from webhook_telegram_bot.helpers import (
+    set_database,
+    set_message_coalescer,
+    set_repository_name_writer,
+    set_template_engine,
+)
+from webhook_telegram_bot.plugins.bitbucket.event_queue import BitbucketEventQueue
+from webhook_telegram_bot.plugins.bitbucket.handlers import process_bitbucket_event
+from webhook_telegram_bot.plugins.bitbucket.helpers import set_bitbucket_event_queue
+from webhook_telegram_bot.plugins.bitbucket.routes import init_bitbucket_routes
+
+
+def get_app(event_queue, db=None):
+    if db is None:
+        db = Mock()
+        db.resolve_webhook = AsyncMock(
+            return_value=(1, Webhook(webhook_id='webhook', service='bitbucket'))
+        )
+    app = web.Application()
+    set_database(app, db)
+    set_bitbucket_event_queue(app, event_queue)
+    init_bitbucket_routes(app)
+    return app
+
+
+async def test_bitbucket_webhook_handler_accept_event(aiohttp_client):
+    processor = AsyncMock()
+    event_queue = BitbucketEventQueue(processor)
+    event_queue.start()
+    client = await aiohttp_client(get_app(event_queue))
+    url = client.app.router['bitbucket-webhook'].url_for(webhook_id='webhook')
+
+    resp = await client.post(url, data=b'{}', headers={'X-Event-Key': 'repo:push'})
+    assert resp.status == 202
+
+    await event_queue.stop()
+    processor.assert_awaited_once_with('webhook', 'repo:push', b'{}')
+
+
+async def test_bitbucket_webhook_handler_reject_unknown_webhook(aiohttp_client):
+    db = Mock()
+    db.resolve_webhook = AsyncMock(side_effect=ChatNotFound())
+    event_queue = BitbucketEventQueue(AsyncMock())
+    event_queue.start()
+    client = await aiohttp_client(get_app(event_queue, db))
+    url = client.app.router['bitbucket-webhook'].url_for(webhook_id='unknown')
+
+    resp = await client.post(url, data=b'{}', headers={'X-Event-Key': 'repo:push'})
+    assert resp.status == 404
+
+    await event_queue.stop()
+    assert event_queue.get_stats()['accepted'] == 0
+
+
+async def test_bitbucket_webhook_handler_reject_event_if_queue_is_full(
+    aiohttp_client,
+):
+    event_queue = BitbucketEventQueue(AsyncMock(), max_size=1, workers=0)
+    event_queue.start()
+    client = await aiohttp_client(get_app(event_queue))
+    url = client.app.router['bitbucket-webhook'].url_for(webhook_id='webhook')
+    headers = {'X-Event-Key': 'repo:push'}
+
+    resp = await client.post(url, data=b'{}', headers=headers)
+    assert resp.status == 202
+    resp = await client.post(url, data=b'{}', headers=headers)
+    assert resp.status == 503
+    assert resp.headers['Retry-After'] == '5'
+
+
+async def test_bitbucket_webhook_handler_ignore_request_without_event_key(
+    aiohttp_client,
+):
+    event_queue = BitbucketEventQueue(AsyncMock())
+    event_queue.start()
+    client = await aiohttp_client(get_app(event_queue))
+    url = client.app.router['bitbucket-webhook'].url_for(webhook_id='webhook')
+
+    resp = await client.post(url, data=b'{}')
+    assert resp.status == 200
+    await event_queue.stop()
+    assert event_queue.get_stats()['accepted'] == 0
+
+
+async def test_process_bitbucket_event_resolve_webhook(template_engine_mock):
+    db = Mock()
+    db.resolve_webhook = AsyncMock(
+        return_value=(1, Webhook(webhook_id='webhook', service='bitbucket'))
+    )
+    message_coalescer = Mock()
+    message_coalescer.send_message = AsyncMock()
+    app = web.Application()
+    set_database(app, db)
+    set_template_engine(app, template_engine_mock)
+    set_message_coalescer(app, message_coalescer)
+
+    await process_bitbucket_event(app, 'webhook', 'repo:unknown', {})
+
+    db.resolve_webhook.assert_awaited_once_with('webhook')
+    assert message_coalescer.send_message.await_args.kwargs['chat_id'] == 1
+
+
+async def test_process_bitbucket_event_buffers_repository_name(template_engine_mock):
+    db = Mock()
+    db.resolve_webhook = AsyncMock(
+        return_value=(1, Webhook(webhook_id='webhook', service='bitbucket'))
+    )
+    db.save_chat = AsyncMock()
+    repository_name_writer = Mock()
+    message_coalescer = Mock()
+    message_coalescer.send_message = AsyncMock()
+    app = web.Application()
+    set_database(app, db)
+    set_repository_name_writer(app, repository_name_writer)
+    set_template_engine(app, template_engine_mock)
+    set_message_coalescer(app, message_coalescer)
+    data = {'repository': {'repository_name': 'repository'}}
+
+    await process_bitbucket_event(app, 'webhook', 'repo:unknown', data)
+
+    repository_name_writer.set.assert_called_once_with(1, 'webhook', 'repository')
+    db.save_chat.assert_not_awaited()
+    message_coalescer.send_message.assert_awaited_once()
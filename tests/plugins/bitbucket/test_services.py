@@ -25,3 +25,19 @@ def test_bitbucket_event_processor_returns_event_processor():
     event_processor = BitbucketEventProcessor('foobar:action', {})
     concrete_event_processor = event_processor.get_event_processor()
     assert isinstance(concrete_event_processor, UnknownEventProcessor)
+
+
+def test_bitbucket_event_processor_returns_pipeline_key():
+    commit_status = {'commit': {'hash': 'abc'}, 'key': 'pipeline-1'}
+    event_processor = BitbucketEventProcessor(
+        'repo:commit_status_updated', {'commit_status': commit_status}
+    )
+    assert event_processor.get_pipeline_key() == ('abc', 'pipeline-1')
+
+    event_processor = BitbucketEventProcessor(
+        'repo:push', {'commit_status': commit_status}
+    )
+    assert event_processor.get_pipeline_key() is None
+
+    event_processor = BitbucketEventProcessor('pullrequest:created', {})
+    assert event_processor.get_pipeline_key() is None
@@ -13,7 +13,13 @@ def get_db_mock(return_value=None):
     async def save_chat(chat):
         return chat
 
+    async def remove_webhook(chat_id, webhook_id):
+        chat = await get_chat_by_chat_id(chat_id)
+        chat.delete_webhook_by_id(webhook_id)
+        return chat
+
     db = Mock()
     db.get_chat_by_chat_id = get_chat_by_chat_id
     db.save_chat = save_chat
+    db.remove_webhook = remove_webhook
     return db
@@ -0,0 +1,50 @@
+import pytest
+
+from webhook_telegram_bot.telegram.circuit_breaker import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+)
+from webhook_telegram_bot.telegram.exceptions import TelegramCircuitOpenException
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    circuit_breaker = CircuitBreaker(failure_threshold=2)
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CIRCUIT_CLOSED
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CIRCUIT_OPEN
+    with pytest.raises(TelegramCircuitOpenException):
+        circuit_breaker.check()
+
+
+def test_circuit_breaker_lets_one_trial_request_after_cooldown():
+    circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    circuit_breaker.record_failure()
+    circuit_breaker.opened_at -= 0.01
+
+    circuit_breaker.check()
+    assert circuit_breaker.state == CIRCUIT_HALF_OPEN
+    with pytest.raises(TelegramCircuitOpenException):
+        circuit_breaker.check()
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CIRCUIT_OPEN
+
+    circuit_breaker.opened_at -= 0.01
+    circuit_breaker.check()
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CIRCUIT_CLOSED
+    circuit_breaker.check()
+
+
+def test_circuit_breaker_can_be_disabled():
+    circuit_breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        circuit_breaker.record_failure()
+    circuit_breaker.check()
+    assert circuit_breaker.state == CIRCUIT_CLOSED
@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import Mock
+
+from webhook_telegram_bot.telegram.coalescer import MessageCoalescer
+
+
+def get_message_queue_mock():
+    calls = []
+
+    async def put(command, payload, outbox_ids=None):
+        calls.append((command, payload))
+
+    message_queue = Mock()
+    message_queue.put = put
+    message_queue.persist.return_value = []
+    message_queue.calls = calls
+    return message_queue
+
+
+async def test_coalescer_passes_through_when_disabled():
+    message_queue = get_message_queue_mock()
+    coalescer = MessageCoalescer(message_queue, window=0)
+    await coalescer.send_message(chat_id=1, text='foo')
+    await coalescer.send_message(chat_id=1, text='bar')
+
+    assert message_queue.calls == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo'}),
+        ('sendMessage', {'chat_id': 1, 'text': 'bar'}),
+    ]
+
+
+async def test_coalescer_merges_messages_of_chat_within_window():
+    message_queue = get_message_queue_mock()
+    coalescer = MessageCoalescer(message_queue, window=0.05)
+    await coalescer.send_message(chat_id=1, text='foo', parse_mode='HTML')
+    await coalescer.send_message(chat_id=2, text='baz', parse_mode='HTML')
+    await coalescer.send_message(chat_id=1, text='bar', parse_mode='HTML')
+    assert message_queue.calls == []
+
+    await asyncio.sleep(0.1)
+    assert sorted(message_queue.calls, key=lambda call: call[1]['chat_id']) == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo\n\nbar', 'parse_mode': 'HTML'}),
+        ('sendMessage', {'chat_id': 2, 'text': 'baz', 'parse_mode': 'HTML'}),
+    ]
+    assert coalescer.get_stats() == {
+        'window': 0.05,
+        'pending_chats': 0,
+        'received': 3,
+        'sent': 2,
+    }
+
+
+async def test_coalescer_flushes_when_message_limit_is_reached():
+    message_queue = get_message_queue_mock()
+    coalescer = MessageCoalescer(message_queue, window=10, max_length=7)
+    await coalescer.send_message(chat_id=1, text='foo')
+    await coalescer.send_message(chat_id=1, text='bar')
+    assert message_queue.calls == [('sendMessage', {'chat_id': 1, 'text': 'foo'})]
+
+    await coalescer.stop()
+    assert message_queue.calls[-1] == ('sendMessage', {'chat_id': 1, 'text': 'bar'})
+    assert not coalescer.timers
+
+
+async def test_coalescer_keeps_message_sent_while_flush_waits():
+    message_queue = get_message_queue_mock()
+    release = asyncio.Event()
+    put = message_queue.put
+
+    async def blocking_put(command, payload, outbox_ids=None):
+        await release.wait()
+        await put(command, payload, outbox_ids)
+
+    message_queue.put = blocking_put
+    coalescer = MessageCoalescer(message_queue, window=10, max_length=10)
+    await coalescer.send_message(chat_id=1, text='aaaaaaaa')
+    # the queue is full, the flush waits
+    flushing = asyncio.create_task(coalescer.send_message(chat_id=1, text='bbbbbbbb'))
+    await asyncio.sleep(0)
+    await coalescer.send_message(chat_id=1, text='cc')
+    release.set()
+    await flushing
+    await coalescer.stop()
+
+    assert sorted(call[1]['text'] for call in message_queue.calls) == [
+        'aaaaaaaa',
+        'bbbbbbbb',
+        'cc',
+    ]
+    assert not coalescer.timers
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, Mock
+
+from webhook_telegram_bot.telegram.deduplicator import UpdateDeduplicator
+
+
+async def test_update_deduplicator_detect_redelivery(event_loop):
+    deduplicator = UpdateDeduplicator()
+
+    assert not await deduplicator.is_duplicate(1)
+    assert await deduplicator.is_duplicate(1)
+    assert not await deduplicator.is_duplicate(2)
+    assert deduplicator.get_stats()['duplicates'] == 1
+
+
+async def test_update_deduplicator_forget_expired_updates(event_loop):
+    deduplicator = UpdateDeduplicator(ttl=-1)
+
+    assert not await deduplicator.is_duplicate(1)
+    assert not await deduplicator.is_duplicate(1)
+
+
+async def test_update_deduplicator_forget_least_recently_seen_updates(event_loop):
+    deduplicator = UpdateDeduplicator(max_size=2)
+
+    for update_id in (1, 2, 3):
+        assert not await deduplicator.is_duplicate(update_id)
+    assert not await deduplicator.is_duplicate(1)
+    assert await deduplicator.is_duplicate(3)
+
+
+async def test_update_deduplicator_detect_redelivery_to_other_worker(event_loop):
+    db = Mock()
+    db.mark_update_seen = AsyncMock(return_value=False)
+    deduplicator = UpdateDeduplicator(ttl=60, db=db)
+
+    assert await deduplicator.is_duplicate(1)
+    db.mark_update_seen.assert_awaited_once_with(1, 60)
+    # the local cache answers without the shared store
+    assert await deduplicator.is_duplicate(1)
+    db.mark_update_seen.assert_awaited_once()
+
+
+async def test_update_deduplicator_process_update_if_store_fails(event_loop):
+    db = Mock()
+    db.mark_update_seen = AsyncMock(side_effect=Exception('Connection refused'))
+    deduplicator = UpdateDeduplicator(db=db)
+
+    assert not await deduplicator.is_duplicate(1)
+
+
+async def test_update_deduplicator_forget_update(event_loop):
+    db = Mock()
+    db.mark_update_seen = AsyncMock(return_value=True)
+    db.forget_update = AsyncMock()
+    deduplicator = UpdateDeduplicator(db=db)
+
+    assert not await deduplicator.is_duplicate(1)
+    await deduplicator.forget(1)
+    db.forget_update.assert_awaited_once_with(1)
+    assert not await deduplicator.is_duplicate(1)
@@ -1,21 +1,28 @@
-from unittest.mock import Mock
+import logging
+from unittest.mock import AsyncMock, Mock
 from uuid import uuid4
 
+import pytest
 from aiohttp import web
 from aiohttp.test_utils import make_mocked_request
 
-from webhook_telegram_bot.helpers import set_plugins_instances, set_telegram_api
+from webhook_telegram_bot.helpers import (
+    get_command_router,
+    set_plugins_instances,
+    set_telegram_api,
+)
+from webhook_telegram_bot.plugins.base import AbstractPlugin
 from webhook_telegram_bot.telegram.commands import Command
 from webhook_telegram_bot.telegram.constants import TELEGRAM_WEBHOOK_ROUTE
 from webhook_telegram_bot.telegram.handlers import (
-    get_response_from_plugins,
+    create_command_router,
     telegram_request_handler,
 )
 from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
 
 
 def get_request_with_payload(app, payload):
-    async def json_resp():
+    async def json_resp(loads=None):
         return payload
 
     telegram_api = TelegramAPI("", "")
@@ -59,6 +66,32 @@ async def test_telegram_request_handler_return_empty_resp_if_command_unknown(
     assert resp.body is None
 
 
+async def test_telegram_request_handler_skip_redelivered_update(
+    event_loop, app, caplog
+):
+    caplog.set_level(logging.INFO)
+    payload = {'update_id': 1, 'message': {'chat': {'id': 1}, 'text': uuid4().hex}}
+    await telegram_request_handler(get_request_with_payload(app, payload))
+    resp = await telegram_request_handler(get_request_with_payload(app, payload))
+    assert resp.status == 200
+    assert resp.body is None
+    assert 'Update 1 is already processed.' in caplog.messages
+
+
+async def test_telegram_request_handler_process_redelivery_of_failed_update(
+    event_loop, app
+):
+    handler = AsyncMock(side_effect=[Exception('error'), web.Response(text='ok')])
+    get_command_router(app).add_command('/fail', handler)
+    payload = {'update_id': 2, 'message': {'chat': {'id': 1}, 'text': '/fail'}}
+
+    with pytest.raises(Exception):
+        await telegram_request_handler(get_request_with_payload(app, payload))
+    resp = await telegram_request_handler(get_request_with_payload(app, payload))
+    assert resp.text == 'ok'
+    assert handler.await_count == 2
+
+
 async def test_telegram_request_handler_command_start(event_loop, app):
     request = get_request_with_payload(
         app, {'message': {'chat': {'id': 1}, 'text': Command.START}}
@@ -109,17 +142,22 @@ async def test_telegram_request_handler_command_delete_webhook(event_loop, app):
     assert resp.body is not None
 
 
-async def test_get_response_from_plugins(event_loop, app):
+async def test_create_command_router_asks_plugins_about_unknown_commands(
+    event_loop, app
+):
     async def handle_telegram_command(app_, chat_id, command):
         return web.json_response({"foo": "bar"})
 
     plugin = Mock()
     plugin.is_known_command.return_value = True
     plugin.handle_telegram_command = handle_telegram_command
+    plugin.register_commands = lambda router: AbstractPlugin.register_commands(
+        plugin, router
+    )
 
     set_plugins_instances(app, [plugin])
 
-    resp = await get_response_from_plugins(app, 1, 'test')
+    resp = await create_command_router(app).dispatch(app, 1, 'test')
     assert resp is not None
     assert resp.status == 200
     assert resp.body is not None
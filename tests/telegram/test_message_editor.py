@@ -0,0 +1,75 @@
+import asyncio
+from unittest.mock import Mock
+
+from webhook_telegram_bot.telegram.message_editor import MessageEditor
+
+
+def get_message_queue_mock(sent=True):
+    calls = []
+
+    async def put(command, payload, result=None):
+        calls.append((command, dict(payload)))
+        result.set_result(
+            {'message_id': len(calls), 'chat': {'id': payload['chat_id']}}
+            if sent
+            else None
+        )
+
+    message_queue = Mock()
+    message_queue.put = put
+    message_queue.calls = calls
+    return message_queue
+
+
+async def test_message_editor_edits_message_of_the_same_key():
+    message_queue = get_message_queue_mock()
+    message_editor = MessageEditor(message_queue)
+    await message_editor.send_message('a', chat_id=1, text='foo', parse_mode='HTML')
+    await message_editor.send_message('b', chat_id=1, text='bar')
+    await message_editor.send_message('a', chat_id=1, text='baz', parse_mode='HTML')
+    await message_editor.send_message('a', chat_id=1, text='baz', parse_mode='HTML')
+    await asyncio.sleep(0)
+
+    assert message_queue.calls == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo', 'parse_mode': 'HTML'}),
+        ('sendMessage', {'chat_id': 1, 'text': 'bar'}),
+        (
+            'editMessageText',
+            {'chat_id': 1, 'message_id': 1, 'text': 'baz', 'parse_mode': 'HTML'},
+        ),
+    ]
+    assert message_editor.get_stats()['edited'] == 1
+    await message_editor.stop()
+
+
+async def test_message_editor_sends_new_message_if_first_one_failed():
+    message_queue = get_message_queue_mock(sent=False)
+    message_editor = MessageEditor(message_queue)
+    await message_editor.send_message('a', chat_id=1, text='foo')
+    await message_editor.send_message('a', chat_id=1, text='bar')
+    await asyncio.sleep(0)
+
+    assert message_queue.calls == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo'}),
+        ('sendMessage', {'chat_id': 1, 'text': 'bar'}),
+    ]
+
+
+async def test_message_editor_stop_waits_for_pending_edits():
+    message_queue = get_message_queue_mock()
+    put = message_queue.put
+
+    async def slow_put(command, payload, result=None):
+        await asyncio.sleep(0.01)
+        await put(command, payload, result)
+
+    message_editor = MessageEditor(message_queue)
+    await message_editor.send_message('a', chat_id=1, text='foo')
+    message_queue.put = slow_put
+    await message_editor.send_message('a', chat_id=1, text='bar')
+    await message_editor.stop()
+
+    assert message_queue.calls[-1] == (
+        'editMessageText',
+        {'chat_id': 1, 'message_id': 1, 'text': 'bar'},
+    )
@@ -0,0 +1,132 @@
+import asyncio
+import os
+from unittest.mock import Mock
+
+import aiohttp
+
+from webhook_telegram_bot.serializers import loads
+from webhook_telegram_bot.telegram.exceptions import TelegramAPIException
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+from webhook_telegram_bot.telegram.outbox import DEAD_LETTER_NAME, Outbox
+
+
+def get_telegram_api_mock(errors=()):
+    errors = list(errors)
+    calls = []
+
+    async def command(command, payload):
+        calls.append((command, payload))
+        if errors:
+            raise errors.pop(0)
+        return {'ok': True, 'result': {'message_id': 1}}
+
+    telegram_api = Mock()
+    telegram_api.command = command
+    telegram_api.calls = calls
+    return telegram_api
+
+
+async def test_message_queue_sends_message():
+    telegram_api = get_telegram_api_mock()
+    message_queue = MessageQueue(telegram_api, workers=2)
+    message_queue.start()
+    await message_queue.send_message(chat_id=1, text='foo')
+    await message_queue.stop()
+
+    assert telegram_api.calls == [('sendMessage', {'chat_id': 1, 'text': 'foo'})]
+    stats = message_queue.get_stats()
+    assert stats['sent'] == 1
+    assert stats['queue_size'] == 0
+
+
+async def test_message_queue_honors_retry_after():
+    telegram_api = get_telegram_api_mock(
+        [TelegramAPIException(429, 'Too Many Requests', retry_after=0.01)]
+    )
+    message_queue = MessageQueue(telegram_api)
+    message_queue.start()
+    await message_queue.send_message(chat_id=1, text='foo')
+    await message_queue.stop()
+
+    assert len(telegram_api.calls) == 2
+    assert message_queue.sent == 1
+    assert message_queue.retries == 1
+
+
+async def test_message_queue_retries_transient_errors():
+    telegram_api = get_telegram_api_mock(
+        [aiohttp.ClientConnectionError(), TelegramAPIException(502)]
+    )
+    message_queue = MessageQueue(telegram_api, backoff_base=0.01)
+    message_queue.start()
+    await message_queue.send_message(chat_id=1, text='foo')
+    await message_queue.stop()
+
+    assert message_queue.sent == 1
+    assert message_queue.retries == 2
+
+
+async def test_message_queue_does_not_retry_client_errors():
+    telegram_api = get_telegram_api_mock(
+        [TelegramAPIException(400, 'Bad Request: chat not found')]
+    )
+    message_queue = MessageQueue(telegram_api)
+    message_queue.start()
+    await message_queue.send_message(chat_id=1, text='foo')
+    await message_queue.stop()
+
+    assert len(telegram_api.calls) == 1
+    assert message_queue.failed == 1
+    assert message_queue.retries == 0
+
+
+def test_message_queue_backoff_is_bounded():
+    message_queue = MessageQueue(Mock(), backoff_base=1, backoff_max=5)
+    for attempt in range(10):
+        assert 0 <= message_queue.get_backoff(attempt) <= 5
+
+
+async def test_message_queue_replays_outbox_of_stopped_worker(tmp_path):
+    telegram_api = get_telegram_api_mock([TelegramAPIException(502)])
+    outbox = Outbox(str(tmp_path))
+    message_queue = MessageQueue(telegram_api, max_retries=0, outbox=outbox)
+    message_queue.start()
+    await message_queue.send_message(chat_id=1, text='foo')
+    await message_queue.send_message(chat_id=2, text='bar')
+    await message_queue.stop()
+    assert message_queue.get_stats()['outbox']['acknowledged'] == 2
+    assert message_queue.get_stats()['outbox']['dead_lettered'] == 1
+    with open(tmp_path / DEAD_LETTER_NAME, 'rb') as f:
+        dead_letter = [loads(line) for line in f]
+    assert [record['payload'] for record in dead_letter] == [
+        {'chat_id': 1, 'text': 'foo'}
+    ]
+
+    outbox = Outbox(str(tmp_path))
+    outbox.open()
+    outbox.append('sendMessage', {'chat_id': 3, 'text': 'baz'})
+    # the worker is killed before the message is sent
+    for segment in outbox.segments.values():
+        segment.close()
+
+    telegram_api = get_telegram_api_mock()
+    message_queue = MessageQueue(telegram_api, outbox=Outbox(str(tmp_path)))
+    message_queue.start()
+    await message_queue.stop()
+
+    assert telegram_api.calls == [('sendMessage', {'chat_id': 3, 'text': 'baz'})]
+    assert message_queue.outbox.get_stats()['recovered'] == 1
+    assert os.listdir(tmp_path) == [DEAD_LETTER_NAME]
+
+
+async def test_message_queue_resolves_result():
+    message_queue = MessageQueue(get_telegram_api_mock([TelegramAPIException(400)]))
+    message_queue.start()
+    loop = asyncio.get_running_loop()
+    failed, sent = loop.create_future(), loop.create_future()
+    await message_queue.put('sendMessage', {'chat_id': 1}, result=failed)
+    await message_queue.put('sendMessage', {'chat_id': 1}, result=sent)
+    await message_queue.stop()
+
+    assert failed.result() is None
+    assert sent.result() == {'message_id': 1}
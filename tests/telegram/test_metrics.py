@@ -0,0 +1,23 @@
+from webhook_telegram_bot.telegram.metrics import CommandMetrics, LatencyHistogram
+
+
+def test_latency_histogram_is_cumulative():
+    histogram = LatencyHistogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.as_dict() == {
+        'avg': 2.65 / 4,
+        'max': 2,
+        'count': 4,
+        'histogram': {'0.1': 2, '1': 3, '+Inf': 4},
+    }
+
+
+def test_command_metrics_counts_errors():
+    metrics = CommandMetrics()
+    metrics.observe_error('timeout')
+    metrics.observe_error('timeout')
+    metrics.observe_error('502')
+
+    assert metrics.as_dict()['errors'] == {'timeout': 2, '502': 1}
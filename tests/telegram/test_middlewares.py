@@ -0,0 +1,40 @@
+from aiohttp import web
+
+from webhook_telegram_bot.helpers import get_telegram_webhook_token
+from webhook_telegram_bot.main import init_config
+from webhook_telegram_bot.telegram.constants import (
+    TELEGRAM_SECRET_TOKEN_HEADER,
+    TELEGRAM_WEBHOOK_ROUTE,
+)
+from webhook_telegram_bot.telegram.routes import init_telegram_routes
+
+
+async def test_telegram_secret_token_middleware(aiohttp_client):
+    app = web.Application()
+    init_config(app, {'TELEGRAM_API_TOKEN': 'token', 'TELEGRAM_WEBHOOK_SECRET': 's'})
+    init_telegram_routes(app)
+
+    async def health_handler(request):
+        return web.Response()
+
+    app.router.add_get('/health', health_handler)
+    client = await aiohttp_client(app)
+    url = f'{TELEGRAM_WEBHOOK_ROUTE}/{get_telegram_webhook_token(app)}'
+
+    result = await client.post(url, data='not json')
+    assert result.status == 403
+    result = await client.post(url, headers={TELEGRAM_SECRET_TOKEN_HEADER: 'x'})
+    assert result.status == 403
+    result = await client.get('/health')
+    assert result.status == 200
+
+
+def test_telegram_webhook_token_is_stable():
+    app = web.Application()
+    init_config(app, {'TELEGRAM_API_TOKEN': 'token', 'TELEGRAM_WEBHOOK_TOKEN': ''})
+    token = get_telegram_webhook_token(app)
+    assert token == get_telegram_webhook_token(app)
+    assert 'token' not in token
+
+    init_config(app, {'TELEGRAM_WEBHOOK_TOKEN': 'configured'})
+    assert get_telegram_webhook_token(app) == 'configured'
@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+
+from webhook_telegram_bot.telegram.outbox import (
+    RECORD_HEADER,
+    Outbox,
+    OutboxSegment,
+)
+
+
+def test_outbox_removes_acknowledged_segments(tmp_path):
+    outbox = Outbox(str(tmp_path), segment_size=64)
+    assert outbox.open() == []
+
+    first = outbox.append('sendMessage', {'chat_id': 1, 'text': 'foo'})
+    second = outbox.append('sendMessage', {'chat_id': 2, 'text': 'bar'})
+    assert first[0] != second[0]
+    assert len(os.listdir(tmp_path)) == 2
+
+    outbox.acknowledge(first)
+    assert len(os.listdir(tmp_path)) == 1
+    assert outbox.get_stats()['pending'] == 1
+
+    outbox.acknowledge(second)
+    outbox.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_outbox_segment_stops_at_torn_record(tmp_path):
+    segment = OutboxSegment.create(str(tmp_path), 256)
+    segment.append(b'foo')
+    offset = segment.append(b'bar')
+    segment.append(b'baz')
+    segment.acknowledge(offset)
+    assert segment.read_pending() == [b'foo', b'baz']
+
+    segment.mmap[RECORD_HEADER.size] = ord('x')
+    assert segment.read_pending() == []
+    segment.remove()
+
+
+def write_outbox(path):
+    outbox = Outbox(path)
+    outbox.open()
+    outbox.append('sendMessage', {'chat_id': 1, 'text': 'foo'})
+    outbox.append('sendMessage', {'chat_id': 2, 'text': 'bar'})
+    outbox.acknowledge(outbox.append('sendMessage', {'chat_id': 3, 'text': 'baz'}))
+    os._exit(0)
+
+
+def test_outbox_recovers_entries_of_stopped_process(tmp_path):
+    path = str(tmp_path)
+    outbox = Outbox(path)
+    outbox.open()
+
+    process = multiprocessing.get_context('fork').Process(
+        target=write_outbox, args=(path,)
+    )
+    process.start()
+    process.join()
+
+    other_outbox = Outbox(path)
+    entries = other_outbox.open()
+    assert [(command, payload) for _, command, payload in entries] == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo'}),
+        ('sendMessage', {'chat_id': 2, 'text': 'bar'}),
+    ]
+    # segments of running processes are not taken over
+    third_outbox = Outbox(path)
+    assert third_outbox.open() == []
+    third_outbox.close()
+
+    for entry_id, _, _ in entries:
+        other_outbox.acknowledge(entry_id)
+    other_outbox.close()
+    outbox.close()
+    assert os.listdir(path) == []
@@ -0,0 +1,136 @@
+import asyncio
+from unittest.mock import Mock
+
+from aiohttp import web
+
+from webhook_telegram_bot.telegram.exceptions import TelegramAPIException
+from webhook_telegram_bot.telegram.polling import TelegramPoller
+from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
+
+
+def get_poller(
+    tmp_path, handler=None, updates=(), delete_webhook_errors=0, offset_path=None
+):
+    batches = [list(updates)]
+    put_calls = []
+    errors = [TelegramAPIException(500, 'foo')] * delete_webhook_errors
+
+    async def get_updates(offset, limit, timeout):
+        if batches:
+            return batches.pop(0)
+        await asyncio.sleep(1)
+        return []
+
+    async def delete_webhook():
+        if errors:
+            raise errors.pop()
+
+    async def put(command, payload):
+        put_calls.append((command, payload))
+
+    async def default_handler(update):
+        return TelegramAPI.send_message_as_response(
+            chat_id=update['message']['chat']['id'], text=update['message']['text']
+        )
+
+    telegram_api = Mock()
+    telegram_api.get_updates = get_updates
+    telegram_api.delete_webhook = delete_webhook
+    telegram_api.get_chat_id = TelegramAPI.get_chat_id
+    message_queue = Mock()
+    message_queue.put = put
+    message_queue.calls = put_calls
+
+    poller = TelegramPoller(
+        handler or default_handler,
+        telegram_api,
+        message_queue,
+        offset_path=offset_path or str(tmp_path / 'offset'),
+        retry_delay=0.01,
+    )
+    return poller, message_queue
+
+
+def get_update(update_id, chat_id, text):
+    return {'update_id': update_id, 'message': {'chat': {'id': chat_id}, 'text': text}}
+
+
+def test_poller_persists_offset(tmp_path):
+    poller, _ = get_poller(tmp_path)
+    assert poller.load_offset() is None
+    poller.save_offset(42)
+    assert poller.load_offset() == 42
+
+
+def test_poller_lock_is_exclusive(tmp_path):
+    poller, _ = get_poller(tmp_path)
+    another_poller, _ = get_poller(tmp_path)
+    assert poller.acquire_lock()
+    assert not another_poller.acquire_lock()
+    poller.release_lock()
+    assert another_poller.acquire_lock()
+    another_poller.release_lock()
+
+
+def test_poller_creates_directory_of_offset(tmp_path):
+    poller, _ = get_poller(tmp_path, offset_path=str(tmp_path / 'state' / 'offset'))
+    assert poller.acquire_lock()
+    poller.save_offset(42)
+    poller.release_lock()
+    assert poller.load_offset() == 42
+
+
+async def test_poller_processes_updates_and_sends_replies(tmp_path):
+    updates = [get_update(10, 1, 'foo'), get_update(11, 2, 'bar')]
+    poller, message_queue = get_poller(tmp_path, updates=updates)
+    poller.start()
+    await asyncio.sleep(0.05)
+    await poller.stop()
+
+    assert sorted(message_queue.calls, key=lambda call: call[1]['chat_id']) == [
+        ('sendMessage', {'chat_id': 1, 'text': 'foo'}),
+        ('sendMessage', {'chat_id': 2, 'text': 'bar'}),
+    ]
+    assert poller.load_offset() == 12
+    assert poller.lock_fd is None
+
+
+async def test_poller_keeps_order_of_chat_updates(tmp_path):
+    processed = []
+
+    async def handler(update):
+        await asyncio.sleep(0.01 if update['update_id'] == 1 else 0)
+        processed.append(update['update_id'])
+        return web.Response()
+
+    poller, message_queue = get_poller(tmp_path, handler)
+    await poller.process_updates([get_update(1, 1, 'foo'), get_update(2, 1, 'bar')])
+
+    assert processed == [1, 2]
+    assert message_queue.calls == []
+
+
+async def test_poller_retries_to_delete_webhook(tmp_path):
+    updates = [get_update(10, 1, 'foo')]
+    poller, message_queue = get_poller(
+        tmp_path, updates=updates, delete_webhook_errors=2
+    )
+    poller.start()
+    await asyncio.sleep(0.1)
+    await poller.stop()
+
+    assert message_queue.calls == [('sendMessage', {'chat_id': 1, 'text': 'foo'})]
+
+
+async def test_poller_saves_offset_after_each_update(tmp_path):
+    offsets = []
+
+    async def handler(update):
+        offsets.append(poller.load_offset())
+        return web.Response()
+
+    poller, _ = get_poller(tmp_path, handler)
+    await poller.process_updates([get_update(1, 1, 'foo'), get_update(2, 1, 'bar')])
+
+    assert offsets == [None, 2]
+    assert poller.load_offset() == 3
@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import time
+
+from webhook_telegram_bot.telegram.rate_limiter import (
+    SharedTokenBucket,
+    TelegramRateLimiter,
+    TokenBucket,
+)
+
+
+def test_token_bucket_reserve_returns_delay_when_empty():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = time.monotonic()
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0.5
+    assert bucket.reserve(now) == 1.0
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1, capacity=1)
+    now = time.monotonic()
+    bucket.reserve(now)
+    assert not bucket.is_idle(now)
+    assert bucket.is_idle(now + 1)
+    assert bucket.reserve(now + 1) == 0
+
+
+def test_rate_limiter_uses_group_rate_for_negative_chat_id():
+    rate_limiter = TelegramRateLimiter(private_chat_rate=1, group_chat_rate=20)
+    assert rate_limiter.get_chat_bucket(1).rate == 1
+    assert rate_limiter.get_chat_bucket(-1).rate == 20 / 60
+
+
+def test_rate_limiter_drops_idle_chat_buckets():
+    rate_limiter = TelegramRateLimiter()
+    rate_limiter.get_chat_bucket(1)
+    rate_limiter.get_chat_bucket(2).reserve()
+    rate_limiter.drop_idle_chat_buckets()
+    assert list(rate_limiter.chat_buckets) == [2]
+
+
+async def test_rate_limiter_does_not_block_other_chats():
+    rate_limiter = TelegramRateLimiter(global_rate=100, private_chat_rate=10)
+    started_at = time.monotonic()
+    await asyncio.gather(*[rate_limiter.acquire(chat_id) for chat_id in range(20)])
+    assert time.monotonic() - started_at < 0.1
+
+
+async def test_rate_limiter_paces_same_chat():
+    rate_limiter = TelegramRateLimiter(global_rate=100, private_chat_rate=10)
+    started_at = time.monotonic()
+    await asyncio.gather(*[rate_limiter.acquire(1) for _ in range(3)])
+    assert time.monotonic() - started_at >= 0.19
+
+
+def reserve_shared_tokens(path, count):
+    bucket = SharedTokenBucket(path, rate=1, capacity=10)
+    for _ in range(count):
+        bucket.reserve()
+    bucket.close()
+
+
+def test_shared_token_bucket_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'rate_limit')
+    process = multiprocessing.get_context('fork').Process(
+        target=reserve_shared_tokens, args=(path, 10)
+    )
+    process.start()
+    process.join()
+
+    bucket = SharedTokenBucket(path, rate=1, capacity=10)
+    assert bucket.reserve() > 0
+    bucket.close()
+
+
+def test_rate_limiter_uses_shared_global_bucket(tmp_path):
+    rate_limiter = TelegramRateLimiter(shared_state_path=str(tmp_path / 'rate_limit'))
+    assert isinstance(rate_limiter.global_bucket, SharedTokenBucket)
+    assert rate_limiter.global_bucket.reserve() == 0
+    rate_limiter.close()
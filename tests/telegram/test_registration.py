@@ -0,0 +1,139 @@
+import asyncio
+import fcntl
+import os
+from unittest.mock import AsyncMock, Mock
+
+from webhook_telegram_bot.telegram.registration import WebhookRegistration
+
+URL = 'https://example.com/api/v1/telegram/token'
+
+
+def get_telegram_api_mock(webhook_info=None):
+    telegram_api = Mock()
+    telegram_api.get_webhook_info = AsyncMock(return_value=webhook_info or {})
+    telegram_api.set_webhook = AsyncMock()
+    telegram_api.delete_webhook = AsyncMock()
+    return telegram_api
+
+
+def get_registration(tmp_path, telegram_api, db=None):
+    return WebhookRegistration(
+        telegram_api,
+        URL,
+        lock_path=str(tmp_path / 'webhook'),
+        max_connections=40,
+        allowed_updates=['message', 'callback_query'],
+        db=db,
+    )
+
+
+async def test_only_one_worker_registers_webhook(tmp_path):
+    telegram_api = get_telegram_api_mock()
+    first = get_registration(tmp_path, telegram_api)
+    second = get_registration(tmp_path, telegram_api)
+
+    assert await first.register()
+    assert not await second.register()
+    telegram_api.set_webhook.assert_awaited_once_with(
+        URL,
+        max_connections=40,
+        allowed_updates=['message', 'callback_query'],
+        secret_token=None,
+    )
+
+    await first.unregister()
+    telegram_api.delete_webhook.assert_not_awaited()
+    await second.unregister()
+    telegram_api.delete_webhook.assert_awaited_once()
+
+
+async def test_registered_webhook_is_not_set_again(tmp_path):
+    telegram_api = get_telegram_api_mock(
+        {
+            'url': URL,
+            'max_connections': 40,
+            'allowed_updates': ['callback_query', 'message'],
+        }
+    )
+    registration = get_registration(tmp_path, telegram_api)
+    assert await registration.register()
+    telegram_api.set_webhook.assert_not_awaited()
+    await registration.unregister()
+
+
+async def test_webhook_is_set_again_if_secret_token_changes(tmp_path):
+    telegram_api = get_telegram_api_mock({'url': URL})
+    for secret_token in ['secret', 'secret', 'other']:
+        registration = WebhookRegistration(
+            telegram_api,
+            URL,
+            lock_path=str(tmp_path / 'webhook'),
+            secret_token=secret_token,
+        )
+        assert await registration.register()
+        await registration.unregister()
+
+    assert telegram_api.set_webhook.await_args_list == [
+        (
+            (URL,),
+            {'max_connections': None, 'allowed_updates': None, 'secret_token': token},
+        )
+        for token in ['secret', 'other']
+    ]
+
+
+async def test_register_waits_for_last_worker_without_blocking(tmp_path):
+    telegram_api = get_telegram_api_mock()
+    registration = get_registration(tmp_path, telegram_api)
+    registration.retry_delay = 0.01
+    fd = os.open(str(tmp_path / 'webhook.workers'), os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    task = asyncio.create_task(registration.register())
+    await asyncio.sleep(0.05)
+    assert not task.done()
+
+    os.close(fd)
+    assert await task
+    await registration.unregister()
+
+
+async def test_last_of_workers_stopping_together_deletes_webhook(tmp_path):
+    telegram_api = get_telegram_api_mock()
+    registrations = [get_registration(tmp_path, telegram_api) for _ in range(3)]
+    for registration in registrations:
+        await registration.register()
+
+    await asyncio.gather(*[registration.unregister() for registration in registrations])
+    telegram_api.delete_webhook.assert_awaited_once()
+
+
+async def test_webhook_is_registered_by_lease_owner(tmp_path):
+    telegram_api = get_telegram_api_mock()
+    db = Mock()
+    db.acquire_lease = AsyncMock(return_value=False)
+    registration = get_registration(tmp_path, telegram_api, db)
+
+    assert await registration.register()
+    telegram_api.get_webhook_info.assert_not_awaited()
+
+    await registration.unregister()
+    telegram_api.delete_webhook.assert_not_awaited()
+
+
+async def test_webhook_is_registered_when_lease_is_taken_over(tmp_path):
+    telegram_api = get_telegram_api_mock()
+    db = Mock()
+    db.acquire_lease = AsyncMock(side_effect=[False, True, True])
+    registration = WebhookRegistration(
+        telegram_api, URL, lock_path=str(tmp_path / 'webhook'), db=db, lease_ttl=0.03
+    )
+
+    assert await registration.register()
+    telegram_api.set_webhook.assert_not_awaited()
+    await asyncio.sleep(0.025)
+    telegram_api.set_webhook.assert_awaited_once()
+    assert registration.has_lease
+
+    await registration.unregister()
+    assert registration.lease_task is None
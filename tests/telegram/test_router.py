@@ -0,0 +1,75 @@
+import pytest
+from aiohttp import web
+
+from webhook_telegram_bot.telegram.router import CommandRouter
+
+
+def get_handler(name):
+    async def handler(app, chat_id, text):
+        return web.json_response({'handler': name, 'text': text})
+
+    return handler
+
+
+def test_command_router_resolve_exact_command():
+    router = CommandRouter()
+    handler = get_handler('start')
+    router.add_command('/start', handler)
+
+    assert router.resolve('/start') is handler
+    assert router.resolve('/start_1') is None
+    assert router.resolve('/stop') is None
+
+
+def test_command_router_resolve_longest_prefix():
+    router = CommandRouter()
+    edit_webhooks = get_handler('edit_webhooks')
+    edit_webhook = get_handler('edit_webhook')
+    edit = get_handler('edit')
+    router.add_command('/edit_webhooks', edit_webhooks)
+    router.add_prefix_command('/edit_webhook', edit_webhook)
+    router.add_prefix_command('/edit', edit)
+
+    assert router.resolve('/edit_webhooks') is edit_webhooks
+    assert router.resolve('/edit_webhook_1234') is edit_webhook
+    assert router.resolve('/edit_something') is edit
+    assert router.resolve('/edi') is None
+
+
+def test_command_router_raise_exception_if_command_registered_twice():
+    router = CommandRouter()
+    router.add_command('/start', get_handler('start'))
+    router.add_prefix_command('/edit', get_handler('edit'))
+
+    with pytest.raises(ValueError):
+        router.add_command('/start', get_handler('start'))
+    with pytest.raises(ValueError):
+        router.add_prefix_command('/edit', get_handler('edit'))
+
+
+async def test_command_router_dispatch(event_loop):
+    router = CommandRouter()
+    router.add_prefix_command('/edit_webhook', get_handler('edit_webhook'))
+
+    resp = await router.dispatch(web.Application(), 1, '/edit_webhook_1234')
+    assert resp is not None
+    assert resp.text == '{"handler": "edit_webhook", "text": "/edit_webhook_1234"}'
+
+
+async def test_command_router_dispatch_to_fallbacks(event_loop):
+    async def unknown(app, chat_id, text):
+        return None
+
+    router = CommandRouter()
+    router.add_fallback(unknown)
+    router.add_fallback(get_handler('fallback'))
+
+    resp = await router.dispatch(web.Application(), 1, '/unknown')
+    assert resp is not None
+    assert resp.text == '{"handler": "fallback", "text": "/unknown"}'
+
+
+async def test_command_router_dispatch_return_none_if_command_unknown(event_loop):
+    router = CommandRouter()
+
+    assert await router.dispatch(web.Application(), 1, '/unknown') is None
@@ -2,8 +2,14 @@ import json
 from typing import Dict
 from uuid import uuid4
 
+import pytest
 from aiohttp import web
 
+from webhook_telegram_bot.telegram.circuit_breaker import CircuitBreaker
+from webhook_telegram_bot.telegram.exceptions import (
+    TelegramAPIException,
+    TelegramCircuitOpenException,
+)
 from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
 
 telegram_api = TelegramAPI("", "")
@@ -51,8 +57,83 @@ async def test_send_message(telegram_server_mock):
         f'http://localhost:{telegram_server_mock.port}', uuid4().hex
     )
     data = await telegram_api_with_mocked_server.send_message(foo="bar")
+    await telegram_api_with_mocked_server.close()
     assert data is not None
     assert isinstance(data, Dict)
     assert data['method'] == 'POST'
     assert data['command'] == 'sendMessage'
     assert data["payload"]['foo'] == 'bar'
+
+
+async def test_command_reuses_session(telegram_server_mock):
+    telegram_api_with_mocked_server = TelegramAPI(
+        f'http://localhost:{telegram_server_mock.port}', uuid4().hex
+    )
+    telegram_api_with_mocked_server.start()
+    session = telegram_api_with_mocked_server.session
+    await telegram_api_with_mocked_server.send_message(foo="bar")
+    await telegram_api_with_mocked_server.send_message(foo="bar")
+    assert telegram_api_with_mocked_server.session is session
+
+    await telegram_api_with_mocked_server.close()
+    assert session.closed
+    assert telegram_api_with_mocked_server.session is None
+
+
+async def test_command_raises_telegram_api_exception(aiohttp_server):
+    async def handler(request):
+        return web.json_response(
+            {
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 5',
+                'parameters': {'retry_after': 5},
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post('/{bot_token}/{command}', handler)
+    server = await aiohttp_server(app)
+
+    telegram_api_with_mocked_server = TelegramAPI(
+        f'http://localhost:{server.port}', uuid4().hex
+    )
+    with pytest.raises(TelegramAPIException) as exc_info:
+        await telegram_api_with_mocked_server.send_message(chat_id=1, text='foo')
+    await telegram_api_with_mocked_server.close()
+
+    assert exc_info.value.error_code == 429
+    assert exc_info.value.retry_after == 5
+    assert exc_info.value.is_retryable
+
+
+async def test_command_fails_fast_when_circuit_is_open(aiohttp_server):
+    requests = []
+
+    async def handler(request):
+        requests.append(request.match_info['command'])
+        return web.Response(status=502)
+
+    app = web.Application()
+    app.router.add_post('/{bot_token}/{command}', handler)
+    server = await aiohttp_server(app)
+
+    telegram_api_with_mocked_server = TelegramAPI(
+        f'http://localhost:{server.port}',
+        uuid4().hex,
+        circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30),
+    )
+    for _ in range(2):
+        with pytest.raises(TelegramAPIException):
+            await telegram_api_with_mocked_server.send_message(chat_id=1, text='foo')
+    with pytest.raises(TelegramCircuitOpenException) as exc_info:
+        await telegram_api_with_mocked_server.send_message(chat_id=1, text='foo')
+    await telegram_api_with_mocked_server.close()
+
+    assert len(requests) == 2
+    assert exc_info.value.is_retryable
+    assert 0 < exc_info.value.retry_after <= 30
+    stats = telegram_api_with_mocked_server.get_stats()
+    assert stats['circuit_breaker'] == {'state': 'open', 'failures': 2, 'rejected': 1}
+    assert stats['commands']['sendMessage']['errors'] == {'502': 2}
+    assert stats['commands']['sendMessage']['latency']['count'] == 2
@@ -0,0 +1,25 @@
+from webhook_telegram_bot.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.get_stats() == {'size': 2, 'max_size': 2, 'hits': 3, 'misses': 1}
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=60)
+    cache.set('a', 1, ttl=0)
+    cache.set('b', 2)
+
+    assert cache.get('a', 'default') == 'default'
+    assert len(cache) == 1
+    assert cache.pop('b') == 2
+    assert cache.pop('b') is None
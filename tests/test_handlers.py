@@ -1,6 +1,6 @@
 from aiohttp import web
 
-from webhook_telegram_bot.main import init_routes
+from webhook_telegram_bot.main import init_config, init_routes
 
 
 async def test_health_handler(aiohttp_client):
@@ -14,3 +14,21 @@ async def test_health_handler(aiohttp_client):
 
     data = await result.json()
     assert data.get("health") == "ok"
+
+
+async def test_metrics_handler(aiohttp_client):
+    app = web.Application()
+    init_config(app, {"ADMIN_TOKEN": "token"})
+    init_routes(app)
+    client = await aiohttp_client(app)
+    url = client.app.router["metrics"].url_for()
+    result = await client.get(url)
+
+    assert result.status == 403
+
+    result = await client.get(url, headers={"Authorization": "Bearer token"})
+
+    assert result.status == 200
+
+    data = await result.json()
+    assert isinstance(data, dict)
@@ -2,6 +2,15 @@ from unittest.mock import Mock
 
 from aiohttp import web
 
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.memory import (
+    DatabaseWrapper as MemoryDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.sqlite import (
+    DatabaseWrapper as SQLiteDatabaseWrapper,
+)
 from webhook_telegram_bot.helpers import (
     CONFIG_KEY,
     DATABASE_KEY,
@@ -9,6 +18,7 @@ from webhook_telegram_bot.helpers import (
     TEMPLATE_ENGINE_KEY,
     get_config,
     get_config_value,
+    get_coordination_wrapper,
     get_database,
     get_telegram_api,
     get_template_engine,
@@ -72,3 +82,14 @@ def test_get_template_engine():
     m = Mock()
     set_template_engine(app, m)
     assert get_template_engine(app) is m
+
+
+def test_get_coordination_wrapper(tmp_path):
+    test_app = web.Application()
+    sqlite_db = SQLiteDatabaseWrapper(f'sqlite://{tmp_path}/db.sqlite3')
+    set_database(test_app, CachedDatabaseWrapper(sqlite_db))
+    assert get_coordination_wrapper(test_app) is sqlite_db
+    sqlite_db.close()
+
+    set_database(test_app, MemoryDatabaseWrapper('memory://'))
+    assert get_coordination_wrapper(test_app) is None
@@ -5,12 +5,19 @@ from aiohttp import web
 from jinja2 import Environment
 
 from webhook_telegram_bot.config import get_config as get_default_config
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.memory import (
+    DatabaseWrapper as MemoryDatabaseWrapper,
+)
 from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
 from webhook_telegram_bot.exceptions import ImproperlyConfiguredException
 from webhook_telegram_bot.helpers import (
     get_config,
     get_database,
     get_telegram_api,
+    get_telegram_poller,
     get_template_engine,
 )
 from webhook_telegram_bot.main import (
@@ -72,6 +79,72 @@ async def test_init_database():
     assert isinstance(db, DatabaseWrapperImpl)
 
 
+async def test_init_memory_database_is_not_cached():
+    test_app = web.Application()
+    init_config(
+        test_app,
+        {
+            'DATABASE_URL': 'memory://',
+            'DATABASE_ENGINE': 'webhook_telegram_bot.database.backends.memory',
+            'DATABASE_CACHE_TTL': 60,
+        },
+    )
+    await init_database(test_app)
+    assert isinstance(get_database(test_app), MemoryDatabaseWrapper)
+
+
+@pytest.mark.parametrize('cache_ttl', [0, 60])
+async def test_init_database_caches_only_if_enabled(tmp_path, cache_ttl):
+    test_app = web.Application()
+    init_config(
+        test_app,
+        {
+            'DATABASE_URL': f'sqlite:///{tmp_path}/db.sqlite3',
+            'DATABASE_ENGINE': 'webhook_telegram_bot.database.backends.sqlite',
+            'DATABASE_CACHE_TTL': cache_ttl,
+        },
+    )
+    await init_database(test_app)
+    db = get_database(test_app)
+    assert isinstance(db, CachedDatabaseWrapper) is bool(cache_ttl)
+    db.close()
+
+
+async def test_init_database_passes_pool_settings():
+    test_app = web.Application()
+    init_config(
+        test_app,
+        {
+            'DATABASE_URL': 'mongodb://localhost:27017/db',
+            'DATABASE_ENGINE': 'webhook_telegram_bot.database.backends.mongo',
+            'DATABASE_CACHE_TTL': 0,
+            'DATABASE_MAX_POOL_SIZE': 10,
+            'DATABASE_MIN_POOL_SIZE': 2,
+            'DATABASE_MAX_IDLE_TIME_MS': 0,
+        },
+    )
+    await init_database(test_app)
+    client_options = get_database(test_app).client_options
+    assert client_options['maxPoolSize'] == 10
+    assert client_options['minPoolSize'] == 2
+    assert 'maxIdleTimeMS' not in client_options
+
+
+async def test_init_database_leaves_unset_pool_settings(caplog):
+    test_app = web.Application()
+    init_config(
+        test_app,
+        {
+            'DATABASE_URL': 'mongodb://localhost:27017/db?maxPoolSize=5',
+            'DATABASE_ENGINE': 'webhook_telegram_bot.database.backends.mongo',
+            'DATABASE_CACHE_TTL': 0,
+        },
+    )
+    await init_database(test_app)
+    assert get_database(test_app).client_options == {}
+    assert 'is ignored' not in caplog.text
+
+
 async def test_close_database():
     test_app = web.Application()
     init_config(test_app)
@@ -154,6 +227,31 @@ async def test_on_cleanup_telegram_handler(aiohttp_server, telegram_server_mock)
     await server.close()
 
     assert not telegram_api.active
+    assert telegram_api.session is None
+
+
+async def test_on_startup_telegram_handler_in_polling_mode(
+    aiohttp_server, telegram_server_mock, tmp_path
+):
+    test_app = web.Application()
+    init_config(
+        test_app,
+        {
+            'TELEGRAM_API_ENDPOINT': f'http://localhost:{telegram_server_mock.port}',
+            'TELEGRAM_API_TOKEN': uuid4().hex,
+            'TELEGRAM_INGRESS_MODE': 'polling',
+            'TELEGRAM_POLLING_OFFSET_PATH': str(tmp_path / 'offset'),
+        },
+    )
+    init_telegram(test_app)
+    server = await aiohttp_server(test_app)
+
+    assert 'telegram-webhook' not in test_app.router
+    telegram_poller = get_telegram_poller(test_app)
+    assert telegram_poller.task is not None
+
+    await server.close()
+    assert telegram_poller.task is None
 
 
 async def test_create_app(caplog, aiohttp_server, telegram_server_mock):
@@ -0,0 +1,27 @@
+from webhook_telegram_bot import serializers
+from webhook_telegram_bot.serializers import dumps, loads
+from webhook_telegram_bot.telegram.commands import Command
+
+
+def test_dumps_and_loads():
+    data = {'text': 'привет', 'callback_data': Command.START, 'items': [1, None]}
+    assert loads(dumps(data)) == {
+        'text': 'привет',
+        'callback_data': '/start',
+        'items': [1, None],
+    }
+    assert loads(dumps(data).encode()) == loads(dumps(data))
+
+
+def test_dumps_and_loads_without_orjson(monkeypatch):
+    monkeypatch.setattr(serializers, 'orjson', None)
+    data = {'text': 'foo', 'callback_data': Command.START}
+    assert loads(dumps(data)) == {'text': 'foo', 'callback_data': '/start'}
+
+
+def test_dumps_is_the_same_without_orjson(monkeypatch):
+    data = {1: 'привет', 'items': [1.5, None, True]}
+    expected = '{"1":"привет","items":[1.5,null,true]}'
+    assert dumps(data) == expected
+    monkeypatch.setattr(serializers, 'orjson', None)
+    assert dumps(data) == expected
@@ -0,0 +1,91 @@
+"""This file contains command to send a message to every registered chat."""
+import argparse
+import asyncio
+import sys
+from typing import cast
+
+from aiohttp import web
+
+from webhook_telegram_bot.broadcast.broadcaster import Broadcaster
+from webhook_telegram_bot.broadcast.handlers import (
+    get_broadcast_id,
+    get_broadcast_payload,
+)
+from webhook_telegram_bot.helpers import get_config_value, get_database
+from webhook_telegram_bot.main import (
+    create_telegram_api,
+    init_config,
+    init_database,
+    init_logging,
+)
+from webhook_telegram_bot.serializers import dumps
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+
+parser = argparse.ArgumentParser(
+    prog='python -m webhook_telegram_bot.broadcast',
+    description='Send a message to every registered chat.',
+)
+parser.add_argument('text', help='text of the message, HTML is allowed')
+parser.add_argument(
+    '--broadcast-id',
+    help='id to resume an interrupted broadcast, sha256 of the text by default',
+)
+
+
+async def broadcast(text: str, broadcast_id: str) -> bool:
+    """
+    Send message to every registered chat and print statistics.
+
+    :param text: text of the message
+    :param broadcast_id: broadcast identification string
+    :return: False if other broadcast is in progress on the host
+    """
+    app = web.Application()
+    init_config(app)
+    init_logging(app)
+    await init_database(app)
+    db = get_database(app)
+    telegram_api = create_telegram_api(app)
+    message_queue = MessageQueue(
+        telegram_api,
+        max_retries=cast(int, get_config_value(app, 'TELEGRAM_SEND_MAX_RETRIES')),
+    )
+    broadcaster = Broadcaster(
+        db,
+        message_queue,
+        checkpoint_path=cast(str, get_config_value(app, 'BROADCAST_CHECKPOINT_PATH')),
+        concurrency=cast(int, get_config_value(app, 'BROADCAST_CONCURRENCY')),
+    )
+    try:
+        if not broadcaster.acquire_lock():
+            print('Other broadcast is in progress on this host', file=sys.stderr)
+            return False
+        try:
+            stats = await broadcaster.run(broadcast_id, get_broadcast_payload(text))
+            print(dumps(stats))
+        finally:
+            broadcaster.release_lock()
+    finally:
+        await telegram_api.close()
+        db.close()
+    return True
+
+
+def main() -> None:
+    """
+    Run broadcast command.
+
+    :return: None
+    """
+    args = parser.parse_args()
+    broadcast_id = args.broadcast_id or get_broadcast_id(args.text)
+    try:
+        if not asyncio.run(broadcast(args.text, broadcast_id)):
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print(f'Interrupted, resume with --broadcast-id {broadcast_id}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
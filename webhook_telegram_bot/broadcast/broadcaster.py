@@ -0,0 +1,266 @@
+"""This file contains Broadcaster class."""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
+from webhook_telegram_bot.serializers import dumps, loads
+from webhook_telegram_bot.telegram.message_queue import MessageQueue, OutboundMessage
+from webhook_telegram_bot.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcaster:
+    """This class sends a message to every registered chat."""
+
+    def __init__(
+        self,
+        db: DatabaseWrapperImpl,
+        message_queue: MessageQueue,
+        checkpoint_path: str,
+        concurrency: int = 30,
+    ) -> None:
+        """
+        Construct Broadcaster class.
+
+        :param db: DatabaseWrapper implementation instance
+        :param message_queue: MessageQueue instance used to send with retries
+        :param checkpoint_path: file to persist progress of the broadcast,
+            its lock allows one broadcast per host
+        :param concurrency: number of messages sent at the same time
+        :return: None
+        """
+        self.db = db
+        self.message_queue = message_queue
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = concurrency
+        self.task: Optional[asyncio.Task[Dict[str, Any]]] = None
+        self.broadcast_id: Optional[str] = None
+        self.last_chat_id: Optional[int] = None
+        self.sent = 0
+        self.failed = 0
+        self.finished = False
+        self.processed = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.lock_fd: Optional[int] = None
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Return True if broadcast is in progress in any worker of the host.
+
+        :return: True if broadcast is in progress
+        """
+        if self.task is not None and not self.task.done():
+            return True
+        if not self.acquire_lock():
+            return True
+        self.release_lock()
+        return False
+
+    def acquire_lock(self) -> bool:
+        """
+        Try to become the only broadcaster of the host.
+
+        :return: True if lock is acquired
+        """
+        os.makedirs(
+            os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True
+        )
+        fd = os.open(f'{self.checkpoint_path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        return True
+
+    def release_lock(self) -> None:
+        """
+        Release broadcaster lock.
+
+        :return: None
+        """
+        if self.lock_fd is not None:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def read_checkpoint(self) -> Dict[str, Any]:
+        """
+        Return persisted progress of the last broadcast of the host.
+
+        :return: checkpoint or empty dict
+        """
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                checkpoint = loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return {}
+        return checkpoint if isinstance(checkpoint, dict) else {}
+
+    def load_checkpoint(self, broadcast_id: str) -> None:
+        """
+        Restore progress of the broadcast with the same id.
+
+        :param broadcast_id: broadcast identification string
+        :return: None
+        """
+        self.broadcast_id = broadcast_id
+        self.last_chat_id = None
+        self.sent = self.failed = 0
+        self.finished = False
+        checkpoint = self.read_checkpoint()
+        if checkpoint.get('broadcast_id') == broadcast_id:
+            self.last_chat_id = checkpoint.get('last_chat_id')
+            self.sent = checkpoint.get('sent', 0)
+            self.failed = checkpoint.get('failed', 0)
+            self.finished = checkpoint.get('finished', False)
+
+    def save_checkpoint(self) -> None:
+        """
+        Persist progress of the broadcast.
+
+        :return: None
+        """
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.stopped_at or time.monotonic()) - self.started_at
+        checkpoint = {
+            'broadcast_id': self.broadcast_id,
+            'last_chat_id': self.last_chat_id,
+            'sent': self.sent,
+            'failed': self.failed,
+            'finished': self.finished,
+            'elapsed': elapsed,
+            'throughput': self.processed / elapsed if elapsed else 0.0,
+        }
+        atomic_write(self.checkpoint_path, dumps(checkpoint).encode())
+
+    def start(self, broadcast_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Run broadcast in background unless any worker of the host runs one.
+
+        :param broadcast_id: broadcast identification string
+        :param payload: sendMessage payload without chat_id
+        :return: False if broadcast is already in progress
+        """
+        if self.task is not None and not self.task.done():
+            return False
+        if not self.acquire_lock():
+            return False
+        self.load_checkpoint(broadcast_id)
+        self.task = asyncio.create_task(self.run(broadcast_id, payload))
+        self.task.add_done_callback(self.on_task_done)
+        return True
+
+    def on_task_done(self, task: 'asyncio.Task[Dict[str, Any]]') -> None:
+        """
+        Release lock and log result of the background broadcast.
+
+        :param task: finished broadcast task
+        :return: None
+        """
+        self.release_lock()
+        if task.cancelled():
+            logger.info(f'Broadcast {self.broadcast_id} is interrupted')
+            return
+        exception = task.exception()
+        if exception is not None:
+            logger.error(
+                f'Broadcast {self.broadcast_id} failed: {exception}',
+                exc_info=exception,
+            )
+
+    async def stop(self) -> None:
+        """
+        Interrupt broadcast, it can be resumed later from the checkpoint.
+
+        :return: None
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.release_lock()
+
+    async def run(self, broadcast_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send message to every chat, resuming from the checkpoint.
+
+        :param broadcast_id: broadcast identification string
+        :param payload: sendMessage payload without chat_id
+        :return: broadcast statistics
+        """
+        self.load_checkpoint(broadcast_id)
+        if self.finished:
+            logger.info(f'Broadcast {broadcast_id} is already finished')
+            return self.get_stats()
+
+        self.processed = 0
+        self.started_at = time.monotonic()
+        self.stopped_at = None
+        # other workers see the broadcast before the first batch is sent
+        self.save_checkpoint()
+        try:
+            batch: List[int] = []
+            async for chat_id in self.db.iterate_chat_ids(self.last_chat_id):
+                batch.append(chat_id)
+                if len(batch) >= self.concurrency:
+                    await self.send_batch(batch, payload)
+                    batch = []
+            if batch:
+                await self.send_batch(batch, payload)
+        finally:
+            self.stopped_at = time.monotonic()
+
+        self.finished = True
+        self.save_checkpoint()
+        stats = self.get_stats()
+        logger.info(f'Broadcast {broadcast_id} is finished: {stats}')
+        return stats
+
+    async def send_batch(self, chat_ids: List[int], payload: Dict[str, Any]) -> None:
+        """
+        Send message to chats concurrently and save checkpoint.
+
+        :param chat_ids: list of chat identification numbers
+        :param payload: sendMessage payload without chat_id
+        :return: None
+        """
+        results = await asyncio.gather(
+            *[
+                self.message_queue.process(
+                    OutboundMessage('sendMessage', {**payload, 'chat_id': chat_id})
+                )
+                for chat_id in chat_ids
+            ]
+        )
+        self.sent += results.count(True)
+        self.failed += results.count(False)
+        self.processed += len(results)
+        self.last_chat_id = chat_ids[-1]
+        self.save_checkpoint()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return statistics of the last broadcast of the host from the checkpoint.
+
+        :return: dict of broadcast statistics
+        """
+        checkpoint = self.read_checkpoint()
+        return {
+            'broadcast_id': checkpoint.get('broadcast_id'),
+            'running': self.is_running,
+            'finished': checkpoint.get('finished', False),
+            'last_chat_id': checkpoint.get('last_chat_id'),
+            'sent': checkpoint.get('sent', 0),
+            'failed': checkpoint.get('failed', 0),
+            'elapsed': checkpoint.get('elapsed', 0.0),
+            'throughput': checkpoint.get('throughput', 0.0),
+        }
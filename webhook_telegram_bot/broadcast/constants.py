@@ -0,0 +1,2 @@
+"""This file contains constants of broadcast module."""
+BROADCAST_ROUTE = '/api/v1/admin/broadcast'
@@ -0,0 +1,59 @@
+"""This file contains broadcast request handlers."""
+import hashlib
+from typing import Any, Dict
+
+from aiohttp import web
+from aiohttp.web_request import Request
+
+from webhook_telegram_bot.helpers import get_broadcaster, is_authorized
+from webhook_telegram_bot.serializers import dumps, loads
+
+
+def get_broadcast_payload(text: str) -> Dict[str, Any]:
+    """
+    Return sendMessage payload of the broadcast.
+
+    :param text: text of the message
+    :return: sendMessage payload without chat_id
+    """
+    return {'text': text, 'parse_mode': 'HTML', 'disable_notification': True}
+
+
+def get_broadcast_id(text: str) -> str:
+    """
+    Return broadcast identification string, the same for the same text.
+
+    :param text: text of the message
+    :return: broadcast identification string
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+async def broadcast_handler(request: Request) -> web.Response:
+    """
+    Start broadcast on POST request, return its progress on GET request.
+
+    Only one broadcast runs on the host, its progress is read from the checkpoint.
+
+    :param request: request from admin
+    :return: response with broadcast statistics
+    """
+    if not is_authorized(request):
+        raise web.HTTPForbidden()
+
+    broadcaster = get_broadcaster(request.app)
+    if request.method == 'GET':
+        return web.json_response(broadcaster.get_stats(), dumps=dumps)
+
+    try:
+        data = await request.json(loads=loads)
+    except ValueError:
+        raise web.HTTPBadRequest()
+    text = data.get('text') if isinstance(data, dict) else None
+    if not text:
+        raise web.HTTPBadRequest()
+
+    broadcast_id = data.get('broadcast_id') or get_broadcast_id(text)
+    if not broadcaster.start(broadcast_id, get_broadcast_payload(text)):
+        raise web.HTTPConflict()
+    return web.json_response(broadcaster.get_stats(), status=202, dumps=dumps)
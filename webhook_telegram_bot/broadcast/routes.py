@@ -0,0 +1,20 @@
+"""This file contains routes of broadcast module."""
+from aiohttp import web
+
+from webhook_telegram_bot.broadcast.constants import BROADCAST_ROUTE
+from webhook_telegram_bot.broadcast.handlers import broadcast_handler
+
+
+def init_broadcast_routes(app: web.Application) -> None:
+    """
+    Initialize broadcast module routes.
+
+    :param app: application instance
+    :return: None
+    """
+    app.add_routes(
+        [
+            web.get(BROADCAST_ROUTE, broadcast_handler, name='broadcast-status'),
+            web.post(BROADCAST_ROUTE, broadcast_handler, name='broadcast'),
+        ]
+    )
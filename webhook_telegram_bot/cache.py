@@ -0,0 +1,100 @@
+"""This file contains in-process cache."""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    """This class is a bounded LRU cache whose entries expire."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60) -> None:
+        """
+        Construct TTLCache class.
+
+        :param max_size: maximum number of entries, least recently used are evicted
+        :param ttl: seconds before entry expires
+        :return: None
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.data: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """
+        Return number of entries including expired ones.
+
+        :return: number of entries
+        """
+        return len(self.data)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Return value by key.
+
+        :param key: cache key
+        :param default: value returned if key is missing or expired
+        :return: cached value or default
+        """
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Put value into cache.
+
+        :param key: cache key
+        :param value: value
+        :param ttl: seconds before entry expires overriding the default one
+        :return: None
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self.data[key] = (expires_at, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_size:
+            self.data.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        """
+        Remove entry.
+
+        :param key: cache key
+        :return: removed value or None
+        """
+        item = self.data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+
+        :return: None
+        """
+        self.data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics.
+
+        :return: dict of cache statistics
+        """
+        return {
+            'size': len(self.data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
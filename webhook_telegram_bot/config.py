@@ -1,9 +1,29 @@
 """This file contains config methods."""
 import os
-from typing import Any, Dict
+import tempfile
+from typing import Any, Dict, Optional
 
 env = os.environ
 
+# shared memory directory, also used by gunicorn as worker_tmp_dir
+SHM_DIR = '/dev/shm'  # nosec
+RUNTIME_DIR = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+# persistent directory for data which must survive restart of the host
+STATE_DIR = os.path.join(
+    os.path.expanduser('~'), '.local', 'state', 'webhook_telegram_bot'
+)
+
+
+def get_optional_int(name: str) -> Optional[int]:
+    """
+    Return integer value of environment variable.
+
+    :param name: name of environment variable
+    :return: integer value or None if variable is not set
+    """
+    value = env.get(name, '')
+    return int(value) if value else None
+
 
 def get_config() -> Dict[str, Any]:
     """
@@ -18,8 +38,120 @@ def get_config() -> Dict[str, Any]:
         ),
         'TELEGRAM_API_TOKEN': env.get('TELEGRAM_API_TOKEN', ''),
         'TELEGRAM_WEBHOOK_HOST': env.get('TELEGRAM_WEBHOOK_HOST', ''),
+        'TELEGRAM_WEBHOOK_TOKEN': env.get('TELEGRAM_WEBHOOK_TOKEN', ''),
+        'TELEGRAM_WEBHOOK_SECRET': env.get('TELEGRAM_WEBHOOK_SECRET', ''),
+        'TELEGRAM_WEBHOOK_MAX_CONNECTIONS': int(
+            env.get('TELEGRAM_WEBHOOK_MAX_CONNECTIONS', '40')
+        ),
+        'TELEGRAM_WEBHOOK_ALLOWED_UPDATES': [
+            update_type
+            for update_type in env.get(
+                'TELEGRAM_WEBHOOK_ALLOWED_UPDATES', 'message,callback_query'
+            ).split(',')
+            if update_type
+        ],
+        'TELEGRAM_WEBHOOK_LOCK_PATH': env.get(
+            'TELEGRAM_WEBHOOK_LOCK_PATH',
+            os.path.join(RUNTIME_DIR, 'webhook_telegram_bot_webhook'),
+        ),
+        'TELEGRAM_WEBHOOK_LEASE_TTL': float(env.get('TELEGRAM_WEBHOOK_LEASE_TTL', '0')),
+        'TELEGRAM_INGRESS_MODE': env.get('TELEGRAM_INGRESS_MODE', 'webhook'),
+        'TELEGRAM_POLLING_OFFSET_PATH': env.get(
+            'TELEGRAM_POLLING_OFFSET_PATH',
+            os.path.join(STATE_DIR, 'offset'),
+        ),
+        'TELEGRAM_POLLING_LIMIT': int(env.get('TELEGRAM_POLLING_LIMIT', '100')),
+        'TELEGRAM_POLLING_TIMEOUT': int(env.get('TELEGRAM_POLLING_TIMEOUT', '30')),
+        'TELEGRAM_RATE_LIMIT_STATE_PATH': env.get(
+            'TELEGRAM_RATE_LIMIT_STATE_PATH',
+            os.path.join(RUNTIME_DIR, 'webhook_telegram_bot_rate_limit'),
+        ),
+        'TELEGRAM_API_CONNECTION_LIMIT': int(
+            env.get('TELEGRAM_API_CONNECTION_LIMIT', '100')
+        ),
+        'TELEGRAM_API_KEEPALIVE_TIMEOUT': float(
+            env.get('TELEGRAM_API_KEEPALIVE_TIMEOUT', '30')
+        ),
+        'TELEGRAM_API_DNS_CACHE_TTL': int(env.get('TELEGRAM_API_DNS_CACHE_TTL', '300')),
+        'TELEGRAM_API_CONNECT_TIMEOUT': float(
+            env.get('TELEGRAM_API_CONNECT_TIMEOUT', '5')
+        ),
+        'TELEGRAM_API_TIMEOUT': float(env.get('TELEGRAM_API_TIMEOUT', '15')),
+        'TELEGRAM_API_FAILURE_THRESHOLD': int(
+            env.get('TELEGRAM_API_FAILURE_THRESHOLD', '5')
+        ),
+        'TELEGRAM_API_RESET_TIMEOUT': float(
+            env.get('TELEGRAM_API_RESET_TIMEOUT', '30')
+        ),
+        'TELEGRAM_GLOBAL_RATE_LIMIT': float(
+            env.get('TELEGRAM_GLOBAL_RATE_LIMIT', '30')
+        ),
+        'TELEGRAM_PRIVATE_CHAT_RATE_LIMIT': float(
+            env.get('TELEGRAM_PRIVATE_CHAT_RATE_LIMIT', '1')
+        ),
+        'TELEGRAM_GROUP_CHAT_RATE_LIMIT': float(
+            env.get('TELEGRAM_GROUP_CHAT_RATE_LIMIT', '20')
+        ),
+        'TELEGRAM_SEND_QUEUE_SIZE': int(env.get('TELEGRAM_SEND_QUEUE_SIZE', '1000')),
+        'TELEGRAM_SEND_WORKERS': int(env.get('TELEGRAM_SEND_WORKERS', '4')),
+        'TELEGRAM_SEND_MAX_RETRIES': int(env.get('TELEGRAM_SEND_MAX_RETRIES', '5')),
+        'TELEGRAM_EDIT_MESSAGE_TTL': float(
+            env.get('TELEGRAM_EDIT_MESSAGE_TTL', '3600')
+        ),
+        'TELEGRAM_EDIT_MESSAGE_CACHE_SIZE': int(
+            env.get('TELEGRAM_EDIT_MESSAGE_CACHE_SIZE', '10000')
+        ),
+        'TELEGRAM_UPDATE_DEDUPLICATION_TTL': float(
+            env.get('TELEGRAM_UPDATE_DEDUPLICATION_TTL', '3600')
+        ),
+        'TELEGRAM_UPDATE_DEDUPLICATION_CACHE_SIZE': int(
+            env.get('TELEGRAM_UPDATE_DEDUPLICATION_CACHE_SIZE', '10000')
+        ),
+        'TELEGRAM_UPDATE_DEDUPLICATION_STORE': env.get(
+            'TELEGRAM_UPDATE_DEDUPLICATION_STORE', 'memory'
+        ),
+        'OUTBOX_PATH': env.get('OUTBOX_PATH', os.path.join(STATE_DIR, 'outbox')),
+        'OUTBOX_SEGMENT_SIZE': int(env.get('OUTBOX_SEGMENT_SIZE', '1048576')),
+        'OUTBOX_FSYNC': env.get('OUTBOX_FSYNC', 'always'),
+        'OUTBOX_FSYNC_INTERVAL': float(env.get('OUTBOX_FSYNC_INTERVAL', '1')),
+        'TELEGRAM_COALESCE_WINDOW': float(env.get('TELEGRAM_COALESCE_WINDOW', '0')),
+        'BITBUCKET_WEBHOOK_MODE': env.get('BITBUCKET_WEBHOOK_MODE', 'process'),
+        'BITBUCKET_EVENT_QUEUE_SIZE': int(
+            env.get('BITBUCKET_EVENT_QUEUE_SIZE', '1000')
+        ),
+        'BITBUCKET_EVENT_WORKERS': int(env.get('BITBUCKET_EVENT_WORKERS', '4')),
+        'BITBUCKET_EVENT_OUTBOX_PATH': env.get(
+            'BITBUCKET_EVENT_OUTBOX_PATH', os.path.join(STATE_DIR, 'bitbucket_events')
+        ),
+        'ADMIN_TOKEN': env.get('ADMIN_TOKEN', ''),
+        'BROADCAST_CHECKPOINT_PATH': env.get(
+            'BROADCAST_CHECKPOINT_PATH',
+            os.path.join(STATE_DIR, 'broadcast'),
+        ),
+        'BROADCAST_CONCURRENCY': int(env.get('BROADCAST_CONCURRENCY', '30')),
         'DATABASE_URL': env.get('DATABASE_URL', 'mongodb://localhost:27017/db'),
-        'DATABASE_ENGINE': 'webhook_telegram_bot.database.backends.mongo',
+        'DATABASE_ENGINE': env.get(
+            'DATABASE_ENGINE', 'webhook_telegram_bot.database.backends.mongo'
+        ),
+        # unset options are left to the driver and to the url
+        'DATABASE_MAX_POOL_SIZE': get_optional_int('DATABASE_MAX_POOL_SIZE'),
+        'DATABASE_MIN_POOL_SIZE': get_optional_int('DATABASE_MIN_POOL_SIZE'),
+        'DATABASE_MAX_IDLE_TIME_MS': get_optional_int('DATABASE_MAX_IDLE_TIME_MS'),
+        'DATABASE_SERVER_SELECTION_TIMEOUT_MS': get_optional_int(
+            'DATABASE_SERVER_SELECTION_TIMEOUT_MS'
+        ),
+        'DATABASE_SOCKET_TIMEOUT_MS': get_optional_int('DATABASE_SOCKET_TIMEOUT_MS'),
+        'DATABASE_CACHE_TTL': float(env.get('DATABASE_CACHE_TTL', '0')),
+        'DATABASE_CACHE_NEGATIVE_TTL': float(
+            env.get('DATABASE_CACHE_NEGATIVE_TTL', '30')
+        ),
+        'DATABASE_CACHE_SIZE': int(env.get('DATABASE_CACHE_SIZE', '10000')),
+        'DATABASE_WRITE_BEHIND_INTERVAL': float(
+            env.get('DATABASE_WRITE_BEHIND_INTERVAL', '0.5')
+        ),
+        'DATABASE_WRITE_BEHIND_BATCH_SIZE': int(
+            env.get('DATABASE_WRITE_BEHIND_BATCH_SIZE', '100')
+        ),
         'TEMPLATES_DIR': os.path.join(os.path.dirname(__file__), 'templates'),
         'LOG_LEVEL': env.get('LOG_LEVEL', 'ERROR'),
         'PLUGINS': [
@@ -1,7 +1,8 @@
 """This file contains base classes for database layer."""
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional, Tuple
 
-from webhook_telegram_bot.database.models import Chat
+from webhook_telegram_bot.database.models import Chat, Webhook
 
 
 class BaseDatabaseWrapper(ABC):
@@ -19,6 +20,16 @@ class BaseDatabaseWrapper(ABC):
         """
         pass
 
+    async def connect(self) -> None:
+        """
+        Open connections before the application accepts requests.
+
+        Backends connecting on first use do nothing.
+
+        :return: None
+        """
+        pass
+
     @abstractmethod
     def close(self) -> None:
         """
@@ -37,6 +48,15 @@ class BaseDatabaseWrapper(ABC):
         """
         pass
 
+    @abstractmethod
+    async def ensure_indexes(self) -> None:
+        """
+        Create indexes declared by the backend if they are missing.
+
+        :return: None
+        """
+        pass
+
     @abstractmethod
     async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
         """
@@ -57,6 +77,16 @@ class BaseDatabaseWrapper(ABC):
         """
         pass
 
+    @abstractmethod
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook without other webhooks of the chat.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        pass
+
     @abstractmethod
     async def save_chat(self, chat: Chat) -> Chat:
         """
@@ -66,3 +96,91 @@ class BaseDatabaseWrapper(ABC):
         :return: Chat instance
         """
         pass
+
+    @abstractmethod
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Add webhook to chat atomically, the chat is created if it does not exist.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        pass
+
+    @abstractmethod
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Remove webhook from chat atomically.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        pass
+
+    @abstractmethod
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks in one batch.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        pass
+
+    @abstractmethod
+    def iterate_chat_ids(self, start_after: Optional[int] = None) -> AsyncIterator[int]:
+        """
+        Return chat ids in ascending order without loading all of them into memory.
+
+        :param start_after: skip chat ids less than or equal to this one
+        :return: async iterator of chat ids
+        """
+        pass
+
+
+class BaseCoordinationWrapper(ABC):
+    """
+    Represent optional state shared by all application instances.
+
+    Backends without it are supported, leases and seen updates
+    are kept by every worker then.
+    """
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take named lease shared by all application instances.
+
+        The lease is taken if it is free, expired or already owned by the owner.
+
+        :param name: lease name
+        :param owner: owner identification string
+        :param ttl: seconds before the lease expires
+        :return: True if lease is taken
+        """
+        pass
+
+    @abstractmethod
+    async def mark_update_seen(self, update_id: int, ttl: float) -> bool:
+        """
+        Remember Telegram update shared by all application instances.
+
+        :param update_id: Telegram update identification number
+        :param ttl: seconds to remember the update
+        :return: True if the update was not seen before
+        """
+        pass
+
+    @abstractmethod
+    async def forget_update(self, update_id: int) -> None:
+        """
+        Forget Telegram update, so its redelivery is processed.
+
+        :param update_id: Telegram update identification number
+        :return: None
+        """
+        pass
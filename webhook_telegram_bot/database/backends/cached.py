@@ -0,0 +1,280 @@
+"""This file contains BaseDatabaseWrapper implementation caching another one."""
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from webhook_telegram_bot.cache import TTLCache
+from webhook_telegram_bot.database.backends.base import BaseDatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+
+class DatabaseWrapper(BaseDatabaseWrapper):
+    """This class implements read-through cache of chats around any backend."""
+
+    def __init__(
+        self,
+        db: BaseDatabaseWrapper,
+        max_size: int = 10000,
+        ttl: float = 60,
+        negative_ttl: float = 30,
+    ):
+        """
+        Construct DatabaseWrapper class.
+
+        Chats are cached by chat_id, webhook ids refer to the chat_id,
+        so saved chat invalidates lookups by both. Missing webhooks are
+        cached too, so events of deleted webhooks do not reach the database,
+        missing chats are not, a new chat is seen at once.
+        Other workers see changes after ttl.
+
+        :param db: DatabaseWrapper implementation instance to cache
+        :param max_size: maximum number of cached entries of each kind
+        :param ttl: seconds before cached chat expires
+        :param negative_ttl: seconds before cached missing webhook expires,
+            it is not longer than ttl
+        """
+        self.db = db
+        self.closed = False
+        self.chats: TTLCache[int, Chat] = TTLCache(max_size=max_size, ttl=ttl)
+        self.webhooks: TTLCache[str, int] = TTLCache(max_size=max_size, ttl=ttl)
+        self.resolved_webhooks: TTLCache[str, Tuple[int, Webhook]] = TTLCache(
+            max_size=max_size, ttl=ttl
+        )
+        self.missing_webhooks: TTLCache[str, bool] = TTLCache(
+            max_size=max_size, ttl=min(negative_ttl, ttl)
+        )
+        # incremented by every write, lookups started before it are not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    async def connect(self) -> None:
+        """
+        Open connections of the cached backend.
+
+        :return: None
+        """
+        await self.db.connect()
+
+    def close(self) -> None:
+        """Close database connection."""
+        self.db.close()
+        self.closed = True
+
+    def clear(self) -> None:
+        """
+        Remove all cached entries.
+
+        :return: None
+        """
+        self.generation += 1
+        self.chats.clear()
+        self.webhooks.clear()
+        self.resolved_webhooks.clear()
+        self.missing_webhooks.clear()
+
+    async def drop_database(self) -> None:
+        """Drop database."""
+        self.clear()
+        await self.db.drop_database()
+
+    async def ensure_indexes(self) -> None:
+        """
+        Create indexes declared by the cached backend.
+
+        :return: None
+        """
+        await self.db.ensure_indexes()
+
+    def cache_chat(self, chat: Chat, generation: int) -> None:
+        """
+        Put chat and ids of its webhooks into cache.
+
+        :param chat: Chat instance
+        :param generation: value of generation when the lookup started
+        :return: None
+        """
+        if generation != self.generation:
+            return
+        self.chats.set(chat.chat_id, chat.copy(deep=True))
+        for webhook in chat.webhooks:
+            self.webhooks.set(webhook.webhook_id, chat.chat_id)
+
+    def invalidate_chat(self, chat_id: int, webhook_ids: Iterable[str] = ()) -> None:
+        """
+        Remove cached entries of chat.
+
+        :param chat_id: chat identification number
+        :param webhook_ids: ids of added, changed or removed webhooks
+        :return: None
+        """
+        self.generation += 1
+        self.chats.pop(chat_id)
+        for webhook_id in webhook_ids:
+            self.resolved_webhooks.pop(webhook_id)
+            self.missing_webhooks.pop(webhook_id)
+
+    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+        """
+        Return chat object by id.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        chat = self.chats.get(chat_id)
+        if chat is not None:
+            self.hits += 1
+            return chat.copy(deep=True)
+
+        self.misses += 1
+        generation = self.generation
+        chat = await self.db.get_chat_by_chat_id(chat_id)
+        self.cache_chat(chat, generation)
+        return chat
+
+    async def get_chat_by_webhook_id(self, webhook_id: str) -> Chat:
+        """
+        Return chat object by webhook id.
+
+        :param webhook_id: webhook identification string
+        :return: Chat instance
+        """
+        chat_id = self.webhooks.get(webhook_id)
+        if chat_id is not None:
+            chat = self.chats.get(chat_id)
+            # the webhook could be deleted from the cached chat
+            if chat is not None and chat.get_webhook_by_id(webhook_id):
+                self.hits += 1
+                return chat.copy(deep=True)
+        if self.missing_webhooks.get(webhook_id):
+            self.negative_hits += 1
+            raise ChatNotFound()
+
+        self.misses += 1
+        generation = self.generation
+        try:
+            chat = await self.db.get_chat_by_webhook_id(webhook_id)
+        except ChatNotFound:
+            if generation == self.generation:
+                self.missing_webhooks.set(webhook_id, True)
+            raise
+        self.cache_chat(chat, generation)
+        return chat
+
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook without other webhooks of the chat.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        resolved = self.resolved_webhooks.get(webhook_id)
+        if resolved is not None:
+            self.hits += 1
+            return resolved[0], resolved[1].copy()
+        chat_id = self.webhooks.get(webhook_id)
+        if chat_id is not None:
+            chat = self.chats.get(chat_id)
+            webhook = chat.get_webhook_by_id(webhook_id) if chat is not None else None
+            if webhook is not None:
+                self.hits += 1
+                return chat_id, webhook.copy()
+        if self.missing_webhooks.get(webhook_id):
+            self.negative_hits += 1
+            raise ChatNotFound()
+
+        self.misses += 1
+        generation = self.generation
+        try:
+            chat_id, webhook = await self.db.resolve_webhook(webhook_id)
+        except ChatNotFound:
+            if generation == self.generation:
+                self.missing_webhooks.set(webhook_id, True)
+            raise
+        if generation == self.generation:
+            self.resolved_webhooks.set(webhook_id, (chat_id, webhook.copy()))
+        return chat_id, webhook
+
+    async def save_chat(self, chat: Chat) -> Chat:
+        """
+        Save chat object to database.
+
+        :param chat: Chat instance
+        :return: Chat instance
+        """
+        webhook_ids = {webhook.webhook_id for webhook in chat.webhooks}
+        cached_chat = self.chats.get(chat.chat_id)
+        if cached_chat is not None:
+            # webhooks removed from the chat
+            webhook_ids.update(webhook.webhook_id for webhook in cached_chat.webhooks)
+        try:
+            return await self.db.save_chat(chat)
+        finally:
+            self.invalidate_chat(chat.chat_id, webhook_ids)
+
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Add webhook to chat atomically, the chat is created if it does not exist.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        try:
+            chat = await self.db.add_webhook(chat_id, webhook)
+        finally:
+            self.invalidate_chat(chat_id, [webhook.webhook_id])
+        return chat
+
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Remove webhook from chat atomically.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        try:
+            return await self.db.remove_webhook(chat_id, webhook_id)
+        finally:
+            self.invalidate_chat(chat_id, [webhook_id])
+
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks in one batch.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        try:
+            await self.db.set_webhook_repository_names(repository_names)
+        finally:
+            for chat_id, webhook_id, _ in repository_names:
+                self.invalidate_chat(chat_id, [webhook_id])
+
+    def iterate_chat_ids(self, start_after: Optional[int] = None) -> AsyncIterator[int]:
+        """
+        Return chat ids in ascending order.
+
+        :param start_after: skip chat ids less than or equal to this one
+        :return: async iterator of chat ids
+        """
+        return self.db.iterate_chat_ids(start_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics.
+
+        :return: dict of cache statistics
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'chats': len(self.chats),
+            'webhooks': len(self.webhooks),
+            'resolved_webhooks': len(self.resolved_webhooks),
+            'missing_webhooks': len(self.missing_webhooks),
+        }
@@ -0,0 +1,294 @@
+"""This file contains BaseDatabaseWrapper implementation keeping data in memory."""
+import asyncio
+import fcntl
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from webhook_telegram_bot.database.backends.base import BaseDatabaseWrapper
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+from webhook_telegram_bot.exceptions import ImproperlyConfiguredException
+from webhook_telegram_bot.serializers import dumps, loads
+from webhook_telegram_bot.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+
+class DatabaseWrapper(BaseDatabaseWrapper):
+    """
+    This class implements BaseDatabaseWrapper with dicts of a single process.
+
+    Url is memory:// or memory:///path/to/snapshot.json?snapshot_interval=60.
+    With path chats are loaded from the snapshot on construction and written
+    to it atomically not later than snapshot_interval seconds after a change
+    and on close. Only one process writes the snapshot, a worker started
+    when another one holds the lock of the snapshot refuses to start.
+    """
+
+    def __init__(self, url: str):
+        """Construct DatabaseWrapper class."""
+        parsed_url = urlsplit(url)
+        query = parse_qs(parsed_url.query)
+        self.snapshot_path: Optional[str] = parsed_url.path or None
+        self.snapshot_interval = float(
+            query.get('snapshot_interval', [DEFAULT_SNAPSHOT_INTERVAL])[0]
+        )
+        self.snapshot_handle: Optional[asyncio.TimerHandle] = None
+        self.lock_fd: Optional[int] = None
+        self.chats: Dict[int, Chat] = {}
+        # webhook_id to chat_id
+        self.webhooks: Dict[str, int] = {}
+        self.closed = False
+        self.load_snapshot()
+
+    async def connect(self) -> None:
+        """
+        Take the lock of the snapshot before the worker accepts requests.
+
+        :return: None
+        """
+        if not self.acquire_lock():
+            raise ImproperlyConfiguredException(
+                f'{self.snapshot_path} is used by another process, '
+                f'memory backend with snapshot supports a single worker'
+            )
+
+    def close(self) -> None:
+        """Write pending changes to snapshot."""
+        if self.snapshot_handle is not None:
+            self.snapshot_handle.cancel()
+            self.save_snapshot()
+        self.release_lock()
+        self.closed = True
+
+    def acquire_lock(self) -> bool:
+        """
+        Try to become the only process writing the snapshot.
+
+        :return: True if lock is acquired or there is no snapshot
+        """
+        if self.snapshot_path is None or self.lock_fd is not None:
+            return True
+        fd = os.open(f'{self.snapshot_path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        return True
+
+    def release_lock(self) -> None:
+        """
+        Release the lock of the snapshot.
+
+        :return: None
+        """
+        if self.lock_fd is not None:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def load_snapshot(self) -> None:
+        """
+        Load chats from snapshot file if it exists.
+
+        :return: None
+        """
+        if self.snapshot_path is None:
+            return
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = loads(f.read())
+        except FileNotFoundError:
+            return
+        for chat_as_dict in snapshot['chats']:
+            self.put_chat(Chat.parse_obj(chat_as_dict))
+        logger.info(f'{len(self.chats)} chats loaded from {self.snapshot_path}')
+
+    def save_snapshot(self) -> None:
+        """
+        Write all chats to snapshot file atomically.
+
+        :return: None
+        """
+        self.snapshot_handle = None
+        if self.snapshot_path is None:
+            return
+        if not self.acquire_lock():
+            logger.error(
+                f'{self.snapshot_path} is used by another process, '
+                f'snapshot is not written'
+            )
+            return
+        snapshot = {'chats': [chat.dict() for chat in self.chats.values()]}
+        try:
+            atomic_write(self.snapshot_path, dumps(snapshot).encode())
+        except OSError as e:
+            logger.error(f'Failed to write snapshot {self.snapshot_path}: {e}')
+
+    def schedule_snapshot(self) -> None:
+        """
+        Schedule snapshot after a change unless it is already scheduled.
+
+        :return: None
+        """
+        if self.snapshot_path is None or self.snapshot_handle is not None:
+            return
+        self.snapshot_handle = asyncio.get_running_loop().call_later(
+            self.snapshot_interval, self.save_snapshot
+        )
+
+    def put_chat(self, chat: Chat) -> None:
+        """
+        Replace stored chat and index its webhooks.
+
+        :param chat: Chat instance
+        :return: None
+        """
+        previous_chat = self.chats.get(chat.chat_id)
+        if previous_chat is not None:
+            for webhook in previous_chat.webhooks:
+                self.webhooks.pop(webhook.webhook_id, None)
+        if chat.id is None:
+            chat.id = chat.chat_id
+        self.chats[chat.chat_id] = chat
+        for webhook in chat.webhooks:
+            self.webhooks[webhook.webhook_id] = chat.chat_id
+
+    async def drop_database(self) -> None:
+        """Drop database."""
+        if self.snapshot_handle is not None:
+            self.snapshot_handle.cancel()
+            self.snapshot_handle = None
+        self.chats.clear()
+        self.webhooks.clear()
+        if self.snapshot_path is not None and os.path.exists(self.snapshot_path):
+            os.unlink(self.snapshot_path)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Do nothing, chats are always indexed by chat_id and webhook_id.
+
+        :return: None
+        """
+        pass
+
+    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+        """
+        Return chat object by id.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            raise ChatNotFound()
+        return chat.copy(deep=True)
+
+    async def get_chat_by_webhook_id(self, webhook_id: str) -> Chat:
+        """
+        Return chat object by webhook id.
+
+        :param webhook_id: webhook identification string
+        :return: Chat instance
+        """
+        chat_id = self.webhooks.get(webhook_id)
+        if chat_id is None:
+            raise ChatNotFound()
+        return await self.get_chat_by_chat_id(chat_id)
+
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook without copying other webhooks of the chat.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        chat_id = self.webhooks.get(webhook_id)
+        if chat_id is None:
+            raise ChatNotFound()
+        webhook = self.chats[chat_id].get_webhook_by_id(webhook_id)
+        assert webhook is not None  # nosec
+        return chat_id, webhook.copy()
+
+    async def save_chat(self, chat: Chat) -> Chat:
+        """
+        Save chat object to database.
+
+        :param chat: Chat instance
+        :return: Chat instance
+        """
+        if chat.id is None:
+            chat.id = chat.chat_id
+        self.put_chat(chat.copy(deep=True))
+        self.schedule_snapshot()
+        return chat
+
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Add webhook to chat, the chat is created if it does not exist.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = Chat.parse_obj({'chat_id': chat_id})
+            self.put_chat(chat)
+        chat.webhooks.append(webhook.copy())
+        self.webhooks[webhook.webhook_id] = chat_id
+        self.schedule_snapshot()
+        return chat.copy(deep=True)
+
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Remove webhook from chat.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            raise ChatNotFound()
+        chat.webhooks = [
+            webhook for webhook in chat.webhooks if webhook.webhook_id != webhook_id
+        ]
+        if self.webhooks.get(webhook_id) == chat_id:
+            del self.webhooks[webhook_id]
+        self.schedule_snapshot()
+        return chat.copy(deep=True)
+
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        for chat_id, webhook_id, repository_name in repository_names:
+            chat = self.chats.get(chat_id)
+            if chat is not None:
+                chat.set_webhook_repository_name(webhook_id, repository_name)
+        self.schedule_snapshot()
+
+    async def iterate_chat_ids(
+        self, start_after: Optional[int] = None
+    ) -> AsyncIterator[int]:
+        """
+        Return chat ids in ascending order.
+
+        :param start_after: skip chat ids less than or equal to this one
+        :return: async iterator of chat ids
+        """
+        for chat_id in sorted(self.chats):
+            if start_after is None or chat_id > start_after:
+                yield chat_id
@@ -1,5 +1,11 @@
 """This file contains BaseDatabaseWrapper implementations for MongoDB."""
-from typing import Dict, List, Optional, Union
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union, cast
+from urllib.parse import parse_qs, urlsplit
 
 from motor.core import AgnosticClient
 from motor.motor_asyncio import (
@@ -7,27 +13,123 @@ from motor.motor_asyncio import (
     AsyncIOMotorCollection,
     AsyncIOMotorDatabase,
 )
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from pymongo.results import InsertOneResult
 
-from webhook_telegram_bot.database.backends.base import BaseDatabaseWrapper
+from webhook_telegram_bot.database.backends.base import (
+    BaseCoordinationWrapper,
+    BaseDatabaseWrapper,
+)
 from webhook_telegram_bot.database.exceptions import ChatNotFound
-from webhook_telegram_bot.database.models import Chat
+from webhook_telegram_bot.database.models import Chat, Webhook
 
 Document = Dict[str, Union[int, str, List[Dict[str, str]]]]
 
+logger = logging.getLogger(__name__)
+
+CURSOR_BATCH_SIZE = 500
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    'chats': [
+        IndexModel([('chat_id', ASCENDING)], name='chat_id', unique=True),
+        IndexModel([('webhooks.webhook_id', ASCENDING)], name='webhooks.webhook_id'),
+    ],
+    'updates': [
+        IndexModel(
+            [('expires_at', ASCENDING)], name='expires_at', expireAfterSeconds=0
+        ),
+    ],
+}
+# building of an index longer than this is logged as slow
+SLOW_INDEX_BUILD_TIME = 1.0
 
-class DatabaseWrapper(BaseDatabaseWrapper):
+
+class DatabaseWrapper(BaseDatabaseWrapper, BaseCoordinationWrapper):
     """This class implements BaseDatabaseWrapper for MongoDB."""
 
-    def __init__(self, url: str):
-        """Construct DatabaseWrapper class."""
-        self.client: AgnosticClient = AsyncIOMotorClient(url)
-        self.db: AsyncIOMotorDatabase = self.client.get_default_database()
+    indexes = INDEXES
+
+    def __init__(self, url: str, **client_options: Any):
+        """
+        Construct DatabaseWrapper class.
+
+        The client is created on first use in the process, so a wrapper
+        constructed before fork of workers does not share its connections.
+
+        :param url: MongoDB connection string
+        :param client_options: options of client, options of url take precedence
+        """
+        self.url = url
+        url_options = {
+            option.lower(): values[-1]
+            for option, values in parse_qs(urlsplit(url).query).items()
+        }
+        self.url_options = url_options
+        self.client_options = {}
+        for option, value in client_options.items():
+            if option.lower() not in url_options:
+                self.client_options[option] = value
+            elif value is not None:
+                logger.warning(
+                    f'{option}={value} is ignored, '
+                    f'url sets {option}={url_options[option.lower()]}'
+                )
+        self.process_client: Optional[AgnosticClient] = None
+        self.pid: Optional[int] = None
         self.closed = False
 
+    @property
+    def client(self) -> AgnosticClient:
+        """
+        Return client of current process, it is created on first use.
+
+        :return: AsyncIOMotorClient instance
+        """
+        if self.process_client is None or self.pid != os.getpid():
+            self.process_client = AsyncIOMotorClient(self.url, **self.client_options)
+            self.pid = os.getpid()
+        return self.process_client
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        """
+        Return default database of connection string.
+
+        :return: AsyncIOMotorDatabase instance
+        """
+        return cast(AsyncIOMotorDatabase, self.client.get_default_database())
+
+    async def connect(self) -> None:
+        """
+        Open minPoolSize connections before the application accepts requests.
+
+        :return: None
+        """
+        await asyncio.gather(
+            *(self.db.command('ping') for _ in range(max(self.min_pool_size, 1)))
+        )
+
+    @property
+    def min_pool_size(self) -> int:
+        """
+        Return minPoolSize of the client.
+
+        It is read from options instead of the client, which has no public
+        options before pymongo 4.
+
+        :return: minimum number of connections of the pool
+        """
+        min_pool_size = self.url_options.get(
+            'minpoolsize', self.client_options.get('minPoolSize', 0)
+        )
+        return int(min_pool_size)
+
     def close(self) -> None:
         """Close database connection."""
-        self.client.close()
+        if self.process_client is not None and self.pid == os.getpid():
+            self.process_client.close()
+        self.process_client = None
         self.closed = True
 
     def get_collection(self, collection_name: str) -> AsyncIOMotorCollection:
@@ -43,22 +145,65 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         """Drop database."""
         await self.client.drop_database(self.db.name)
 
-    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+    async def ensure_indexes(self) -> None:
         """
-        Return chat object by id.
+        Create missing indexes declared in indexes.
 
-        :param chat_id: chat identification number
-        :return: Chat instance
+        :return: None
+        """
+        for collection_name, indexes in self.indexes.items():
+            collection: AsyncIOMotorCollection = self.get_collection(collection_name)
+            existing_indexes = await collection.index_information()
+            for index in indexes:
+                name = index.document['name']
+                if name in existing_indexes:
+                    continue
+                logger.warning(f'Creating missing index {collection_name}.{name}')
+                started_at = time.monotonic()
+                try:
+                    await collection.create_indexes([index])
+                except OperationFailure as e:
+                    logger.error(
+                        f'Failed to create index {collection_name}.{name}: {e}'
+                    )
+                    continue
+                elapsed = time.monotonic() - started_at
+                if elapsed > SLOW_INDEX_BUILD_TIME:
+                    logger.warning(
+                        f'Index {collection_name}.{name} was built in {elapsed:.1f}s'
+                    )
+
+    async def find_chat_document(
+        self,
+        document_filter: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Document:
+        """
+        Return chat document, only fields of projection are fetched.
+
+        :param document_filter: query filter
+        :param projection: fields to fetch, e.g. {'webhooks.$': 1} for matched webhook
+        :return: chat document
         """
-        document_filter = {'chat_id': chat_id}
         collection: AsyncIOMotorCollection = self.get_collection('chats')
-        document: Optional[Document] = await collection.find_one(document_filter)
+        document: Optional[Document] = await collection.find_one(
+            document_filter, projection
+        )
         if document:
-            chat = Chat.parse_obj(document)
-            return chat
+            return document
         else:
             raise ChatNotFound()
 
+    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+        """
+        Return chat object by id.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        document = await self.find_chat_document({'chat_id': chat_id})
+        return Chat.parse_obj(document)
+
     async def get_chat_by_webhook_id(self, webhook_id: str) -> Chat:
         """
         Return chat object by webhook id.
@@ -66,14 +211,22 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         :param webhook_id: webhook identification string
         :return: Chat instance
         """
-        document_filter = {'webhooks.webhook_id': webhook_id}
-        collection: AsyncIOMotorCollection = self.get_collection('chats')
-        document: Optional[Document] = await collection.find_one(document_filter)
-        if document:
-            chat = Chat.parse_obj(document)
-            return chat
-        else:
-            raise ChatNotFound()
+        document = await self.find_chat_document({'webhooks.webhook_id': webhook_id})
+        return Chat.parse_obj(document)
+
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook, other webhooks of the chat are not fetched.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        document = await self.find_chat_document(
+            {'webhooks.webhook_id': webhook_id},
+            {'_id': 0, 'chat_id': 1, 'webhooks.$': 1},
+        )
+        webhooks = cast(List[Dict[str, str]], document['webhooks'])
+        return cast(int, document['chat_id']), Webhook.parse_obj(webhooks[0])
 
     async def save_chat(self, chat: Chat) -> Chat:
         """
@@ -95,3 +248,137 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             )
             chat.id = insert_one_result.inserted_id
         return chat
+
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Add webhook to chat with one upserting $push.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('chats')
+        document: Document = await collection.find_one_and_update(
+            {'chat_id': chat_id},
+            {'$push': {'webhooks': webhook.dict()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return Chat.parse_obj(document)
+
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Remove webhook from chat with one $pull.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('chats')
+        document: Optional[Document] = await collection.find_one_and_update(
+            {'chat_id': chat_id},
+            {'$pull': {'webhooks': {'webhook_id': webhook_id}}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if document:
+            return Chat.parse_obj(document)
+        else:
+            raise ChatNotFound()
+
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks with one bulk write of targeted $set.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('chats')
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {'chat_id': chat_id, 'webhooks.webhook_id': webhook_id},
+                    {'$set': {'webhooks.$.repository_name': repository_name}},
+                )
+                for chat_id, webhook_id, repository_name in repository_names
+            ],
+            ordered=False,
+        )
+
+    async def iterate_chat_ids(
+        self, start_after: Optional[int] = None
+    ) -> AsyncIterator[int]:
+        """
+        Return chat ids in ascending order streamed from a cursor.
+
+        :param start_after: skip chat ids less than or equal to this one
+        :return: async iterator of chat ids
+        """
+        document_filter: Dict[str, Any] = {}
+        if start_after is not None:
+            document_filter['chat_id'] = {'$gt': start_after}
+        collection: AsyncIOMotorCollection = self.get_collection('chats')
+        cursor = (
+            collection.find(document_filter, {'chat_id': 1, '_id': 0})
+            .sort('chat_id', 1)
+            .batch_size(CURSOR_BATCH_SIZE)
+        )
+        async for document in cursor:
+            yield document['chat_id']
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take named lease shared by all application instances.
+
+        :param name: lease name
+        :param owner: owner identification string
+        :param ttl: seconds before the lease expires
+        :return: True if lease is taken
+        """
+        now = time.time()
+        collection: AsyncIOMotorCollection = self.get_collection('leases')
+        try:
+            await collection.update_one(
+                {
+                    '_id': name,
+                    '$or': [{'owner': owner}, {'expires_at': {'$lt': now}}],
+                },
+                {'$set': {'owner': owner, 'expires_at': now + ttl}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def mark_update_seen(self, update_id: int, ttl: float) -> bool:
+        """
+        Remember Telegram update shared by all application instances.
+
+        Expired updates are removed by TTL index created by ensure_indexes.
+
+        :param update_id: Telegram update identification number
+        :param ttl: seconds to remember the update
+        :return: True if the update was not seen before
+        """
+        now = datetime.utcnow()
+        collection: AsyncIOMotorCollection = self.get_collection('updates')
+        try:
+            await collection.update_one(
+                {'_id': update_id, 'expires_at': {'$lt': now}},
+                {'$set': {'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def forget_update(self, update_id: int) -> None:
+        """
+        Forget Telegram update, so its redelivery is processed.
+
+        :param update_id: Telegram update identification number
+        :return: None
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('updates')
+        await collection.delete_one({'_id': update_id})
@@ -0,0 +1,212 @@
+"""This file contains BaseDatabaseWrapper implementation for normalized MongoDB layout."""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DeleteMany, IndexModel, ReturnDocument, UpdateOne
+
+from webhook_telegram_bot.database.backends import mongo
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+NORMALIZED_INDEXES: Dict[str, List[IndexModel]] = {
+    'chats': [
+        IndexModel([('chat_id', ASCENDING)], name='chat_id', unique=True),
+    ],
+    'webhooks': [
+        IndexModel(
+            [('chat_id', ASCENDING), ('added_at', ASCENDING), ('_id', ASCENDING)],
+            name='chat_id',
+        ),
+    ],
+    'updates': mongo.INDEXES['updates'],
+}
+
+
+class DatabaseWrapper(mongo.DatabaseWrapper):
+    """
+    This class implements BaseDatabaseWrapper for MongoDB with webhooks collection.
+
+    Chats are stored without webhooks, every webhook is a document
+    of webhooks collection keyed by webhook_id, so a lookup reads one
+    document and changes of webhooks do not rewrite the chat.
+    """
+
+    indexes = NORMALIZED_INDEXES
+
+    @staticmethod
+    def get_webhook_update(chat_id: int, webhook: Webhook) -> UpdateOne:
+        """
+        Return upsert of document of webhooks collection.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: UpdateOne request
+        """
+        return UpdateOne(
+            {'_id': webhook.webhook_id},
+            {
+                '$set': {
+                    'chat_id': chat_id,
+                    'service': webhook.service,
+                    'repository_name': webhook.repository_name,
+                },
+                '$setOnInsert': {'added_at': datetime.utcnow()},
+            },
+            upsert=True,
+        )
+
+    @staticmethod
+    def get_webhook(document: Dict[str, Any]) -> Webhook:
+        """
+        Return Webhook object from document of webhooks collection.
+
+        :param document: webhook document
+        :return: Webhook instance
+        """
+        return Webhook(
+            webhook_id=document['_id'],
+            service=document['service'],
+            repository_name=document.get('repository_name'),
+        )
+
+    async def get_webhooks(self, chat_id: int) -> List[Webhook]:
+        """
+        Return webhooks of chat in the order they were added.
+
+        :param chat_id: chat identification number
+        :return: list of Webhook instances
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        # webhooks added at the same time keep order of their ids
+        cursor = collection.find({'chat_id': chat_id}).sort(
+            [('added_at', ASCENDING), ('_id', ASCENDING)]
+        )
+        return [self.get_webhook(document) async for document in cursor]
+
+    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+        """
+        Return chat object by id.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        document, webhooks = await asyncio.gather(
+            self.find_chat_document({'chat_id': chat_id}, {'webhooks': 0}),
+            self.get_webhooks(chat_id),
+        )
+        return Chat.parse_obj({**document, 'webhooks': webhooks})
+
+    async def get_chat_by_webhook_id(self, webhook_id: str) -> Chat:
+        """
+        Return chat object by webhook id.
+
+        :param webhook_id: webhook identification string
+        :return: Chat instance
+        """
+        chat_id, _ = await self.resolve_webhook(webhook_id)
+        return await self.get_chat_by_chat_id(chat_id)
+
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook by primary key of webhooks collection.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        document: Optional[Dict[str, Any]] = await collection.find_one(
+            {'_id': webhook_id}
+        )
+        if document:
+            return document['chat_id'], self.get_webhook(document)
+        else:
+            raise ChatNotFound()
+
+    async def upsert_chat(self, chat_id: int) -> Dict[str, Any]:
+        """
+        Create chat document if it does not exist.
+
+        :param chat_id: chat identification number
+        :return: chat document without webhooks
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('chats')
+        document: Dict[str, Any] = await collection.find_one_and_update(
+            {'chat_id': chat_id},
+            {'$setOnInsert': {'chat_id': chat_id}},
+            projection={'webhooks': 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document
+
+    async def save_chat(self, chat: Chat) -> Chat:
+        """
+        Save chat object to database, webhooks missing in the chat are deleted.
+
+        :param chat: Chat instance
+        :return: Chat instance
+        """
+        document = await self.upsert_chat(chat.chat_id)
+        chat.id = document['_id']
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        requests: List[Any] = [
+            DeleteMany(
+                {
+                    'chat_id': chat.chat_id,
+                    '_id': {'$nin': [webhook.webhook_id for webhook in chat.webhooks]},
+                }
+            )
+        ]
+        requests.extend(
+            self.get_webhook_update(chat.chat_id, webhook) for webhook in chat.webhooks
+        )
+        await collection.bulk_write(requests, ordered=False)
+        return chat
+
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Insert webhook document, the chat is created if it does not exist.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        await self.upsert_chat(chat_id)
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        await collection.bulk_write([self.get_webhook_update(chat_id, webhook)])
+        return await self.get_chat_by_chat_id(chat_id)
+
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks with one bulk write of targeted $set.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {'_id': webhook_id, 'chat_id': chat_id},
+                    {'$set': {'repository_name': repository_name}},
+                )
+                for chat_id, webhook_id, repository_name in repository_names
+            ],
+            ordered=False,
+        )
+
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Delete webhook document.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        collection: AsyncIOMotorCollection = self.get_collection('webhooks')
+        await collection.delete_one({'_id': webhook_id, 'chat_id': chat_id})
+        return await self.get_chat_by_chat_id(chat_id)
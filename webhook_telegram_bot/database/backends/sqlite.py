@@ -0,0 +1,565 @@
+"""This file contains BaseDatabaseWrapper implementation for SQLite."""
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import parse_qs, urlsplit
+
+from webhook_telegram_bot.database.backends.base import (
+    BaseCoordinationWrapper,
+    BaseDatabaseWrapper,
+)
+from webhook_telegram_bot.database.exceptions import ChatNotFound
+from webhook_telegram_bot.database.models import Chat, Webhook
+
+T = TypeVar('T')
+
+DEFAULT_POOL_SIZE = 4
+# seconds to wait for a lock held by another connection
+DEFAULT_BUSY_TIMEOUT = 5.0
+CURSOR_BATCH_SIZE = 500
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS chats (chat_id INTEGER PRIMARY KEY)',
+    'CREATE TABLE IF NOT EXISTS webhooks ('
+    'webhook_id TEXT PRIMARY KEY, '
+    'chat_id INTEGER NOT NULL REFERENCES chats (chat_id) ON DELETE CASCADE, '
+    'service TEXT NOT NULL, '
+    'repository_name TEXT, '
+    'position INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS leases ('
+    'name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS updates ('
+    'update_id INTEGER PRIMARY KEY, expires_at REAL NOT NULL)',
+)
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS webhooks_chat_id ON webhooks (chat_id, position)',
+    'CREATE INDEX IF NOT EXISTS updates_expires_at ON updates (expires_at)',
+)
+TABLES = ('webhooks', 'chats', 'leases', 'updates')
+
+
+class DatabaseWrapper(BaseDatabaseWrapper, BaseCoordinationWrapper):
+    """
+    This class implements BaseDatabaseWrapper for SQLite.
+
+    Url is sqlite:///path/to/db.sqlite3?pool_size=4&timeout=5. The database
+    is in WAL mode, so workers of all processes read while one of them writes.
+    Queries run on a pool of threads, each thread has its own connection.
+    Threads and connections are created in the process using them, so the
+    wrapper constructed before fork opens nothing in the parent process.
+    """
+
+    def __init__(self, url: str):
+        """Construct DatabaseWrapper class."""
+        parsed_url = urlsplit(url)
+        query = parse_qs(parsed_url.query)
+        self.path = parsed_url.path
+        self.timeout = float(query.get('timeout', [DEFAULT_BUSY_TIMEOUT])[0])
+        self.pool_size = int(query.get('pool_size', [DEFAULT_POOL_SIZE])[0])
+        self.pid: Optional[int] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.local = threading.local()
+        self.connections: List[sqlite3.Connection] = []
+        self.lock = threading.Lock()
+        self.schema_created = False
+        self.closed = False
+
+    async def connect(self) -> None:
+        """
+        Open connection and create schema before the worker accepts requests.
+
+        :return: None
+        """
+        await self.run(self.get_connection)
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        """
+        Return pool of threads of current process, it is created on first use.
+
+        Threads and connections of the parent process are not usable after
+        fork, so they are left to the parent and the child creates its own.
+
+        :return: pool of threads
+        """
+        if self.executor is None or self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.executor = ThreadPoolExecutor(
+                self.pool_size, thread_name_prefix='sqlite'
+            )
+            self.local = threading.local()
+            self.connections = []
+            self.lock = threading.Lock()
+            self.schema_created = False
+        return self.executor
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Return connection of current thread, it is opened on first use.
+
+        The first connection of the process creates missing tables.
+
+        :return: sqlite3 connection
+        """
+        self.get_executor()
+        connection: Optional[sqlite3.Connection] = getattr(
+            self.local, 'connection', None
+        )
+        if connection is None:
+            # transactions are started explicitly by transaction()
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+                if not self.schema_created:
+                    for statement in SCHEMA:
+                        connection.execute(statement)
+                    self.schema_created = True
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in write transaction of current thread connection.
+
+        :return: sqlite3 connection
+        """
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run blocking function on the pool of threads.
+
+        :param func: function using connection of its thread
+        :param args: function arguments
+        :return: function result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get_executor(), functools.partial(func, *args)
+        )
+
+    def close(self) -> None:
+        """Close database connections of current process."""
+        if self.executor is not None and self.pid == os.getpid():
+            self.executor.shutdown(wait=True)
+            with self.lock:
+                for connection in self.connections:
+                    connection.close()
+                self.connections = []
+        self.executor = None
+        self.closed = True
+
+    def delete_rows(self) -> None:
+        """
+        Delete rows of all tables.
+
+        :return: None
+        """
+        with self.transaction() as connection:
+            for table in TABLES:
+                connection.execute(f'DELETE FROM {table}')  # nosec
+
+    async def drop_database(self) -> None:
+        """Drop database."""
+        await self.run(self.delete_rows)
+
+    def create_indexes(self) -> None:
+        """
+        Create missing indexes with connection of current thread.
+
+        :return: None
+        """
+        connection = self.get_connection()
+        for statement in INDEXES:
+            connection.execute(statement)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Create missing indexes.
+
+        :return: None
+        """
+        await self.run(self.create_indexes)
+
+    def select_chat(self, chat_id: int) -> Chat:
+        """
+        Return chat with its webhooks in one query.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        rows = (
+            self.get_connection()
+            .execute(
+                'SELECT chats.chat_id, webhook_id, service, repository_name '
+                'FROM chats LEFT JOIN webhooks ON webhooks.chat_id = chats.chat_id '
+                'WHERE chats.chat_id = ? ORDER BY position',
+                (chat_id,),
+            )
+            .fetchall()
+        )
+        if not rows:
+            raise ChatNotFound()
+        return Chat.parse_obj(
+            {
+                '_id': chat_id,
+                'chat_id': chat_id,
+                'webhooks': [
+                    {
+                        'webhook_id': webhook_id,
+                        'service': service,
+                        'repository_name': repository_name,
+                    }
+                    for _, webhook_id, service, repository_name in rows
+                    if webhook_id is not None
+                ],
+            }
+        )
+
+    def select_chat_by_webhook_id(self, webhook_id: str) -> Chat:
+        """
+        Return chat by id of its webhook.
+
+        :param webhook_id: webhook identification string
+        :return: Chat instance
+        """
+        chat_id, _ = self.select_webhook(webhook_id)
+        return self.select_chat(chat_id)
+
+    def select_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook by webhook id.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        row = (
+            self.get_connection()
+            .execute(
+                'SELECT chat_id, service, repository_name '
+                'FROM webhooks WHERE webhook_id = ?',
+                (webhook_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            raise ChatNotFound()
+        chat_id, service, repository_name = row
+        return chat_id, Webhook(
+            webhook_id=webhook_id, service=service, repository_name=repository_name
+        )
+
+    async def get_chat_by_chat_id(self, chat_id: int) -> Chat:
+        """
+        Return chat object by id.
+
+        :param chat_id: chat identification number
+        :return: Chat instance
+        """
+        return await self.run(self.select_chat, chat_id)
+
+    async def get_chat_by_webhook_id(self, webhook_id: str) -> Chat:
+        """
+        Return chat object by webhook id.
+
+        :param webhook_id: webhook identification string
+        :return: Chat instance
+        """
+        return await self.run(self.select_chat_by_webhook_id, webhook_id)
+
+    async def resolve_webhook(self, webhook_id: str) -> Tuple[int, Webhook]:
+        """
+        Return chat id and webhook by primary key of webhooks table.
+
+        :param webhook_id: webhook identification string
+        :return: chat identification number and Webhook instance
+        """
+        return await self.run(self.select_webhook, webhook_id)
+
+    @staticmethod
+    def upsert_webhook(
+        connection: sqlite3.Connection, chat_id: int, webhook: Webhook, position: Any
+    ) -> None:
+        """
+        Insert webhook or move it to the chat and position.
+
+        :param connection: sqlite3 connection
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :param position: position of webhook in the chat
+        :return: None
+        """
+        connection.execute(
+            'INSERT INTO webhooks '
+            '(webhook_id, chat_id, service, repository_name, position) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (webhook_id) DO UPDATE SET '
+            'chat_id = excluded.chat_id, service = excluded.service, '
+            'repository_name = excluded.repository_name, '
+            'position = excluded.position',
+            (
+                webhook.webhook_id,
+                chat_id,
+                webhook.service,
+                webhook.repository_name,
+                position,
+            ),
+        )
+
+    def write_chat(self, chat: Chat) -> None:
+        """
+        Replace webhooks of chat in one transaction.
+
+        :param chat: Chat instance
+        :return: None
+        """
+        webhook_ids = [webhook.webhook_id for webhook in chat.webhooks]
+        placeholders = ', '.join('?' * len(webhook_ids))
+        with self.transaction() as connection:
+            connection.execute(
+                'INSERT OR IGNORE INTO chats (chat_id) VALUES (?)', (chat.chat_id,)
+            )
+            connection.execute(
+                'DELETE FROM webhooks '  # nosec
+                f'WHERE chat_id = ? AND webhook_id NOT IN ({placeholders})',
+                (chat.chat_id, *webhook_ids),
+            )
+            for position, webhook in enumerate(chat.webhooks):
+                self.upsert_webhook(connection, chat.chat_id, webhook, position)
+
+    def insert_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Append webhook to chat in one transaction.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        with self.transaction() as connection:
+            connection.execute(
+                'INSERT OR IGNORE INTO chats (chat_id) VALUES (?)', (chat_id,)
+            )
+            (position,) = connection.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM webhooks WHERE chat_id = ?',
+                (chat_id,),
+            ).fetchone()
+            self.upsert_webhook(connection, chat_id, webhook, position)
+            return self.select_chat(chat_id)
+
+    def delete_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Delete webhook of chat in one transaction.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        with self.transaction() as connection:
+            connection.execute(
+                'DELETE FROM webhooks WHERE chat_id = ? AND webhook_id = ?',
+                (chat_id, webhook_id),
+            )
+            return self.select_chat(chat_id)
+
+    async def save_chat(self, chat: Chat) -> Chat:
+        """
+        Save chat object to database, webhooks missing in the chat are deleted.
+
+        :param chat: Chat instance
+        :return: Chat instance
+        """
+        await self.run(self.write_chat, chat)
+        chat.id = chat.chat_id
+        return chat
+
+    async def add_webhook(self, chat_id: int, webhook: Webhook) -> Chat:
+        """
+        Add webhook to chat in one transaction, the chat is created if needed.
+
+        :param chat_id: chat identification number
+        :param webhook: Webhook instance
+        :return: Chat instance with the webhook
+        """
+        return await self.run(self.insert_webhook, chat_id, webhook)
+
+    async def remove_webhook(self, chat_id: int, webhook_id: str) -> Chat:
+        """
+        Remove webhook from chat in one transaction.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :return: Chat instance without the webhook
+        """
+        return await self.run(self.delete_webhook, chat_id, webhook_id)
+
+    def update_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Update repository names of webhooks in one transaction.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        with self.transaction() as connection:
+            connection.executemany(
+                'UPDATE webhooks SET repository_name = ? '
+                'WHERE webhook_id = ? AND chat_id = ?',
+                [
+                    (repository_name, webhook_id, chat_id)
+                    for chat_id, webhook_id, repository_name in repository_names
+                ],
+            )
+
+    async def set_webhook_repository_names(
+        self, repository_names: List[Tuple[int, str, str]]
+    ) -> None:
+        """
+        Set repository names of webhooks in one transaction.
+
+        :param repository_names: list of chat_id, webhook_id and repository_name
+        :return: None
+        """
+        await self.run(self.update_repository_names, repository_names)
+
+    def select_chat_ids(self, start_after: int) -> List[int]:
+        """
+        Return page of chat ids in ascending order.
+
+        :param start_after: chat id before the page
+        :return: list of chat ids
+        """
+        rows = (
+            self.get_connection()
+            .execute(
+                'SELECT chat_id FROM chats WHERE chat_id > ? ORDER BY chat_id LIMIT ?',
+                (start_after, CURSOR_BATCH_SIZE),
+            )
+            .fetchall()
+        )
+        return [chat_id for chat_id, in rows]
+
+    async def iterate_chat_ids(
+        self, start_after: Optional[int] = None
+    ) -> AsyncIterator[int]:
+        """
+        Return chat ids in ascending order read by pages.
+
+        :param start_after: skip chat ids less than or equal to this one
+        :return: async iterator of chat ids
+        """
+        # chat ids are 64-bit integers
+        last_chat_id = -(2**63) if start_after is None else start_after
+        while True:
+            chat_ids = await self.run(self.select_chat_ids, last_chat_id)
+            for chat_id in chat_ids:
+                yield chat_id
+            if len(chat_ids) < CURSOR_BATCH_SIZE:
+                return
+            last_chat_id = chat_ids[-1]
+
+    def upsert_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take lease with one upsert.
+
+        :param name: lease name
+        :param owner: owner identification string
+        :param ttl: seconds before the lease expires
+        :return: True if lease is taken
+        """
+        now = time.time()
+        cursor = self.get_connection().execute(
+            'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET '
+            'owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.owner = excluded.owner OR leases.expires_at < ?',
+            (name, owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take named lease shared by all application instances.
+
+        :param name: lease name
+        :param owner: owner identification string
+        :param ttl: seconds before the lease expires
+        :return: True if lease is taken
+        """
+        return await self.run(self.upsert_lease, name, owner, ttl)
+
+    def insert_update(self, update_id: int, ttl: float) -> bool:
+        """
+        Insert update and delete expired ones in one transaction.
+
+        :param update_id: Telegram update identification number
+        :param ttl: seconds to remember the update
+        :return: True if the update was not seen before
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM updates WHERE expires_at < ?', (now,))
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO updates (update_id, expires_at) VALUES (?, ?)',
+                (update_id, now + ttl),
+            )
+        return cursor.rowcount == 1
+
+    async def mark_update_seen(self, update_id: int, ttl: float) -> bool:
+        """
+        Remember Telegram update shared by all application instances.
+
+        :param update_id: Telegram update identification number
+        :param ttl: seconds to remember the update
+        :return: True if the update was not seen before
+        """
+        return await self.run(self.insert_update, update_id, ttl)
+
+    def delete_update(self, update_id: int) -> None:
+        """
+        Delete update.
+
+        :param update_id: Telegram update identification number
+        :return: None
+        """
+        self.get_connection().execute(
+            'DELETE FROM updates WHERE update_id = ?', (update_id,)
+        )
+
+    async def forget_update(self, update_id: int) -> None:
+        """
+        Forget Telegram update, so its redelivery is processed.
+
+        :param update_id: Telegram update identification number
+        :return: None
+        """
+        await self.run(self.delete_update, update_id)
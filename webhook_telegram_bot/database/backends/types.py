@@ -1,8 +1,26 @@
 """This file contains types for database layer."""
 from typing import Union
 
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.memory import (
+    DatabaseWrapper as MemoryDatabaseWrapper,
+)
 from webhook_telegram_bot.database.backends.mongo import (
     DatabaseWrapper as MongoDatabaseWrapper,
 )
+from webhook_telegram_bot.database.backends.mongo_normalized import (
+    DatabaseWrapper as NormalizedMongoDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.sqlite import (
+    DatabaseWrapper as SQLiteDatabaseWrapper,
+)
 
-DatabaseWrapperImpl = Union[MongoDatabaseWrapper]
+DatabaseWrapperImpl = Union[
+    MongoDatabaseWrapper,
+    NormalizedMongoDatabaseWrapper,
+    MemoryDatabaseWrapper,
+    SQLiteDatabaseWrapper,
+    CachedDatabaseWrapper,
+]
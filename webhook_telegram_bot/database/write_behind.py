@@ -0,0 +1,124 @@
+"""This file contains write-behind buffer of webhook metadata."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
+
+logger = logging.getLogger(__name__)
+
+# chat_id, webhook_id, repository_name
+RepositoryName = Tuple[int, str, str]
+
+
+class RepositoryNameWriter:
+    """This class buffers repository names of webhooks and saves them in batches."""
+
+    def __init__(
+        self,
+        db: DatabaseWrapperImpl,
+        flush_interval: float = 0.5,
+        max_batch_size: int = 100,
+    ) -> None:
+        """
+        Construct RepositoryNameWriter class.
+
+        A failed batch is logged and dropped, the repository name is buffered
+        again by the next event of the webhook.
+
+        :param db: DatabaseWrapper implementation instance
+        :param flush_interval: seconds between flushes
+        :param max_batch_size: number of buffered names flushed without waiting
+        :return: None
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        # webhook_id to chat_id and repository_name
+        self.pending: Dict[str, Tuple[int, str]] = {}
+        self.task: Optional[asyncio.Task[None]] = None
+        self.flushes: Set[asyncio.Task[None]] = set()
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        """
+        Start periodic flushing.
+
+        :return: None
+        """
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop periodic flushing and save buffered names.
+
+        :return: None
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await asyncio.gather(*self.flushes, return_exceptions=True)
+        await self.flush()
+
+    def set(self, chat_id: int, webhook_id: str, repository_name: str) -> None:
+        """
+        Buffer repository name of webhook without waiting for the database.
+
+        :param chat_id: chat identification number
+        :param webhook_id: webhook identification string
+        :param repository_name: name of repository
+        :return: None
+        """
+        self.pending[webhook_id] = (chat_id, repository_name)
+        if len(self.pending) >= self.max_batch_size:
+            task = asyncio.create_task(self.flush())
+            self.flushes.add(task)
+            task.add_done_callback(self.flushes.discard)
+
+    async def run(self) -> None:
+        """
+        Flush buffered names every flush_interval seconds until cancelled.
+
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Save buffered names with one bulk write.
+
+        :return: None
+        """
+        if not self.pending:
+            return
+        batch: List[RepositoryName] = [
+            (chat_id, webhook_id, repository_name)
+            for webhook_id, (chat_id, repository_name) in self.pending.items()
+        ]
+        self.pending = {}
+        self.batches += 1
+        try:
+            await self.db.set_webhook_repository_names(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f'Failed to save {len(batch)} repository names: {e}')
+            return
+        self.written += len(batch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return write-behind statistics.
+
+        :return: dict of write-behind statistics
+        """
+        return {
+            'pending': len(self.pending),
+            'batches': self.batches,
+            'written': self.written,
+            'failed': self.failed,
+        }
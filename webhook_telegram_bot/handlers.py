@@ -1,7 +1,33 @@
 """This file contains handlers for common purposes."""
+from typing import Any, Dict
+
 from aiohttp import web
 from aiohttp.web_response import Response
 
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
+from webhook_telegram_bot.helpers import (
+    BROADCASTER_KEY,
+    DATABASE_KEY,
+    MESSAGE_COALESCER_KEY,
+    MESSAGE_EDITOR_KEY,
+    MESSAGE_QUEUE_KEY,
+    REPOSITORY_NAME_WRITER_KEY,
+    TELEGRAM_API_KEY,
+    UPDATE_DEDUPLICATOR_KEY,
+    get_broadcaster,
+    get_database,
+    get_message_coalescer,
+    get_message_editor,
+    get_message_queue,
+    get_repository_name_writer,
+    get_telegram_api,
+    get_update_deduplicator,
+    is_authorized,
+)
+from webhook_telegram_bot.serializers import dumps
+
 
 async def health_handler(request: web.Request) -> Response:
     """
@@ -9,4 +35,35 @@ async def health_handler(request: web.Request) -> Response:
 
     :return: Response
     """
-    return web.json_response({"health": "ok"})
+    return web.json_response({"health": "ok"}, dumps=dumps)
+
+
+async def metrics_handler(request: web.Request) -> Response:
+    """
+    Return runtime metrics of the worker to admin.
+
+    :return: Response
+    """
+    if not is_authorized(request):
+        raise web.HTTPForbidden()
+    app = request.app
+    metrics: Dict[str, Any] = {}
+    if DATABASE_KEY in app:
+        db = get_database(app)
+        if isinstance(db, CachedDatabaseWrapper):
+            metrics['database_cache'] = db.get_stats()
+    if REPOSITORY_NAME_WRITER_KEY in app:
+        metrics['repository_name_writer'] = get_repository_name_writer(app).get_stats()
+    if TELEGRAM_API_KEY in app:
+        metrics['telegram_api'] = get_telegram_api(app).get_stats()
+    if MESSAGE_QUEUE_KEY in app:
+        metrics['message_queue'] = get_message_queue(app).get_stats()
+    if MESSAGE_COALESCER_KEY in app:
+        metrics['message_coalescer'] = get_message_coalescer(app).get_stats()
+    if MESSAGE_EDITOR_KEY in app:
+        metrics['message_editor'] = get_message_editor(app).get_stats()
+    if UPDATE_DEDUPLICATOR_KEY in app:
+        metrics['update_deduplicator'] = get_update_deduplicator(app).get_stats()
+    if BROADCASTER_KEY in app:
+        metrics['broadcaster'] = get_broadcaster(app).get_stats()
+    return web.json_response(metrics, dumps=dumps)
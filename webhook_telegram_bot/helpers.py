@@ -1,19 +1,43 @@
 """This file contains application helpers."""
+import hashlib
+import hmac
 import importlib
 from typing import Any, Dict, List, Optional, Union, cast
 
 from aiohttp import web
 from jinja2 import Environment
 
+from webhook_telegram_bot.broadcast.broadcaster import Broadcaster
+from webhook_telegram_bot.database.backends.base import BaseCoordinationWrapper
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
 from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
+from webhook_telegram_bot.database.write_behind import RepositoryNameWriter
 from webhook_telegram_bot.plugins.types import AbstractPluginImpl
+from webhook_telegram_bot.telegram.coalescer import MessageCoalescer
+from webhook_telegram_bot.telegram.deduplicator import UpdateDeduplicator
+from webhook_telegram_bot.telegram.message_editor import MessageEditor
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+from webhook_telegram_bot.telegram.polling import TelegramPoller
+from webhook_telegram_bot.telegram.registration import WebhookRegistration
+from webhook_telegram_bot.telegram.router import CommandRouter
 from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
 
 CONFIG_KEY = 'CONFIG'
 DATABASE_KEY = 'DB'
+REPOSITORY_NAME_WRITER_KEY = 'REPOSITORY_NAME_WRITER'
 TELEGRAM_API_KEY = 'TELEGRAM_API'
+MESSAGE_QUEUE_KEY = 'MESSAGE_QUEUE'
+MESSAGE_COALESCER_KEY = 'MESSAGE_COALESCER'
+MESSAGE_EDITOR_KEY = 'MESSAGE_EDITOR'
+TELEGRAM_POLLER_KEY = 'TELEGRAM_POLLER'
+UPDATE_DEDUPLICATOR_KEY = 'UPDATE_DEDUPLICATOR'
+WEBHOOK_REGISTRATION_KEY = 'WEBHOOK_REGISTRATION'
+BROADCASTER_KEY = 'BROADCASTER'
 TEMPLATE_ENGINE_KEY = 'TEMPLATE_ENGINE'
 PLUGINS_INSTANCES_KEY = 'PLUGINS_INSTANCES'
+COMMAND_ROUTER_KEY = 'COMMAND_ROUTER'
 
 
 def set_config(app: web.Application, config: Dict[str, Any]) -> None:
@@ -70,6 +94,42 @@ def get_database(app: web.Application) -> DatabaseWrapperImpl:
     return cast(DatabaseWrapperImpl, app[DATABASE_KEY])
 
 
+def get_coordination_wrapper(app: web.Application) -> Optional[BaseCoordinationWrapper]:
+    """
+    Return database of application if it keeps state shared by all instances.
+
+    :param app: application instance
+    :return: BaseCoordinationWrapper implementation instance or None
+    """
+    db: Any = get_database(app)
+    if isinstance(db, CachedDatabaseWrapper):
+        db = db.db
+    return db if isinstance(db, BaseCoordinationWrapper) else None
+
+
+def set_repository_name_writer(
+    app: web.Application, repository_name_writer: RepositoryNameWriter
+) -> None:
+    """
+    Set RepositoryNameWriter instance into application.
+
+    :param app: application instance
+    :param repository_name_writer: RepositoryNameWriter instance
+    :return: None
+    """
+    app[REPOSITORY_NAME_WRITER_KEY] = repository_name_writer
+
+
+def get_repository_name_writer(app: web.Application) -> RepositoryNameWriter:
+    """
+    Return RepositoryNameWriter instance from application.
+
+    :param app: application instance
+    :return: RepositoryNameWriter instance
+    """
+    return cast(RepositoryNameWriter, app[REPOSITORY_NAME_WRITER_KEY])
+
+
 def set_telegram_api(app: web.Application, telegram_api: TelegramAPI) -> None:
     """
     Set TelegramAPI instance into application.
@@ -91,6 +151,159 @@ def get_telegram_api(app: web.Application) -> TelegramAPI:
     return cast(TelegramAPI, app[TELEGRAM_API_KEY])
 
 
+def set_message_queue(app: web.Application, message_queue: MessageQueue) -> None:
+    """
+    Set MessageQueue instance into application.
+
+    :param app: application instance
+    :param message_queue: MessageQueue instance
+    :return: None
+    """
+    app[MESSAGE_QUEUE_KEY] = message_queue
+
+
+def get_message_queue(app: web.Application) -> MessageQueue:
+    """
+    Return MessageQueue instance from application.
+
+    :param app: application instance
+    :return: MessageQueue instance
+    """
+    return cast(MessageQueue, app[MESSAGE_QUEUE_KEY])
+
+
+def set_message_coalescer(
+    app: web.Application, message_coalescer: MessageCoalescer
+) -> None:
+    """
+    Set MessageCoalescer instance into application.
+
+    :param app: application instance
+    :param message_coalescer: MessageCoalescer instance
+    :return: None
+    """
+    app[MESSAGE_COALESCER_KEY] = message_coalescer
+
+
+def get_message_coalescer(app: web.Application) -> MessageCoalescer:
+    """
+    Return MessageCoalescer instance from application.
+
+    :param app: application instance
+    :return: MessageCoalescer instance
+    """
+    return cast(MessageCoalescer, app[MESSAGE_COALESCER_KEY])
+
+
+def set_message_editor(app: web.Application, message_editor: MessageEditor) -> None:
+    """
+    Set MessageEditor instance into application.
+
+    :param app: application instance
+    :param message_editor: MessageEditor instance
+    :return: None
+    """
+    app[MESSAGE_EDITOR_KEY] = message_editor
+
+
+def get_message_editor(app: web.Application) -> MessageEditor:
+    """
+    Return MessageEditor instance from application.
+
+    :param app: application instance
+    :return: MessageEditor instance
+    """
+    return cast(MessageEditor, app[MESSAGE_EDITOR_KEY])
+
+
+def set_update_deduplicator(
+    app: web.Application, update_deduplicator: UpdateDeduplicator
+) -> None:
+    """
+    Set UpdateDeduplicator instance into application.
+
+    :param app: application instance
+    :param update_deduplicator: UpdateDeduplicator instance
+    :return: None
+    """
+    app[UPDATE_DEDUPLICATOR_KEY] = update_deduplicator
+
+
+def get_update_deduplicator(app: web.Application) -> UpdateDeduplicator:
+    """
+    Return UpdateDeduplicator instance from application.
+
+    :param app: application instance
+    :return: UpdateDeduplicator instance
+    """
+    return cast(UpdateDeduplicator, app[UPDATE_DEDUPLICATOR_KEY])
+
+
+def set_telegram_poller(app: web.Application, telegram_poller: TelegramPoller) -> None:
+    """
+    Set TelegramPoller instance into application.
+
+    :param app: application instance
+    :param telegram_poller: TelegramPoller instance
+    :return: None
+    """
+    app[TELEGRAM_POLLER_KEY] = telegram_poller
+
+
+def get_telegram_poller(app: web.Application) -> TelegramPoller:
+    """
+    Return TelegramPoller instance from application.
+
+    :param app: application instance
+    :return: TelegramPoller instance
+    """
+    return cast(TelegramPoller, app[TELEGRAM_POLLER_KEY])
+
+
+def set_webhook_registration(
+    app: web.Application, webhook_registration: WebhookRegistration
+) -> None:
+    """
+    Set WebhookRegistration instance into application.
+
+    :param app: application instance
+    :param webhook_registration: WebhookRegistration instance
+    :return: None
+    """
+    app[WEBHOOK_REGISTRATION_KEY] = webhook_registration
+
+
+def get_webhook_registration(app: web.Application) -> WebhookRegistration:
+    """
+    Return WebhookRegistration instance from application.
+
+    :param app: application instance
+    :return: WebhookRegistration instance
+    """
+    return cast(WebhookRegistration, app[WEBHOOK_REGISTRATION_KEY])
+
+
+def set_broadcaster(app: web.Application, broadcaster: Broadcaster) -> None:
+    """
+    Set Broadcaster instance into application.
+
+    :param app: application instance
+    :param broadcaster: Broadcaster instance
+    :return: None
+    """
+    app[BROADCASTER_KEY] = broadcaster
+
+
+def get_broadcaster(app: web.Application) -> Broadcaster:
+    """
+    Return Broadcaster instance from application.
+
+    :param app: application instance
+    :return: Broadcaster instance
+    """
+    return cast(Broadcaster, app[BROADCASTER_KEY])
+
+
 def set_template_engine(app: web.Application, template_engine: Environment) -> None:
     """
     Set template engine instance into application.
@@ -112,19 +325,63 @@ def get_template_engine(app: web.Application) -> Environment:
     return cast(Environment, app[TEMPLATE_ENGINE_KEY])
 
 
+def derive_secret(telegram_api_token: str, purpose: str) -> str:
+    """
+    Return secret derived from token of Telegram bot.
+
+    The same on every worker and host, so no shared state is needed.
+
+    :param telegram_api_token: token of Telegram bot
+    :param purpose: what the secret is used for
+    :return: hex encoded secret
+    """
+    return hmac.new(
+        telegram_api_token.encode(), purpose.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def get_telegram_webhook_token(app: web.Application) -> str:
+    """
+    Return token of Telegram webhook route.
+
+    :param app: application instance
+    :return: configured token or the one derived from token of Telegram bot
+    """
+    return cast(str, get_config_value(app, 'TELEGRAM_WEBHOOK_TOKEN')) or (
+        derive_secret(
+            cast(str, get_config_value(app, 'TELEGRAM_API_TOKEN')), 'webhook_token'
+        )
+    )
+
+
+def get_telegram_webhook_secret(app: web.Application) -> str:
+    """
+    Return secret token sent by Telegram in every webhook request.
+
+    :param app: application instance
+    :return: configured secret or the one derived from token of Telegram bot
+    """
+    return cast(str, get_config_value(app, 'TELEGRAM_WEBHOOK_SECRET')) or (
+        derive_secret(
+            cast(str, get_config_value(app, 'TELEGRAM_API_TOKEN')), 'secret_token'
+        )
+    )
+
+
 def get_db_wrapper_instance(
-    database_engine: str, database_url: str
+    database_engine: str, database_url: str, **options: Any
 ) -> DatabaseWrapperImpl:
     """
     Return database wrapper instance, according configuration.
 
     :param database_engine: path to DatabaseWrapper implementation
     :param database_url: connection string to database
+    :param options: keyword arguments of DatabaseWrapper implementation
     :return: database wrapper instance
     """
     module = importlib.import_module(database_engine)
     db_wrapper_class = getattr(module, 'DatabaseWrapper')
-    return cast(DatabaseWrapperImpl, db_wrapper_class(database_url))
+    return cast(DatabaseWrapperImpl, db_wrapper_class(database_url, **options))
 
 
 def set_plugins_instances(
@@ -148,3 +405,38 @@ def get_plugins_instances(app: web.Application) -> List[AbstractPluginImpl]:
     :return: list of plugins instances
     """
     return app.get(PLUGINS_INSTANCES_KEY, [])
+
+
+def set_command_router(app: web.Application, command_router: CommandRouter) -> None:
+    """
+    Set CommandRouter instance into application.
+
+    :param app: application instance
+    :param command_router: CommandRouter instance
+    :return: None
+    """
+    app[COMMAND_ROUTER_KEY] = command_router
+
+
+def get_command_router(app: web.Application) -> CommandRouter:
+    """
+    Return CommandRouter instance from application.
+
+    :param app: application instance
+    :return: CommandRouter instance
+    """
+    return cast(CommandRouter, app[COMMAND_ROUTER_KEY])
+
+
+def is_authorized(request: web.Request) -> bool:
+    """
+    Check that request has admin token.
+
+    :param request: request from admin
+    :return: True if request is authorized
+    """
+    admin_token = get_config_value(request.app, 'ADMIN_TOKEN')
+    if not admin_token:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    return hmac.compare_digest(authorization, f'Bearer {admin_token}')
@@ -1,32 +1,75 @@
 """This file contains application methods."""
 import argparse
+import functools
 import importlib
 import logging
 import sys
-from typing import Dict, Optional, cast
+from typing import Any, Dict, List, Optional, cast
 
 from aiohttp import web
 from jinja2 import Environment, PackageLoader, PrefixLoader, select_autoescape
 
+from webhook_telegram_bot.broadcast.broadcaster import Broadcaster
+from webhook_telegram_bot.broadcast.routes import init_broadcast_routes
 from webhook_telegram_bot.config import get_config
+from webhook_telegram_bot.database.backends.cached import (
+    DatabaseWrapper as CachedDatabaseWrapper,
+)
+from webhook_telegram_bot.database.backends.memory import (
+    DatabaseWrapper as MemoryDatabaseWrapper,
+)
+from webhook_telegram_bot.database.write_behind import RepositoryNameWriter
 from webhook_telegram_bot.exceptions import (
     ImproperlyConfiguredException,
     WebhookBotException,
 )
-from webhook_telegram_bot.handlers import health_handler
+from webhook_telegram_bot.handlers import health_handler, metrics_handler
 from webhook_telegram_bot.helpers import (
+    get_broadcaster,
     get_config_value,
+    get_coordination_wrapper,
     get_database,
     get_db_wrapper_instance,
+    get_message_coalescer,
+    get_message_editor,
+    get_message_queue,
     get_plugins_instances,
+    get_repository_name_writer,
     get_telegram_api,
+    get_telegram_poller,
+    get_telegram_webhook_secret,
+    get_telegram_webhook_token,
+    get_webhook_registration,
+    set_broadcaster,
+    set_command_router,
     set_config,
     set_database,
+    set_message_coalescer,
+    set_message_editor,
+    set_message_queue,
     set_plugins_instances,
+    set_repository_name_writer,
     set_telegram_api,
+    set_telegram_poller,
     set_template_engine,
+    set_update_deduplicator,
+    set_webhook_registration,
+)
+from webhook_telegram_bot.telegram.circuit_breaker import CircuitBreaker
+from webhook_telegram_bot.telegram.coalescer import MessageCoalescer
+from webhook_telegram_bot.telegram.constants import (
+    TELEGRAM_INGRESS_MODE_POLLING,
+    TELEGRAM_WEBHOOK_ROUTE,
+    UPDATE_DEDUPLICATION_STORE_DATABASE,
 )
-from webhook_telegram_bot.telegram.constants import TELEGRAM_WEBHOOK_ROUTE
+from webhook_telegram_bot.telegram.deduplicator import UpdateDeduplicator
+from webhook_telegram_bot.telegram.handlers import create_command_router, process_update
+from webhook_telegram_bot.telegram.message_editor import MessageEditor
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+from webhook_telegram_bot.telegram.outbox import Outbox
+from webhook_telegram_bot.telegram.polling import TelegramPoller
+from webhook_telegram_bot.telegram.rate_limiter import TelegramRateLimiter
+from webhook_telegram_bot.telegram.registration import WebhookRegistration
 from webhook_telegram_bot.telegram.routes import init_telegram_routes
 from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
 
@@ -77,6 +120,52 @@ async def init_database(app: web.Application) -> None:
     :return: None
     """
 
+    async def connect_database(app_: web.Application) -> None:
+        """
+        Open database connections of the worker before it accepts requests.
+
+        :param app_: application instance
+        :return: None
+        """
+        try:
+            await get_database(app_).connect()
+        except ImproperlyConfiguredException:
+            raise
+        except Exception as e:
+            # connections are opened on first use
+            logger.warning(f'Failed to connect to database: {e}')
+
+    async def ensure_database_indexes(app_: web.Application) -> None:
+        """
+        Create missing indexes on application startup.
+
+        :param app_: application instance
+        :return: None
+        """
+        try:
+            await get_database(app_).ensure_indexes()
+        except Exception as e:
+            # lookups still work without indexes, only slower
+            logger.warning(f'Failed to ensure database indexes: {e}')
+
+    async def start_repository_name_writer(app_: web.Application) -> None:
+        """
+        Start periodic saving of repository names on application startup.
+
+        :param app_: application instance
+        :return: None
+        """
+        get_repository_name_writer(app_).start()
+
+    async def stop_repository_name_writer(app_: web.Application) -> None:
+        """
+        Save buffered repository names before database is closed.
+
+        :param app_: application instance
+        :return: None
+        """
+        await get_repository_name_writer(app_).stop()
+
     async def close_database(app_: web.Application) -> None:
         """
         Close database connection on application shutdown.
@@ -90,8 +179,55 @@ async def init_database(app: web.Application) -> None:
     database_url = cast(str, get_config_value(app, 'DATABASE_URL'))
     database_engine = cast(str, get_config_value(app, 'DATABASE_ENGINE'))
     if database_url and database_engine:
-        db = get_db_wrapper_instance(database_engine, database_url)
+        client_options: Dict[str, Any] = {}
+        if database_url.startswith('mongodb'):
+            configured_options = {
+                'maxPoolSize': get_config_value(app, 'DATABASE_MAX_POOL_SIZE'),
+                'minPoolSize': get_config_value(app, 'DATABASE_MIN_POOL_SIZE'),
+                'maxIdleTimeMS': get_config_value(app, 'DATABASE_MAX_IDLE_TIME_MS'),
+                'serverSelectionTimeoutMS': get_config_value(
+                    app, 'DATABASE_SERVER_SELECTION_TIMEOUT_MS'
+                ),
+                'socketTimeoutMS': get_config_value(app, 'DATABASE_SOCKET_TIMEOUT_MS'),
+            }
+            # only explicitly configured options are passed, 0 of timeouts
+            # is the default of the driver: no timeout
+            client_options = {
+                option: value
+                for option, value in configured_options.items()
+                if value is not None
+                and not (option in ('maxIdleTimeMS', 'socketTimeoutMS') and not value)
+            }
+        db = get_db_wrapper_instance(database_engine, database_url, **client_options)
+        cache_ttl = cast(float, get_config_value(app, 'DATABASE_CACHE_TTL'))
+        # chats kept in memory are not worth caching
+        if cache_ttl and not isinstance(db, MemoryDatabaseWrapper):
+            db = CachedDatabaseWrapper(
+                db,
+                max_size=cast(int, get_config_value(app, 'DATABASE_CACHE_SIZE')),
+                ttl=cache_ttl,
+                negative_ttl=cast(
+                    float, get_config_value(app, 'DATABASE_CACHE_NEGATIVE_TTL')
+                ),
+            )
         set_database(app, db)
+        set_repository_name_writer(
+            app,
+            RepositoryNameWriter(
+                db,
+                flush_interval=cast(
+                    float, get_config_value(app, 'DATABASE_WRITE_BEHIND_INTERVAL')
+                ),
+                max_batch_size=cast(
+                    int, get_config_value(app, 'DATABASE_WRITE_BEHIND_BATCH_SIZE')
+                ),
+            ),
+        )
+        app.on_startup.append(connect_database)
+        app.on_startup.append(ensure_database_indexes)
+        app.on_startup.append(start_repository_name_writer)
+        # after on_shutdown hooks, so events drained by them are saved too
+        app.on_cleanup.append(stop_repository_name_writer)
         app.on_cleanup.append(close_database)
     else:
         raise ImproperlyConfiguredException()
@@ -113,6 +249,16 @@ def init_plugins(app: web.Application) -> None:
     set_plugins_instances(app, plugins_instances)
 
 
+def init_commands(app: web.Application) -> None:
+    """
+    Initialize router of Telegram commands.
+
+    :param app: application instance
+    :return: None
+    """
+    set_command_router(app, create_command_router(app))
+
+
 def init_templates(app: web.Application) -> None:
     """
     Initialize application template engine.
@@ -136,6 +282,130 @@ def init_templates(app: web.Application) -> None:
     set_template_engine(app, template_engine)
 
 
+def create_telegram_api(app: web.Application) -> TelegramAPI:
+    """
+    Create TelegramAPI instance according configuration.
+
+    :param app: application instance
+    :return: TelegramAPI instance
+    """
+    telegram_api_endpoint = cast(str, get_config_value(app, 'TELEGRAM_API_ENDPOINT'))
+    telegram_api_token = cast(str, get_config_value(app, 'TELEGRAM_API_TOKEN'))
+
+    if not telegram_api_endpoint:
+        raise WebhookBotException('TELEGRAM_API_ENDPOINT undefined')
+
+    if not telegram_api_token:
+        raise WebhookBotException('TELEGRAM_API_TOKEN undefined')
+
+    rate_limiter = TelegramRateLimiter(
+        global_rate=cast(float, get_config_value(app, 'TELEGRAM_GLOBAL_RATE_LIMIT')),
+        private_chat_rate=cast(
+            float, get_config_value(app, 'TELEGRAM_PRIVATE_CHAT_RATE_LIMIT')
+        ),
+        group_chat_rate=cast(
+            float, get_config_value(app, 'TELEGRAM_GROUP_CHAT_RATE_LIMIT')
+        ),
+        shared_state_path=cast(
+            str, get_config_value(app, 'TELEGRAM_RATE_LIMIT_STATE_PATH')
+        ),
+    )
+    return TelegramAPI(
+        telegram_api_endpoint,
+        telegram_api_token,
+        disable_notification=True,
+        rate_limiter=rate_limiter,
+        connection_limit=cast(
+            int, get_config_value(app, 'TELEGRAM_API_CONNECTION_LIMIT')
+        ),
+        keepalive_timeout=cast(
+            float, get_config_value(app, 'TELEGRAM_API_KEEPALIVE_TIMEOUT')
+        ),
+        dns_cache_ttl=cast(int, get_config_value(app, 'TELEGRAM_API_DNS_CACHE_TTL')),
+        connect_timeout=cast(
+            float, get_config_value(app, 'TELEGRAM_API_CONNECT_TIMEOUT')
+        ),
+        timeout=cast(float, get_config_value(app, 'TELEGRAM_API_TIMEOUT')),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=cast(
+                int, get_config_value(app, 'TELEGRAM_API_FAILURE_THRESHOLD')
+            ),
+            reset_timeout=cast(
+                float, get_config_value(app, 'TELEGRAM_API_RESET_TIMEOUT')
+            ),
+        ),
+    )
+
+
+def create_outbox(app: web.Application) -> Optional[Outbox]:
+    """
+    Create Outbox instance according configuration.
+
+    :param app: application instance
+    :return: Outbox instance or None if outbox is disabled
+    """
+    outbox_path = cast(str, get_config_value(app, 'OUTBOX_PATH'))
+    if not outbox_path:
+        return None
+    return Outbox(
+        outbox_path,
+        segment_size=cast(int, get_config_value(app, 'OUTBOX_SEGMENT_SIZE')),
+        fsync=cast(str, get_config_value(app, 'OUTBOX_FSYNC')),
+        fsync_interval=cast(float, get_config_value(app, 'OUTBOX_FSYNC_INTERVAL')),
+    )
+
+
+def create_webhook_registration(
+    app: web.Application, telegram_api: TelegramAPI
+) -> WebhookRegistration:
+    """
+    Create WebhookRegistration instance according configuration.
+
+    :param app: application instance
+    :param telegram_api: TelegramAPI instance
+    :return: WebhookRegistration instance
+    """
+    telegram_webhook_host = get_config_value(app, 'TELEGRAM_WEBHOOK_HOST')
+    lease_ttl = cast(float, get_config_value(app, 'TELEGRAM_WEBHOOK_LEASE_TTL'))
+    return WebhookRegistration(
+        telegram_api,
+        f'{telegram_webhook_host}{TELEGRAM_WEBHOOK_ROUTE}/'
+        f'{get_telegram_webhook_token(app)}',
+        lock_path=cast(str, get_config_value(app, 'TELEGRAM_WEBHOOK_LOCK_PATH')),
+        max_connections=cast(
+            int, get_config_value(app, 'TELEGRAM_WEBHOOK_MAX_CONNECTIONS')
+        ),
+        allowed_updates=cast(
+            List[str], get_config_value(app, 'TELEGRAM_WEBHOOK_ALLOWED_UPDATES')
+        ),
+        secret_token=get_telegram_webhook_secret(app),
+        db=get_coordination_wrapper(app) if lease_ttl else None,
+        lease_ttl=lease_ttl,
+    )
+
+
+def create_update_deduplicator(app: web.Application) -> UpdateDeduplicator:
+    """
+    Create UpdateDeduplicator instance.
+
+    :param app: application instance
+    :return: UpdateDeduplicator instance
+    """
+    is_shared = get_config_value(app, 'TELEGRAM_UPDATE_DEDUPLICATION_STORE') == (
+        UPDATE_DEDUPLICATION_STORE_DATABASE
+    )
+    db = get_coordination_wrapper(app) if is_shared else None
+    if is_shared and db is None:
+        logger.warning('Database does not share updates, they are kept by worker')
+    return UpdateDeduplicator(
+        ttl=cast(float, get_config_value(app, 'TELEGRAM_UPDATE_DEDUPLICATION_TTL')),
+        max_size=cast(
+            int, get_config_value(app, 'TELEGRAM_UPDATE_DEDUPLICATION_CACHE_SIZE')
+        ),
+        db=db,
+    )
+
+
 def init_telegram(app: web.Application) -> None:
     """
     Initialize Telegram package.
@@ -143,37 +413,110 @@ def init_telegram(app: web.Application) -> None:
     :param app: application instance
     :return: None
     """
+    is_polling = get_config_value(app, 'TELEGRAM_INGRESS_MODE') == (
+        TELEGRAM_INGRESS_MODE_POLLING
+    )
+    set_update_deduplicator(app, create_update_deduplicator(app))
 
     async def on_startup_telegram_handler(app_: web.Application) -> None:
-        telegram_api_endpoint = cast(
-            str, get_config_value(app_, 'TELEGRAM_API_ENDPOINT')
-        )
-        telegram_api_token = cast(str, get_config_value(app_, 'TELEGRAM_API_TOKEN'))
-
-        if not telegram_api_endpoint:
-            raise WebhookBotException('TELEGRAM_API_ENDPOINT undefined')
-
-        if not telegram_api_token:
-            raise WebhookBotException('TELEGRAM_API_TOKEN undefined')
+        telegram_api = create_telegram_api(app_)
+        telegram_api.start()
+        set_telegram_api(app_, telegram_api)
 
-        telegram_api = TelegramAPI(
-            telegram_api_endpoint,
-            telegram_api_token,
-            disable_notification=True,
+        message_queue = MessageQueue(
+            telegram_api,
+            max_size=cast(int, get_config_value(app_, 'TELEGRAM_SEND_QUEUE_SIZE')),
+            workers=cast(int, get_config_value(app_, 'TELEGRAM_SEND_WORKERS')),
+            max_retries=cast(int, get_config_value(app_, 'TELEGRAM_SEND_MAX_RETRIES')),
+            outbox=create_outbox(app_),
         )
+        message_queue.start()
+        set_message_queue(app_, message_queue)
 
-        telegram_webhook_host = get_config_value(app_, 'TELEGRAM_WEBHOOK_HOST')
-        telegram_webhook_url = f'{telegram_webhook_host}{TELEGRAM_WEBHOOK_ROUTE}'
-        await telegram_api.set_webhook(telegram_webhook_url)
-        set_telegram_api(app_, telegram_api)
+        message_coalescer = MessageCoalescer(
+            message_queue,
+            window=cast(float, get_config_value(app_, 'TELEGRAM_COALESCE_WINDOW')),
+        )
+        set_message_coalescer(app_, message_coalescer)
+
+        message_editor = MessageEditor(
+            message_queue,
+            ttl=cast(float, get_config_value(app_, 'TELEGRAM_EDIT_MESSAGE_TTL')),
+            max_size=cast(
+                int, get_config_value(app_, 'TELEGRAM_EDIT_MESSAGE_CACHE_SIZE')
+            ),
+        )
+        set_message_editor(app_, message_editor)
+
+        if is_polling:
+            telegram_poller = TelegramPoller(
+                functools.partial(process_update, app_),
+                telegram_api,
+                message_queue,
+                offset_path=cast(
+                    str, get_config_value(app_, 'TELEGRAM_POLLING_OFFSET_PATH')
+                ),
+                limit=cast(int, get_config_value(app_, 'TELEGRAM_POLLING_LIMIT')),
+                timeout=cast(int, get_config_value(app_, 'TELEGRAM_POLLING_TIMEOUT')),
+            )
+            telegram_poller.start()
+            set_telegram_poller(app_, telegram_poller)
+        else:
+            webhook_registration = create_webhook_registration(app_, telegram_api)
+            await webhook_registration.register()
+            set_webhook_registration(app_, webhook_registration)
 
     async def on_shutdown_telegram_handler(app_: web.Application) -> None:
+        if is_polling:
+            telegram_poller = get_telegram_poller(app_)
+            await telegram_poller.stop()
+        message_editor = get_message_editor(app_)
+        await message_editor.stop()
+        message_coalescer = get_message_coalescer(app_)
+        await message_coalescer.stop()
+        message_queue = get_message_queue(app_)
+        await message_queue.stop()
+        if not is_polling:
+            webhook_registration = get_webhook_registration(app_)
+            await webhook_registration.unregister()
+
+    async def on_cleanup_telegram_handler(app_: web.Application) -> None:
         telegram_api = get_telegram_api(app_)
-        await telegram_api.delete_webhook()
+        await telegram_api.close()
 
     app.on_startup.append(on_startup_telegram_handler)
     app.on_shutdown.append(on_shutdown_telegram_handler)
-    init_telegram_routes(app)
+    app.on_cleanup.append(on_cleanup_telegram_handler)
+    if not is_polling:
+        init_telegram_routes(app)
+
+
+def init_broadcast(app: web.Application) -> None:
+    """
+    Initialize broadcast module.
+
+    :param app: application instance
+    :return: None
+    """
+
+    async def on_startup_broadcast_handler(app_: web.Application) -> None:
+        broadcaster = Broadcaster(
+            get_database(app_),
+            get_message_queue(app_),
+            checkpoint_path=cast(
+                str, get_config_value(app_, 'BROADCAST_CHECKPOINT_PATH')
+            ),
+            concurrency=cast(int, get_config_value(app_, 'BROADCAST_CONCURRENCY')),
+        )
+        set_broadcaster(app_, broadcaster)
+
+    async def on_shutdown_broadcast_handler(app_: web.Application) -> None:
+        broadcaster = get_broadcaster(app_)
+        await broadcaster.stop()
+
+    app.on_startup.append(on_startup_broadcast_handler)
+    app.on_shutdown.append(on_shutdown_broadcast_handler)
+    init_broadcast_routes(app)
 
 
 def init_routes(app: web.Application) -> None:
@@ -184,6 +527,7 @@ def init_routes(app: web.Application) -> None:
     :return:
     """
     app.router.add_route("GET", "/api/v1/health", health_handler, name="health")
+    app.router.add_route("GET", "/api/v1/metrics", metrics_handler, name="metrics")
 
 
 async def create_app(config: Optional[Dict[str, str]] = None) -> web.Application:
@@ -198,8 +542,10 @@ async def create_app(config: Optional[Dict[str, str]] = None) -> web.Application
     init_logging(app)
     await init_database(app)
     init_plugins(app)
+    init_commands(app)
     init_templates(app)
     init_telegram(app)
+    init_broadcast(app)
     init_routes(app)
     return app
 
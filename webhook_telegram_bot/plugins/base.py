@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional
 from aiohttp import web
 from jinja2 import PackageLoader
 
+from webhook_telegram_bot.telegram.router import CommandRouter
+
 
 class AbstractPlugin(ABC):
     """Abstract class for plugin subclassing."""
@@ -50,6 +52,26 @@ class AbstractPlugin(ABC):
         """
         pass
 
+    def register_commands(self, router: CommandRouter) -> None:
+        """
+        Register commands of the plugin.
+
+        By default the plugin is asked about every command without route,
+        override to register commands directly.
+
+        :param router: CommandRouter instance
+        :return: None
+        """
+
+        async def handler(
+            app: web.Application, chat_id: int, command: str
+        ) -> Optional[web.Response]:
+            if self.is_known_command(command):
+                return await self.handle_telegram_command(app, chat_id, command)
+            return None
+
+        router.add_fallback(handler)
+
     @abstractmethod
     def get_menu_button(self) -> List[Dict[str, Any]]:
         """
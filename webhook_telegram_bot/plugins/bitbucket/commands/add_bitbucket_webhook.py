@@ -5,8 +5,7 @@ from aiohttp import web
 from jinja2 import Environment
 
 from webhook_telegram_bot.database.backends.types import DatabaseWrapperImpl
-from webhook_telegram_bot.database.exceptions import ChatNotFound
-from webhook_telegram_bot.database.models import Chat, Webhook
+from webhook_telegram_bot.database.models import Webhook
 from webhook_telegram_bot.helpers import get_config_value
 from webhook_telegram_bot.plugins.bitbucket.constants import (
     BITBUCKET_SERVICE_NAME,
@@ -38,13 +37,7 @@ async def add_bitbucket_webhook_command_handler(
     webhook_id: str = uuid.uuid4().hex
     webhook: Webhook = Webhook(webhook_id=webhook_id, service=BITBUCKET_SERVICE_NAME)
 
-    try:
-        chat = await db.get_chat_by_chat_id(chat_id)
-        chat.webhooks.append(webhook)
-        await db.save_chat(chat)
-    except ChatNotFound:
-        chat = Chat(chat_id=chat_id, webhooks=[webhook])
-        await db.save_chat(chat)
+    await db.add_webhook(chat_id, webhook)
 
     template = template_engine.get_template(BITBUCKET_TEMPLATE_START)
     text = template.render(
@@ -2,6 +2,11 @@
 
 BITBUCKET_WEBHOOK_ROUTE = '/api/v1/bitbucket'
 
+BITBUCKET_WEBHOOK_MODE_PROCESS = 'process'
+BITBUCKET_WEBHOOK_MODE_ACCEPT = 'accept'
+# Retry-After of the event rejected because the queue is full
+BITBUCKET_RETRY_AFTER = '5'
+
 BITBUCKET_SERVICE_NAME = 'bitbucket'
 
 BITBUCKET_TEMPLATE_START = 'bitbucket/start.html'
@@ -0,0 +1,183 @@
+"""This file contains background queue of Bitbucket events."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from webhook_telegram_bot.telegram.metrics import LatencyStats
+from webhook_telegram_bot.telegram.outbox import Outbox, OutboxEntryId
+
+logger = logging.getLogger(__name__)
+
+# webhook_id, event_key, raw payload
+BitbucketEvent = Tuple[str, str, bytes]
+EventProcessor = Callable[[str, str, bytes], Awaitable[None]]
+# enqueued at, event, entry of the outbox
+QueuedEvent = Tuple[float, BitbucketEvent, Optional[OutboxEntryId]]
+
+
+class BitbucketEventQueue:
+    """This class processes accepted Bitbucket events from a pool of background tasks."""
+
+    def __init__(
+        self,
+        processor: EventProcessor,
+        max_size: int = 1000,
+        workers: int = 4,
+        outbox: Optional[Outbox] = None,
+    ) -> None:
+        """
+        Construct BitbucketEventQueue class.
+
+        With outbox accepted events are persisted before they are queued
+        and acknowledged after processing, events left by a stopped worker
+        are processed on start.
+
+        :param processor: coroutine function that renders and sends the event
+        :param max_size: maximum number of queued events
+        :param workers: number of consumer tasks
+        :param outbox: Outbox instance or None to keep events in memory only
+        :return: None
+        """
+        self.processor = processor
+        self.max_size = max_size
+        self.workers = workers
+        self.outbox = outbox
+        self.queue: Optional[asyncio.Queue[QueuedEvent]] = None
+        self.tasks: List[asyncio.Task[None]] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.queue_latency = LatencyStats()
+
+    def start(self) -> None:
+        """
+        Start consumer tasks.
+
+        :return: None
+        """
+        self.queue = asyncio.Queue(self.max_size)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        if self.outbox is not None:
+            events: List[Tuple[BitbucketEvent, OutboxEntryId]] = [
+                (
+                    (payload['webhook_id'], event_key, payload['payload'].encode()),
+                    entry_id,
+                )
+                for entry_id, event_key, payload in self.outbox.open()
+            ]
+            if events:
+                self.tasks.append(asyncio.create_task(self.replay(events)))
+
+    async def replay(self, events: List[Tuple[BitbucketEvent, OutboxEntryId]]) -> None:
+        """
+        Enqueue events recovered from the outbox, waiting for free space.
+
+        :param events: list of events with their outbox entries
+        :return: None
+        """
+        assert self.queue is not None  # nosec
+        for event, entry_id in events:
+            await self.queue.put((time.monotonic(), event, entry_id))
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Wait for queued events to be processed and stop consumer tasks.
+
+        Events left in the outbox are processed by the next start.
+
+        :param timeout: seconds to wait for the queue to drain
+        :return: None
+        """
+        if self.queue is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.error(
+                    f'{self.queue.qsize()} events were not processed before shutdown'
+                )
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def put(self, webhook_id: str, event_key: str, payload: bytes) -> bool:
+        """
+        Persist and enqueue event without waiting.
+
+        :param webhook_id: webhook identification string
+        :param event_key: value of X-Event-Key header
+        :param payload: raw body of the request
+        :return: False if the queue is full or the event failed to persist
+        """
+        if self.queue is None:
+            raise RuntimeError('BitbucketEventQueue is not started')
+        if self.queue.full():
+            self.rejected += 1
+            return False
+        entry_id: Optional[OutboxEntryId] = None
+        if self.outbox is not None:
+            try:
+                entry_id = self.outbox.append(
+                    event_key,
+                    {
+                        'webhook_id': webhook_id,
+                        'payload': payload.decode(errors='replace'),
+                    },
+                )
+            except OSError as e:
+                logger.error(
+                    f'Failed to persist {event_key} of webhook {webhook_id}: {e}'
+                )
+                self.rejected += 1
+                return False
+        self.queue.put_nowait(
+            (time.monotonic(), (webhook_id, event_key, payload), entry_id)
+        )
+        self.accepted += 1
+        return True
+
+    async def worker(self) -> None:
+        """
+        Process queued events until cancelled.
+
+        :return: None
+        """
+        assert self.queue is not None  # nosec
+        while True:
+            enqueued_at, event, entry_id = await self.queue.get()
+            self.queue_latency.observe(time.monotonic() - enqueued_at)
+            try:
+                try:
+                    await self.processor(*event)
+                    self.processed += 1
+                except Exception:
+                    self.failed += 1
+                    logger.exception(
+                        f'Failed to process {event[1]} of webhook {event[0]}'
+                    )
+                # a cancelled event stays in the outbox for the next start
+                if self.outbox is not None and entry_id is not None:
+                    self.outbox.acknowledge(entry_id)
+            finally:
+                self.queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return queue statistics.
+
+        :return: dict of queue statistics
+        """
+        return {
+            'size': self.queue.qsize() if self.queue is not None else 0,
+            'max_size': self.max_size,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'processed': self.processed,
+            'failed': self.failed,
+            'queue_latency': self.queue_latency.as_dict(),
+            'outbox': self.outbox.get_stats() if self.outbox is not None else None,
+        }
@@ -1,19 +1,22 @@
 """This file contains Bitbucket request handlers."""
-import json
 import logging
-from typing import Optional, cast
+from typing import Any, Dict, Optional, Union, cast
 
 from aiohttp import web
 from aiohttp.web_request import Request
 
 from webhook_telegram_bot.database.exceptions import ChatNotFound
-from webhook_telegram_bot.database.models import Chat, Webhook
 from webhook_telegram_bot.helpers import (
     get_database,
-    get_telegram_api,
+    get_message_coalescer,
+    get_message_editor,
+    get_repository_name_writer,
     get_template_engine,
 )
+from webhook_telegram_bot.plugins.bitbucket.constants import BITBUCKET_RETRY_AFTER
+from webhook_telegram_bot.plugins.bitbucket.helpers import get_bitbucket_event_queue
 from webhook_telegram_bot.plugins.bitbucket.services import BitbucketEventProcessor
+from webhook_telegram_bot.serializers import dumps, loads
 from webhook_telegram_bot.utils import deep_get
 
 logger = logging.getLogger(__name__)
@@ -23,6 +26,9 @@ async def bitbucket_webhook_handler(request: Request) -> web.Response:
     """
     Process webhook request.
 
+    In accept mode the webhook is resolved, the event is persisted and queued,
+    and it is processed after the response.
+
     :param request: request from Telegram API
     :return: response from bot
     """
@@ -30,40 +36,86 @@ async def bitbucket_webhook_handler(request: Request) -> web.Response:
     event_key: Optional[str] = request.headers.get('X-Event-Key')
     if webhook_id and event_key:
         app = request.app
-        telegram_api = get_telegram_api(app)
-        db = get_database(app)
-        template_engine = get_template_engine(app)
-
-        data = await request.json()
-        logger.debug(f'{event_key}: {json.dumps(data)}')
-
-        event_processor: BitbucketEventProcessor = BitbucketEventProcessor(
-            event_key, data
-        )
-        template_name, context = event_processor.get_template_name_with_context()
-
-        template = template_engine.get_template(template_name)
-        text = template.render(**context)
-
-        try:
-            chat: Chat = await db.get_chat_by_webhook_id(webhook_id)
-            webhook: Optional[Webhook] = chat.get_webhook_by_id(webhook_id)
-            if webhook and not webhook.repository_name:
-                # TODO rewrite
-                repository_name = cast(
-                    str, deep_get(data, 'repository.repository_name')
+        event_queue = get_bitbucket_event_queue(app)
+        if event_queue is not None:
+            try:
+                await get_database(app).resolve_webhook(webhook_id)
+            except ChatNotFound:
+                logger.error(f'Failed to find chat by webhook_id={webhook_id}')
+                return web.Response(status=404)
+            payload = await request.read()
+            if not event_queue.put(webhook_id, event_key, payload):
+                logger.error(f'Bitbucket event {event_key} is rejected')
+                return web.Response(
+                    status=503, headers={'Retry-After': BITBUCKET_RETRY_AFTER}
                 )
-                chat.set_webhook_repository_name(webhook.webhook_id, repository_name)
-                await db.save_chat(chat)
-
-            await telegram_api.send_message(
-                chat_id=chat.chat_id,
-                text=text,
-                parse_mode='HTML',
-                disable_web_page_preview=True,
-                disable_notification=True,
-            )
-        except ChatNotFound:
-            logger.error(f'Failed to find chat by webhook_id={webhook_id}')
+            return web.Response(status=202)
+
+        data = await request.json(loads=loads)
+        await process_bitbucket_event(app, webhook_id, event_key, data)
 
     return web.Response()
+
+
+async def process_bitbucket_payload(
+    app: web.Application, webhook_id: str, event_key: str, payload: bytes
+) -> None:
+    """
+    Process raw body of accepted webhook request.
+
+    :param app: application instance
+    :param webhook_id: webhook identification string
+    :param event_key: value of X-Event-Key header
+    :param payload: raw body of the request
+    :return: None
+    """
+    await process_bitbucket_event(app, webhook_id, event_key, loads(payload))
+
+
+async def process_bitbucket_event(
+    app: web.Application, webhook_id: str, event_key: str, data: Dict[str, Any]
+) -> None:
+    """
+    Render Bitbucket event and send it to the chat of the webhook.
+
+    :param app: application instance
+    :param webhook_id: webhook identification string
+    :param event_key: value of X-Event-Key header
+    :param data: Bitbucket event
+    :return: None
+    """
+    message_coalescer = get_message_coalescer(app)
+    db = get_database(app)
+    template_engine = get_template_engine(app)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'{event_key}: {dumps(data)}')
+
+    event_processor: BitbucketEventProcessor = BitbucketEventProcessor(event_key, data)
+    template_name, context = event_processor.get_template_name_with_context()
+
+    template = template_engine.get_template(template_name)
+    text = template.render(**context)
+
+    try:
+        chat_id, webhook = await db.resolve_webhook(webhook_id)
+        repository_name = cast(str, deep_get(data, 'repository.repository_name'))
+        if repository_name and not webhook.repository_name:
+            get_repository_name_writer(app).set(chat_id, webhook_id, repository_name)
+
+        message: Dict[str, Union[str, int, bool]] = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': True,
+            'disable_notification': True,
+        }
+        pipeline_key = event_processor.get_pipeline_key()
+        if pipeline_key:
+            await get_message_editor(app).send_message(
+                (webhook_id, *pipeline_key), **message
+            )
+        else:
+            await message_coalescer.send_message(**message)
+    except ChatNotFound:
+        logger.error(f'Failed to find chat by webhook_id={webhook_id}')
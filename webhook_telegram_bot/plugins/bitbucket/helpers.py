@@ -0,0 +1,31 @@
+"""This file contains Bitbucket module helpers."""
+from typing import Optional, cast
+
+from aiohttp import web
+
+from webhook_telegram_bot.plugins.bitbucket.event_queue import BitbucketEventQueue
+
+BITBUCKET_EVENT_QUEUE_KEY = 'BITBUCKET_EVENT_QUEUE'
+
+
+def set_bitbucket_event_queue(
+    app: web.Application, event_queue: BitbucketEventQueue
+) -> None:
+    """
+    Set BitbucketEventQueue instance into application.
+
+    :param app: application instance
+    :param event_queue: BitbucketEventQueue instance
+    :return: None
+    """
+    app[BITBUCKET_EVENT_QUEUE_KEY] = event_queue
+
+
+def get_bitbucket_event_queue(app: web.Application) -> Optional[BitbucketEventQueue]:
+    """
+    Return BitbucketEventQueue instance from application.
+
+    :param app: application instance
+    :return: BitbucketEventQueue instance or None if events are processed in request
+    """
+    return cast(Optional[BitbucketEventQueue], app.get(BITBUCKET_EVENT_QUEUE_KEY))
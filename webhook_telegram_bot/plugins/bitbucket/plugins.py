@@ -1,10 +1,12 @@
 """This file contains implementation of AbstractPlugin."""
-from typing import Any, Dict, List, Optional
+import functools
+from typing import Any, Dict, List, Optional, cast
 
 from aiohttp import web
 from jinja2 import PackageLoader
 
 from webhook_telegram_bot.helpers import (
+    get_config_value,
     get_database,
     get_telegram_api,
     get_template_engine,
@@ -14,7 +16,15 @@ from webhook_telegram_bot.plugins.bitbucket.commands import BitbucketCommand
 from webhook_telegram_bot.plugins.bitbucket.commands.add_bitbucket_webhook import (
     add_bitbucket_webhook_command_handler,
 )
+from webhook_telegram_bot.plugins.bitbucket.constants import (
+    BITBUCKET_WEBHOOK_MODE_ACCEPT,
+)
+from webhook_telegram_bot.plugins.bitbucket.event_queue import BitbucketEventQueue
+from webhook_telegram_bot.plugins.bitbucket.handlers import process_bitbucket_payload
+from webhook_telegram_bot.plugins.bitbucket.helpers import set_bitbucket_event_queue
 from webhook_telegram_bot.plugins.bitbucket.routes import init_bitbucket_routes
+from webhook_telegram_bot.telegram.outbox import Outbox
+from webhook_telegram_bot.telegram.router import CommandRouter
 
 
 class Plugin(AbstractPlugin):
@@ -27,8 +37,47 @@ class Plugin(AbstractPlugin):
         :param app: application instance
         """
         init_bitbucket_routes(app)
+        if get_config_value(app, 'BITBUCKET_WEBHOOK_MODE') == (
+            BITBUCKET_WEBHOOK_MODE_ACCEPT
+        ):
+            self.init_event_queue(app)
         super().__init__(app)
 
+    def init_event_queue(self, app: web.Application) -> None:
+        """
+        Initialize queue of events accepted before they are processed.
+
+        :param app: application instance
+        :return: None
+        """
+        outbox_path = cast(str, get_config_value(app, 'BITBUCKET_EVENT_OUTBOX_PATH'))
+        outbox: Optional[Outbox] = None
+        if outbox_path:
+            outbox = Outbox(
+                outbox_path,
+                segment_size=cast(int, get_config_value(app, 'OUTBOX_SEGMENT_SIZE')),
+                fsync=cast(str, get_config_value(app, 'OUTBOX_FSYNC')),
+                fsync_interval=cast(
+                    float, get_config_value(app, 'OUTBOX_FSYNC_INTERVAL')
+                ),
+            )
+        event_queue = BitbucketEventQueue(
+            functools.partial(process_bitbucket_payload, app),
+            max_size=cast(int, get_config_value(app, 'BITBUCKET_EVENT_QUEUE_SIZE')),
+            workers=cast(int, get_config_value(app, 'BITBUCKET_EVENT_WORKERS')),
+            outbox=outbox,
+        )
+        set_bitbucket_event_queue(app, event_queue)
+
+        async def on_startup_event_queue_handler(app_: web.Application) -> None:
+            event_queue.start()
+
+        async def on_shutdown_event_queue_handler(app_: web.Application) -> None:
+            await event_queue.stop()
+
+        app.on_startup.append(on_startup_event_queue_handler)
+        app.on_shutdown.append(on_shutdown_event_queue_handler)
+
     def get_package_loader(self) -> Dict[str, PackageLoader]:
         """
         Return loader bounded to prefix.
@@ -49,6 +98,16 @@ class Plugin(AbstractPlugin):
                 return True
         return False
 
+    def register_commands(self, router: CommandRouter) -> None:
+        """
+        Register commands of the plugin.
+
+        :param router: CommandRouter instance
+        :return: None
+        """
+        for command_item in BitbucketCommand:
+            router.add_command(command_item.value, self.handle_telegram_command)
+
     async def handle_telegram_command(
         self, app: web.Application, chat_id: int, command: str
     ) -> Optional[web.Response]:
@@ -163,6 +163,21 @@ class RepositoryEventProcessor(EventProcessor):
         """
         return cast(str, deep_get(self.json_data, 'commit_status.url'))
 
+    @property
+    def pipeline_key(self) -> Optional[Tuple[str, str]]:
+        """
+        Return key of pipeline, the same for all states of one pipeline run.
+
+        :return: tuple of commit hash and commit status key or None
+        """
+        if self.action not in ('commit_status_created', 'commit_status_updated'):
+            return None
+        commit_hash = deep_get(self.json_data, 'commit_status.commit.hash')
+        key = deep_get(self.json_data, 'commit_status.key')
+        if not commit_hash or not key:
+            return None
+        return commit_hash, key
+
     @property
     def number_of_commits(self) -> Tuple[int, bool]:
         """
@@ -393,3 +408,14 @@ class BitbucketEventProcessor:
         """
         event_processor = self.get_event_processor()
         return event_processor.get_template_name_with_context()
+
+    def get_pipeline_key(self) -> Optional[Tuple[str, str]]:
+        """
+        Return key of pipeline if event is a pipeline state change.
+
+        :return: tuple of commit hash and commit status key or None
+        """
+        event_processor = self.get_event_processor()
+        if isinstance(event_processor, RepositoryEventProcessor):
+            return event_processor.pipeline_key
+        return None
@@ -0,0 +1,39 @@
+"""This file contains JSON serializer used for all request and response bodies."""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize object to the same compact JSON string with orjson or json.
+
+    Uses orjson when it is installed and falls back to the standard library.
+    Non-str dict keys are converted to strings by both. Unlike json, orjson
+    encodes NaN and Infinity as null and raises TypeError for integers
+    beyond 64 bits.
+
+    :param obj: JSON serializable object
+    :return: JSON string
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Deserialize JSON string to object.
+
+    Unlike json, orjson rejects NaN and Infinity literals and invalid UTF-8.
+
+    :param data: JSON string
+    :return: deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
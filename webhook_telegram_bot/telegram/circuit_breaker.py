@@ -0,0 +1,91 @@
+"""This file contains CircuitBreaker class."""
+import logging
+import time
+from typing import Any, Dict
+
+from webhook_telegram_bot.telegram.exceptions import TelegramCircuitOpenException
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """This class stops requests to Telegram API while it is failing."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        """
+        Construct CircuitBreaker class.
+
+        :param failure_threshold: consecutive failures to open the circuit, 0 disables
+        :param reset_timeout: seconds before a trial request is let through
+        :return: None
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    def check(self) -> None:
+        """
+        Fail fast while the circuit is open.
+
+        After the cooldown one trial request is let through, others are rejected
+        until it succeeds or another cooldown passes.
+
+        :return: None
+        :raises TelegramCircuitOpenException: if request is not allowed
+        """
+        if self.state == CIRCUIT_CLOSED:
+            return
+        now = time.monotonic()
+        remaining = self.opened_at + self.reset_timeout - now
+        if remaining > 0:
+            self.rejected += 1
+            raise TelegramCircuitOpenException(remaining)
+        self.state = CIRCUIT_HALF_OPEN
+        self.opened_at = now
+
+    def record_success(self) -> None:
+        """
+        Close the circuit.
+
+        :return: None
+        """
+        if self.state != CIRCUIT_CLOSED:
+            logger.warning('Telegram API is available, circuit is closed')
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """
+        Count failure, opening the circuit when threshold is reached.
+
+        :return: None
+        """
+        self.failures += 1
+        if not self.failure_threshold:
+            return
+        if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == CIRCUIT_CLOSED:
+                logger.error(
+                    f'Telegram API failed {self.failures} times, circuit is open'
+                )
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return circuit breaker statistics.
+
+        :return: dict of circuit breaker statistics
+        """
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,183 @@
+"""This file contains per-chat coalescing of outbound Telegram messages."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+from webhook_telegram_bot.telegram.outbox import OutboxEntryId
+
+logger = logging.getLogger(__name__)
+
+# https://core.telegram.org/bots/api#sendmessage
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+MESSAGE_SEPARATOR = '\n\n'
+
+CoalescingKey = Tuple[Any, ...]
+
+
+class PendingMessage:
+    """This class represents text messages collected for one chat."""
+
+    def __init__(self, options: Dict[str, Union[str, int, bool]]) -> None:
+        """
+        Construct PendingMessage class.
+
+        :param options: sendMessage parameters except text
+        :return: None
+        """
+        self.options = options
+        self.texts: List[str] = []
+        self.length = 0
+        self.outbox_ids: List[OutboxEntryId] = []
+
+    def fits(self, text: str, max_length: int) -> bool:
+        """
+        Return True if text may be appended without exceeding the limit.
+
+        :param text: message text
+        :param max_length: maximum length of merged message
+        :return: True if text fits
+        """
+        separator_length = len(MESSAGE_SEPARATOR) if self.texts else 0
+        return self.length + separator_length + len(text) <= max_length
+
+    def append(self, text: str) -> None:
+        """
+        Append text to the message.
+
+        :param text: message text
+        :return: None
+        """
+        if self.texts:
+            self.length += len(MESSAGE_SEPARATOR)
+        self.texts.append(text)
+        self.length += len(text)
+
+    def get_payload(self) -> Dict[str, Union[str, int, bool]]:
+        """
+        Return sendMessage payload.
+
+        :return: payload of sendMessage command
+        """
+        return {**self.options, 'text': MESSAGE_SEPARATOR.join(self.texts)}
+
+
+class MessageCoalescer:
+    """This class merges messages sent to the same chat within a time window."""
+
+    def __init__(
+        self,
+        message_queue: MessageQueue,
+        window: float = 0,
+        max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH,
+    ) -> None:
+        """
+        Construct MessageCoalescer class.
+
+        :param message_queue: MessageQueue instance
+        :param window: seconds to collect messages of a chat, 0 disables coalescing
+        :param max_length: maximum length of merged message
+        :return: None
+        """
+        self.message_queue = message_queue
+        self.window = window
+        self.max_length = max_length
+        self.pending: Dict[CoalescingKey, PendingMessage] = {}
+        self.timers: Dict[CoalescingKey, asyncio.Task[None]] = {}
+        self.received = 0
+        self.sent = 0
+
+    async def send_message(self, **kwargs: Union[str, int, bool]) -> None:
+        """
+        Enqueue text message, merging it with other messages of the chat.
+
+        :param kwargs:
+            chat_id
+            text
+        :return: None
+        """
+        self.received += 1
+        text = kwargs.pop('text', None)
+        if self.window <= 0 or not isinstance(text, str):
+            if text is not None:
+                kwargs['text'] = text
+            await self.enqueue(kwargs)
+            return
+
+        # every message is persisted, they are sent separately if worker stops
+        outbox_ids = self.message_queue.persist('sendMessage', {**kwargs, 'text': text})
+
+        key = tuple(sorted(kwargs.items()))
+        pending = self.pending.get(key)
+        while pending is not None and not pending.fits(text, self.max_length):
+            await self.flush(key)
+            # other message of the chat could be pending while flush waited
+            pending = self.pending.get(key)
+        if pending is None:
+            pending = PendingMessage(kwargs)
+            self.pending[key] = pending
+            self.timers[key] = asyncio.create_task(self.flush_later(key))
+        pending.append(text)
+        pending.outbox_ids.extend(outbox_ids)
+
+    async def enqueue(
+        self,
+        payload: Dict[str, Union[str, int, bool]],
+        outbox_ids: Optional[List[OutboxEntryId]] = None,
+    ) -> None:
+        """
+        Put sendMessage command into the queue.
+
+        :param payload: payload of sendMessage command
+        :param outbox_ids: outbox entries of merged messages
+        :return: None
+        """
+        self.sent += 1
+        await self.message_queue.put('sendMessage', payload, outbox_ids)
+
+    async def flush_later(self, key: CoalescingKey) -> None:
+        """
+        Flush pending message when the window is over.
+
+        :param key: coalescing key
+        :return: None
+        """
+        await asyncio.sleep(self.window)
+        self.timers.pop(key, None)
+        await self.flush(key)
+
+    async def flush(self, key: CoalescingKey) -> None:
+        """
+        Send pending message.
+
+        :param key: coalescing key
+        :return: None
+        """
+        timer = self.timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        pending = self.pending.pop(key, None)
+        if pending is not None:
+            await self.enqueue(pending.get_payload(), pending.outbox_ids)
+
+    async def stop(self) -> None:
+        """
+        Send all pending messages.
+
+        :return: None
+        """
+        for key in list(self.pending):
+            await self.flush(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return coalescer statistics.
+
+        :return: dict of coalescer statistics
+        """
+        return {
+            'window': self.window,
+            'pending_chats': len(self.pending),
+            'received': self.received,
+            'sent': self.sent,
+        }
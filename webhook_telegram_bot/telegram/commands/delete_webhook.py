@@ -31,9 +31,7 @@ async def delete_webhook_command_handler(
     :return: bot response
     """
     try:
-        chat: Chat = await db.get_chat_by_chat_id(chat_id)
-        chat.delete_webhook_by_id(webhook_id)
-        await db.save_chat(chat)
+        chat: Chat = await db.remove_webhook(chat_id, webhook_id)
 
         template = template_engine.get_template(TELEGRAM_TEMPLATE_WEBHOOK_DELETED)
         text = template.render()
@@ -1,9 +1,15 @@
 """This file contains telegram module constants."""
 
-import uuid
+TELEGRAM_WEBHOOK_ROUTE = '/api/v1/telegram'
+TELEGRAM_WEBHOOK_ROUTE_NAME = 'telegram-webhook'
+# https://core.telegram.org/bots/api#setwebhook
+TELEGRAM_SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
 
-TELEGRAM_WEBHOOK_TOKEN = uuid.uuid4().hex
-TELEGRAM_WEBHOOK_ROUTE = f'/api/v1/telegram/{TELEGRAM_WEBHOOK_TOKEN}'
+TELEGRAM_INGRESS_MODE_WEBHOOK = 'webhook'
+TELEGRAM_INGRESS_MODE_POLLING = 'polling'
+
+UPDATE_DEDUPLICATION_STORE_MEMORY = 'memory'
+UPDATE_DEDUPLICATION_STORE_DATABASE = 'database'
 
 TELEGRAM_TEMPLATE_START = 'telegram/start.html'
 TELEGRAM_TEMPLATE_SELECT_SERVICE = 'telegram/select_service.html'
@@ -0,0 +1,81 @@
+"""This file contains deduplication of Telegram updates."""
+import logging
+from typing import Any, Dict, Optional
+
+from webhook_telegram_bot.cache import TTLCache
+from webhook_telegram_bot.database.backends.base import BaseCoordinationWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """This class detects updates redelivered by Telegram."""
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        max_size: int = 10000,
+        db: Optional[BaseCoordinationWrapper] = None,
+    ) -> None:
+        """
+        Construct UpdateDeduplicator class.
+
+        Recently seen update ids are kept per worker. With db they are also
+        shared, so a redelivery to another worker is detected too.
+
+        :param ttl: seconds to remember the update
+        :param max_size: maximum number of remembered updates per worker
+        :param db: BaseCoordinationWrapper implementation instance to share update ids
+        :return: None
+        """
+        self.ttl = ttl
+        self.db = db
+        self.seen: TTLCache[int, bool] = TTLCache(max_size=max_size, ttl=ttl)
+        self.duplicates = 0
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """
+        Remember update and return True if it was already seen.
+
+        :param update_id: Telegram update identification number
+        :return: True if the update is a redelivery
+        """
+        if self.seen.get(update_id):
+            self.duplicates += 1
+            return True
+        # marked before awaiting the store, so concurrent redelivery is detected
+        self.seen.set(update_id, True)
+        if self.db is None:
+            return False
+        try:
+            is_new = await self.db.mark_update_seen(update_id, self.ttl)
+        except Exception as e:
+            # processing twice is better than dropping the update
+            logger.error(f'Failed to mark update {update_id} as seen: {e}')
+            return False
+        if not is_new:
+            self.duplicates += 1
+        return not is_new
+
+    async def forget(self, update_id: int) -> None:
+        """
+        Forget update whose processing failed, so its redelivery is processed.
+
+        :param update_id: Telegram update identification number
+        :return: None
+        """
+        self.seen.pop(update_id)
+        if self.db is None:
+            return
+        try:
+            await self.db.forget_update(update_id)
+        except Exception as e:
+            logger.error(f'Failed to forget update {update_id}: {e}')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return deduplication statistics.
+
+        :return: dict of deduplication statistics
+        """
+        return {**self.seen.get_stats(), 'duplicates': self.duplicates}
@@ -0,0 +1,58 @@
+"""This file contains Telegram exception classes."""
+from typing import Optional
+
+from webhook_telegram_bot.exceptions import WebhookBotException
+
+
+class TelegramAPIException(WebhookBotException):
+    """This class represents an exception for the situation when Telegram API returns an error."""
+
+    def __init__(
+        self,
+        error_code: Optional[int],
+        description: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Construct TelegramAPIException class.
+
+        :param error_code: error code returned by Telegram API
+        :param description: human-readable description of the error
+        :param retry_after: seconds to wait before the request can be repeated
+        :return: None
+        """
+        super().__init__(f'{error_code}: {description}')
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+
+    @property
+    def is_retryable(self) -> bool:
+        """
+        Return True if request may succeed when repeated.
+
+        :return: True for flood control and server errors
+        """
+        return self.error_code == 429 or (self.error_code or 0) >= 500
+
+
+class TelegramCircuitOpenException(TelegramAPIException):
+    """This class represents an exception for the situation when requests to Telegram API are stopped after failures."""
+
+    def __init__(self, retry_after: float) -> None:
+        """
+        Construct TelegramCircuitOpenException class.
+
+        :param retry_after: seconds until a trial request is let through
+        :return: None
+        """
+        super().__init__(None, 'Circuit breaker is open', retry_after)
+
+    @property
+    def is_retryable(self) -> bool:
+        """
+        Return True, request may succeed when circuit is closed.
+
+        :return: True
+        """
+        return True
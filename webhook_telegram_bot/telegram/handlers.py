@@ -1,17 +1,19 @@
 """This file contains Telegram handlers."""
-import json
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from aiohttp import web
 from aiohttp.web_request import Request
 
 from webhook_telegram_bot.helpers import (
+    get_command_router,
     get_database,
     get_plugins_instances,
     get_telegram_api,
     get_template_engine,
+    get_update_deduplicator,
 )
+from webhook_telegram_bot.serializers import dumps, loads
 from webhook_telegram_bot.telegram.commands import Command
 from webhook_telegram_bot.telegram.commands.add_webhook import (
     add_webhook_command_handler,
@@ -26,6 +28,7 @@ from webhook_telegram_bot.telegram.commands.edit_webhooks import (
     edit_webhooks_command_handler,
 )
 from webhook_telegram_bot.telegram.commands.start import start_command_handler
+from webhook_telegram_bot.telegram.router import CommandRouter
 
 logger = logging.getLogger(__name__)
 
@@ -37,16 +40,48 @@ async def telegram_request_handler(request: Request) -> web.Response:
     :param request: request from Telegram API
     :return: bot response
     """
-    data = await request.json()
+    data = await request.json(loads=loads)
 
-    logger.debug(f'Request from Telegram: {json.dumps(data)}')
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'Request from Telegram: {dumps(data)}')
 
-    app = request.app
-    telegram_api = get_telegram_api(app)
-    db = get_database(app)
-    template_engine = get_template_engine(app)
-    plugins_instances = get_plugins_instances(app)
+    return await process_update(request.app, data)
+
+
+async def process_update(app: web.Application, data: Dict[str, Any]) -> web.Response:
+    """
+    Dispatch Telegram update to command handler unless it is a redelivery.
+
+    :param app: application instance
+    :param data: Telegram update
+    :return: bot response
+    """
+    update_id: Optional[int] = data.get('update_id')
+    if update_id is None:
+        return await dispatch_update(app, data)
+
+    update_deduplicator = get_update_deduplicator(app)
+    # marked before dispatch, so concurrent redelivery is not processed twice
+    if await update_deduplicator.is_duplicate(update_id):
+        logger.info(f'Update {update_id} is already processed.')
+        return web.Response()
+    try:
+        return await dispatch_update(app, data)
+    except Exception:
+        # Telegram redelivers the update after error response
+        await update_deduplicator.forget(update_id)
+        raise
+
+
+async def dispatch_update(app: web.Application, data: Dict[str, Any]) -> web.Response:
+    """
+    Dispatch Telegram update to command handler without deduplication.
 
+    :param app: application instance
+    :param data: Telegram update
+    :return: bot response
+    """
+    telegram_api = get_telegram_api(app)
     text: Optional[str] = telegram_api.get_text(data)
     chat_id: Optional[int] = telegram_api.get_chat_id(data)
 
@@ -58,57 +93,117 @@ async def telegram_request_handler(request: Request) -> web.Response:
         logger.info('The message from Telegram does not contain the "chat_id" fields.')
         return web.Response()
 
-    if text == Command.START:
-        return await start_command_handler(chat_id, db, telegram_api, template_engine)
-
-    elif text == Command.ADD_WEBHOOK:
-        plugins_menu_buttons = [
-            plugin_instance.get_menu_button() for plugin_instance in plugins_instances
-        ]
-        return await add_webhook_command_handler(
-            chat_id, telegram_api, template_engine, plugins_menu_buttons
-        )
-
-    elif text == Command.EDIT_WEBHOOKS:
-        return await edit_webhooks_command_handler(
-            chat_id, db, telegram_api, template_engine
-        )
-
-    elif text.startswith(Command.EDIT_WEBHOOK):
-        webhook_id = text.split('_').pop()
-        return await edit_webhook_command_handler(
-            chat_id, webhook_id, telegram_api, template_engine
-        )
-
-    elif text.startswith(Command.DELETE_WEBHOOK):
-        webhook_id = text.split('_').pop()
-        return await delete_webhook_command_handler(
-            chat_id, webhook_id, db, telegram_api, template_engine
-        )
-
+    resp = await get_command_router(app).dispatch(app, chat_id, text)
+    if resp is not None:
+        return resp
     else:
+        logger.warning(f"Unknown command: {text}")
+        return web.Response()
 
-        resp = await get_response_from_plugins(app, chat_id, text)
-        if resp is not None:
-            return resp
-        else:
-            logger.warning(f"Unknown command: {text}")
-            return web.Response()
 
+async def start_command(
+    app: web.Application, chat_id: int, text: str
+) -> Optional[web.Response]:
+    """
+    Handle /start command.
 
-async def get_response_from_plugins(
-    app: web.Application, chat_id: int, command: str
+    :param app: application instance
+    :param chat_id: chat identification number
+    :param text: incoming text from Telegram chat
+    :return: bot response
+    """
+    return await start_command_handler(
+        chat_id, get_database(app), get_telegram_api(app), get_template_engine(app)
+    )
+
+
+async def add_webhook_command(
+    app: web.Application, chat_id: int, text: str
 ) -> Optional[web.Response]:
     """
-    Return a response from the plugin if the command refers to one of them.
+    Handle /add_webhook command.
 
     :param app: application instance
     :param chat_id: chat identification number
-    :param command: incoming text from Telegram chat
-    :return: bot response or None
-    """
-    plugins_instances = get_plugins_instances(app)
-    for plugin_instance in plugins_instances:
-        if plugin_instance.is_known_command(command):
-            return await plugin_instance.handle_telegram_command(app, chat_id, command)
-    return None
+    :param text: incoming text from Telegram chat
+    :return: bot response
+    """
+    plugins_menu_buttons = [
+        plugin_instance.get_menu_button()
+        for plugin_instance in get_plugins_instances(app)
+    ]
+    return await add_webhook_command_handler(
+        chat_id, get_telegram_api(app), get_template_engine(app), plugins_menu_buttons
+    )
+
+
+async def edit_webhooks_command(
+    app: web.Application, chat_id: int, text: str
+) -> Optional[web.Response]:
+    """
+    Handle /edit_webhooks command.
+
+    :param app: application instance
+    :param chat_id: chat identification number
+    :param text: incoming text from Telegram chat
+    :return: bot response
+    """
+    return await edit_webhooks_command_handler(
+        chat_id, get_database(app), get_telegram_api(app), get_template_engine(app)
+    )
+
+
+async def edit_webhook_command(
+    app: web.Application, chat_id: int, text: str
+) -> Optional[web.Response]:
+    """
+    Handle /edit_webhook_<id> command.
+
+    :param app: application instance
+    :param chat_id: chat identification number
+    :param text: incoming text from Telegram chat
+    :return: bot response
+    """
+    webhook_id = text.split('_').pop()
+    return await edit_webhook_command_handler(
+        chat_id, webhook_id, get_telegram_api(app), get_template_engine(app)
+    )
+
+
+async def delete_webhook_command(
+    app: web.Application, chat_id: int, text: str
+) -> Optional[web.Response]:
+    """
+    Handle /delete_webhook_<id> command.
+
+    :param app: application instance
+    :param chat_id: chat identification number
+    :param text: incoming text from Telegram chat
+    :return: bot response
+    """
+    webhook_id = text.split('_').pop()
+    return await delete_webhook_command_handler(
+        chat_id,
+        webhook_id,
+        get_database(app),
+        get_telegram_api(app),
+        get_template_engine(app),
+    )
+
+
+def create_command_router(app: web.Application) -> CommandRouter:
+    """
+    Create router with commands of the bot and its plugins.
+
+    :param app: application instance
+    :return: CommandRouter instance
+    """
+    router = CommandRouter()
+    router.add_command(Command.START, start_command)
+    router.add_command(Command.ADD_WEBHOOK, add_webhook_command)
+    router.add_command(Command.EDIT_WEBHOOKS, edit_webhooks_command)
+    router.add_prefix_command(Command.EDIT_WEBHOOK, edit_webhook_command)
+    router.add_prefix_command(Command.DELETE_WEBHOOK, delete_webhook_command)
+    for plugin_instance in get_plugins_instances(app):
+        plugin_instance.register_commands(router)
+    return router
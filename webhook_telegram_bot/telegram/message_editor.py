@@ -0,0 +1,164 @@
+"""This file contains edit-in-place of outbound Telegram messages."""
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Optional, Set, Union
+
+from webhook_telegram_bot.cache import TTLCache
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+
+logger = logging.getLogger(__name__)
+
+# https://core.telegram.org/bots/api#editmessagetext
+EDIT_MESSAGE_TEXT_OPTIONS = (
+    'parse_mode',
+    'entities',
+    'disable_web_page_preview',
+    'reply_markup',
+)
+
+
+class EditableMessage:
+    """This class represents a sent message that may be edited later."""
+
+    def __init__(self, payload: Dict[str, Union[str, int, bool]]) -> None:
+        """
+        Construct EditableMessage class.
+
+        :param payload: payload of the last sendMessage or editMessageText
+        :return: None
+        """
+        self.payload = payload
+        self.sent_text: Optional[Union[str, int, bool]] = None
+        self.result: asyncio.Future[
+            Optional[Dict[str, Any]]
+        ] = asyncio.get_running_loop().create_future()
+        self.lock = asyncio.Lock()
+
+
+class MessageEditor:
+    """This class edits the message sent for a key instead of sending a new one."""
+
+    def __init__(
+        self, message_queue: MessageQueue, ttl: float = 3600, max_size: int = 10000
+    ) -> None:
+        """
+        Construct MessageEditor class.
+
+        Messages are not coalesced, every key needs its own message.
+        Sent messages are remembered by the worker, so an event delivered
+        to other worker sends a new message instead of editing.
+
+        :param message_queue: MessageQueue instance
+        :param ttl: seconds to remember the message of a key
+        :param max_size: maximum number of remembered messages
+        :return: None
+        """
+        self.message_queue = message_queue
+        self.messages: TTLCache[Hashable, EditableMessage] = TTLCache(max_size, ttl)
+        self.tasks: Set[asyncio.Task[None]] = set()
+        self.sent = 0
+        self.edited = 0
+
+    async def send_message(
+        self, key: Hashable, **kwargs: Union[str, int, bool]
+    ) -> None:
+        """
+        Send text message or edit the one sent for the same key.
+
+        :param key: key of the message, e.g. webhook, commit and pipeline
+        :param kwargs:
+            chat_id
+            text
+        :return: None
+        """
+        message = self.messages.get(key)
+        if message is None:
+            message = EditableMessage(kwargs)
+            self.messages.set(key, message)
+            await self.send(message)
+            return
+
+        message.payload = kwargs
+        task = asyncio.create_task(self.edit(message))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def send(self, message: EditableMessage) -> None:
+        """
+        Enqueue sendMessage, the result is resolved when it is sent.
+
+        :param message: EditableMessage instance
+        :return: None
+        """
+        self.sent += 1
+        message.sent_text = message.payload.get('text')
+        await self.message_queue.put(
+            'sendMessage', message.payload, result=message.result
+        )
+
+    async def edit(self, message: EditableMessage) -> None:
+        """
+        Replace text of the sent message with the latest one.
+
+        Edits of a message are serialized, intermediate states may be skipped.
+
+        :param message: EditableMessage instance
+        :return: None
+        """
+        async with message.lock:
+            result = await asyncio.shield(message.result)
+            if result is None:
+                # the message was not sent, so there is nothing to edit
+                message.result = asyncio.get_running_loop().create_future()
+                await self.send(message)
+                return
+
+            text = message.payload.get('text')
+            if text == message.sent_text:
+                return
+            payload: Dict[str, Any] = {
+                key: value
+                for key, value in message.payload.items()
+                if key in EDIT_MESSAGE_TEXT_OPTIONS
+            }
+            payload.update(
+                chat_id=result['chat']['id'],
+                message_id=result['message_id'],
+                text=text,
+            )
+            message.sent_text = text
+            self.edited += 1
+            # queued through the outbox, the lock is held until it is sent
+            edit_result: asyncio.Future[
+                Optional[Dict[str, Any]]
+            ] = asyncio.get_running_loop().create_future()
+            await self.message_queue.put('editMessageText', payload, result=edit_result)
+            await edit_result
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Wait for pending edits, so the last state of every message is sent.
+
+        :param timeout: seconds to wait for pending edits
+        :return: None
+        """
+        if not self.tasks:
+            return
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        if pending:
+            logger.error(f'{len(pending)} edits were not sent before shutdown')
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return editor statistics.
+
+        :return: dict of editor statistics
+        """
+        return {
+            'messages': self.messages.get_stats(),
+            'sent': self.sent,
+            'edited': self.edited,
+        }
@@ -0,0 +1,288 @@
+"""This file contains background queue of outbound Telegram messages."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+
+from webhook_telegram_bot.serializers import dumps
+from webhook_telegram_bot.telegram.exceptions import TelegramAPIException
+from webhook_telegram_bot.telegram.metrics import LatencyStats
+from webhook_telegram_bot.telegram.outbox import Outbox, OutboxEntry, OutboxEntryId
+from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundMessage:
+    """This class represents a queued Telegram API command."""
+
+    def __init__(
+        self,
+        command: str,
+        payload: Dict[str, Any],
+        outbox_ids: Optional[List[OutboxEntryId]] = None,
+        result: Optional[asyncio.Future[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """
+        Construct OutboundMessage class.
+
+        :param command: Telegram API command
+        :param payload: payload of command
+        :param outbox_ids: outbox entries acknowledged when message is processed
+        :param result: future resolved with result of command or None on failure
+        :return: None
+        """
+        self.command = command
+        self.payload = payload
+        self.outbox_ids = outbox_ids or []
+        self.result = result
+        self.enqueued_at = time.monotonic()
+
+
+class MessageQueue:
+    """This class sends Telegram API commands from a pool of background tasks."""
+
+    def __init__(
+        self,
+        telegram_api: TelegramAPI,
+        max_size: int = 1000,
+        workers: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30,
+        outbox: Optional[Outbox] = None,
+    ) -> None:
+        """
+        Construct MessageQueue class.
+
+        :param telegram_api: TelegramAPI instance
+        :param max_size: maximum number of queued messages
+        :param workers: number of sender tasks
+        :param max_retries: number of retries of a failed message
+        :param backoff_base: initial retry delay in seconds
+        :param backoff_max: maximum retry delay in seconds
+        :param outbox: Outbox instance to persist messages until they are sent
+        :return: None
+        """
+        self.telegram_api = telegram_api
+        self.max_size = max_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.outbox = outbox
+        self.queue: Optional[asyncio.Queue[OutboundMessage]] = None
+        self.tasks: List[asyncio.Task[None]] = []
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.queue_latency = LatencyStats()
+        self.send_latency = LatencyStats()
+
+    def start(self) -> None:
+        """
+        Start sender tasks.
+
+        :return: None
+        """
+        self.queue = asyncio.Queue(self.max_size)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        if self.outbox is not None:
+            entries = self.outbox.open()
+            if entries:
+                self.tasks.append(asyncio.create_task(self.replay(entries)))
+
+    async def replay(self, entries: List[OutboxEntry]) -> None:
+        """
+        Enqueue messages recovered from the outbox.
+
+        :param entries: list of outbox entries
+        :return: None
+        """
+        assert self.queue is not None  # nosec
+        for entry_id, command, payload in entries:
+            await self.queue.put(OutboundMessage(command, payload, [entry_id]))
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Wait for queued messages to be sent and stop sender tasks.
+
+        :param timeout: seconds to wait for the queue to drain
+        :return: None
+        """
+        if self.queue is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.error(
+                    f'{self.queue.qsize()} messages were not sent before shutdown'
+                )
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def persist(self, command: str, payload: Dict[str, Any]) -> List[OutboxEntryId]:
+        """
+        Write Telegram API command to the outbox.
+
+        :param command: Telegram API command
+        :param payload: payload of command
+        :return: list of outbox entries, empty if outbox is disabled
+        """
+        if self.outbox is None:
+            return []
+        return [self.outbox.append(command, payload)]
+
+    def acknowledge(self, message: OutboundMessage) -> None:
+        """
+        Remove processed message from the outbox.
+
+        :param message: OutboundMessage instance
+        :return: None
+        """
+        if self.outbox is not None:
+            for entry_id in message.outbox_ids:
+                self.outbox.acknowledge(entry_id)
+
+    async def put(
+        self,
+        command: str,
+        payload: Dict[str, Any],
+        outbox_ids: Optional[List[OutboxEntryId]] = None,
+        result: Optional[asyncio.Future[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """
+        Enqueue Telegram API command, waiting while the queue is full.
+
+        The command is written to the outbox first unless it is already there.
+
+        :param command: Telegram API command
+        :param payload: payload of command
+        :param outbox_ids: outbox entries of the command
+        :param result: future resolved with result of command or None on failure
+        :return: None
+        """
+        if self.queue is None:
+            raise RuntimeError('MessageQueue is not started')
+        if outbox_ids is None:
+            outbox_ids = self.persist(command, payload)
+        await self.queue.put(OutboundMessage(command, payload, outbox_ids, result))
+
+    async def send_message(self, **kwargs: Union[str, int, bool]) -> None:
+        """
+        Enqueue text message.
+
+        :param kwargs:
+            chat_id
+            text
+        :return: None
+        """
+        await self.put('sendMessage', kwargs)
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Return retry delay with full jitter.
+
+        :param attempt: number of the failed attempt starting from zero
+        :return: delay in seconds
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)  # nosec
+
+    async def worker(self) -> None:
+        """
+        Send queued messages until cancelled.
+
+        :return: None
+        """
+        queue = self.queue
+        assert queue is not None  # nosec
+        while True:
+            message = await queue.get()
+            try:
+                await self.process(message)
+            except Exception as e:
+                logger.exception(f'Failed to process {message.command}')
+                self.reject(message, repr(e))
+            finally:
+                queue.task_done()
+                if message.result is not None and not message.result.done():
+                    message.result.set_result(None)
+            self.acknowledge(message)
+
+    async def process(self, message: OutboundMessage) -> bool:
+        """
+        Send message, retrying on flood control and transient errors.
+
+        :param message: OutboundMessage instance
+        :return: True if message is sent
+        """
+        self.queue_latency.observe(time.monotonic() - message.enqueued_at)
+        for attempt in range(self.max_retries + 1):
+            started_at = time.monotonic()
+            try:
+                data = await self.telegram_api.command(message.command, message.payload)
+            except TelegramAPIException as e:
+                if not e.is_retryable or attempt == self.max_retries:
+                    self.failed += 1
+                    self.reject(message, str(e))
+                    return False
+                delay = e.retry_after or self.get_backoff(attempt)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    self.reject(message, repr(e))
+                    return False
+                delay = self.get_backoff(attempt)
+            else:
+                self.send_latency.observe(time.monotonic() - started_at)
+                self.sent += 1
+                if message.result is not None and not message.result.done():
+                    message.result.set_result(data.get('result'))
+                return True
+            self.retries += 1
+            logger.warning(f'Retry {message.command} in {delay:.2f}s')
+            await asyncio.sleep(delay)
+        return False
+
+    def reject(self, message: OutboundMessage, error: str) -> None:
+        """
+        Log message that will not be sent and keep it in the dead letter file.
+
+        :param message: OutboundMessage instance
+        :param error: description of the last error
+        :return: None
+        """
+        logger.error(
+            f'Failed to send {message.command} {dumps(message.payload)}: {error}'
+        )
+        if self.outbox is not None:
+            self.outbox.dead_letter(message.command, message.payload, error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return queue statistics.
+
+        :return: dict of queue statistics
+        """
+        stats: Dict[str, Any] = {
+            'queue_size': self.queue.qsize() if self.queue is not None else 0,
+            'max_size': self.max_size,
+            'workers': self.workers,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'queue_latency': self.queue_latency.as_dict(),
+            'send_latency': self.send_latency.as_dict(),
+        }
+        if self.outbox is not None:
+            stats['outbox'] = self.outbox.get_stats()
+        return stats
@@ -0,0 +1,113 @@
+"""This file contains in-process metrics of Telegram API usage."""
+import bisect
+from collections import Counter
+from typing import Any, Dict, Sequence
+
+# upper bounds of latency buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class LatencyStats:
+    """This class accumulates latency statistics."""
+
+    def __init__(self) -> None:
+        """
+        Construct LatencyStats class.
+
+        :return: None
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add latency observation.
+
+        :param value: latency in seconds
+        :return: None
+        """
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return statistics as dict.
+
+        :return: dict with average and maximum latency
+        """
+        return {
+            'avg': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+        }
+
+
+class LatencyHistogram(LatencyStats):
+    """This class accumulates latency statistics in fixed buckets."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """
+        Construct LatencyHistogram class.
+
+        :param buckets: sorted upper bounds of buckets in seconds
+        :return: None
+        """
+        super().__init__()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """
+        Add latency observation.
+
+        :param value: latency in seconds
+        :return: None
+        """
+        super().observe(value)
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return statistics as dict.
+
+        :return: dict with average, maximum latency and number of observations
+            less than or equal to the upper bound of each bucket
+        """
+        histogram = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            histogram[str(bound)] = cumulative
+        histogram['+Inf'] = self.count
+        return {**super().as_dict(), 'count': self.count, 'histogram': histogram}
+
+
+class CommandMetrics:
+    """This class accumulates latency and errors of one Telegram API command."""
+
+    def __init__(self) -> None:
+        """
+        Construct CommandMetrics class.
+
+        :return: None
+        """
+        self.latency = LatencyHistogram()
+        self.errors: Counter[str] = Counter()
+
+    def observe_error(self, error: str) -> None:
+        """
+        Count error.
+
+        :param error: error code or kind of error
+        :return: None
+        """
+        self.errors[error] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return metrics as dict.
+
+        :return: dict with latency and errors
+        """
+        return {'latency': self.latency.as_dict(), 'errors': dict(self.errors)}
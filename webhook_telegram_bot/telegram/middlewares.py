@@ -0,0 +1,30 @@
+"""This file contains Telegram middlewares."""
+import hmac
+
+from aiohttp import web
+from aiohttp.typedefs import Handler
+
+from webhook_telegram_bot.helpers import get_telegram_webhook_secret
+from webhook_telegram_bot.telegram.constants import (
+    TELEGRAM_SECRET_TOKEN_HEADER,
+    TELEGRAM_WEBHOOK_ROUTE_NAME,
+)
+
+
+@web.middleware
+async def telegram_secret_token_middleware(
+    request: web.Request, handler: Handler
+) -> web.StreamResponse:
+    """
+    Reject webhook requests without secret token before the body is read.
+
+    :param request: request from Telegram API
+    :param handler: request handler
+    :return: response
+    """
+    if request.match_info.route.name == TELEGRAM_WEBHOOK_ROUTE_NAME:
+        secret_token = get_telegram_webhook_secret(request.app)
+        received_token = request.headers.get(TELEGRAM_SECRET_TOKEN_HEADER, '')
+        if not hmac.compare_digest(received_token.encode(), secret_token.encode()):
+            raise web.HTTPForbidden()
+    return await handler(request)
@@ -0,0 +1,388 @@
+"""This file contains durable on-disk outbox of outbound Telegram messages."""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from webhook_telegram_bot.serializers import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_FSYNC_ALWAYS = 'always'
+OUTBOX_FSYNC_INTERVAL = 'interval'
+OUTBOX_FSYNC_NEVER = 'never'
+
+SEGMENT_SUFFIX = '.seg'
+# JSON lines of messages that exhausted retries
+DEAD_LETTER_NAME = 'dead_letter.jsonl'
+
+# status, length of data, crc32 of data
+RECORD_HEADER = struct.Struct('<BxxxII')
+RECORD_EMPTY = 0
+RECORD_PENDING = 1
+RECORD_ACKNOWLEDGED = 2
+
+OutboxEntryId = Tuple[str, int]
+OutboxEntry = Tuple[OutboxEntryId, str, Dict[str, Any]]
+
+
+class OutboxSegment:
+    """This class represents memory-mapped segment file of the outbox."""
+
+    def __init__(self, path: str, fd: int, size: int) -> None:
+        """
+        Construct OutboxSegment class.
+
+        :param path: path to segment file
+        :param fd: descriptor of segment file locked by the current process
+        :param size: size of segment file in bytes
+        :return: None
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        self.fd = fd
+        self.size = size
+        self.mmap = mmap.mmap(fd, size)
+        self.position = 0
+        self.flushed = 0
+        self.pending: Set[int] = set()
+
+    @classmethod
+    def create(cls, directory: str, size: int) -> 'OutboxSegment':
+        """
+        Create new segment file owned by the current process.
+
+        The file is locked before it gets its final name,
+        so other processes never take over a segment being created.
+
+        :param directory: outbox directory
+        :param size: size of segment file in bytes
+        :return: OutboxSegment instance
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            prefix='.', suffix=SEGMENT_SUFFIX, dir=directory
+        )
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.ftruncate(fd, size)
+        name = f'{time.time_ns():020d}-{os.getpid()}{SEGMENT_SUFFIX}'
+        path = os.path.join(directory, name)
+        os.rename(tmp_path, path)
+        return cls(path, fd, size)
+
+    @classmethod
+    def adopt(cls, path: str) -> Optional['OutboxSegment']:
+        """
+        Take over segment file of a stopped process.
+
+        :param path: path to segment file
+        :return: OutboxSegment instance or None if segment is in use or removed
+        """
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # the segment could be removed by other process while we were waiting
+            if os.stat(path).st_ino != os.fstat(fd).st_ino:
+                raise FileNotFoundError(path)
+        except (BlockingIOError, FileNotFoundError):
+            os.close(fd)
+            return None
+        size = os.fstat(fd).st_size
+        if size < RECORD_HEADER.size:
+            os.unlink(path)
+            os.close(fd)
+            return None
+        return cls(path, fd, size)
+
+    def fits(self, length: int) -> bool:
+        """
+        Return True if record with data of given length fits into segment.
+
+        :param length: length of data
+        :return: True if record fits
+        """
+        return self.position + RECORD_HEADER.size + length <= self.size
+
+    def append(self, data: bytes) -> int:
+        """
+        Append pending record.
+
+        The status is written last, so a torn record marks the end of segment.
+
+        :param data: record data
+        :return: offset of the record
+        """
+        offset = self.position
+        start = offset + RECORD_HEADER.size
+        end = start + len(data)
+        self.mmap[start:end] = data
+        RECORD_HEADER.pack_into(
+            self.mmap, offset, RECORD_EMPTY, len(data), zlib.crc32(data)
+        )
+        self.mmap[offset] = RECORD_PENDING
+        self.position = end
+        self.pending.add(offset)
+        return offset
+
+    def acknowledge(self, offset: int) -> None:
+        """
+        Mark record as acknowledged.
+
+        :param offset: offset of the record
+        :return: None
+        """
+        if offset in self.pending:
+            self.mmap[offset] = RECORD_ACKNOWLEDGED
+            self.pending.discard(offset)
+
+    def read_pending(self) -> List[bytes]:
+        """
+        Return data of pending records.
+
+        :return: list of record data
+        """
+        records = []
+        offset = 0
+        while offset + RECORD_HEADER.size <= self.size:
+            status, length, crc = RECORD_HEADER.unpack_from(self.mmap, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if status == RECORD_EMPTY or end > self.size:
+                break
+            data = self.mmap[start:end]
+            if zlib.crc32(data) != crc:
+                logger.error(f'Corrupted record at {offset} in {self.path}')
+                break
+            if status == RECORD_PENDING:
+                records.append(data)
+            offset = end
+        return records
+
+    def flush(self) -> None:
+        """
+        Write appended records to disk.
+
+        :return: None
+        """
+        if self.position > self.flushed:
+            start = self.flushed - self.flushed % mmap.PAGESIZE
+            self.mmap.flush(start, self.position - start)
+            self.flushed = self.position
+
+    def close(self) -> None:
+        """
+        Close segment file and release the lock.
+
+        :return: None
+        """
+        self.mmap.close()
+        os.close(self.fd)
+
+    def remove(self) -> None:
+        """
+        Remove segment file, it is unlinked while still locked.
+
+        :return: None
+        """
+        os.unlink(self.path)
+        self.close()
+
+
+class Outbox:
+    """This class persists outbound messages until they are acknowledged."""
+
+    def __init__(
+        self,
+        path: str,
+        segment_size: int = 1024 * 1024,
+        fsync: str = OUTBOX_FSYNC_ALWAYS,
+        fsync_interval: float = 1,
+    ) -> None:
+        """
+        Construct Outbox class.
+
+        :param path: outbox directory
+        :param segment_size: size of segment file in bytes
+        :param fsync: when to write records to disk: always, interval or never
+        :param fsync_interval: seconds between writes to disk in interval mode
+        :return: None
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.segments: Dict[str, OutboxSegment] = {}
+        self.current: Optional[OutboxSegment] = None
+        self.flushed_at = 0.0
+        self.appended = 0
+        self.acknowledged = 0
+        self.recovered = 0
+        self.dead_lettered = 0
+
+    def open(self) -> List[OutboxEntry]:
+        """
+        Create segment and take over pending entries of stopped processes.
+
+        :return: list of entries to be sent again
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self.rotate()
+        entries: List[OutboxEntry] = []
+        for name in sorted(os.listdir(self.path)):
+            if (
+                name.startswith('.')
+                or not name.endswith(SEGMENT_SUFFIX)
+                or name in self.segments
+            ):
+                continue
+            segment = OutboxSegment.adopt(os.path.join(self.path, name))
+            if segment is None:
+                continue
+            for data in segment.read_pending():
+                record = loads(data)
+                entry_id = self.append(record['command'], record['payload'])
+                entries.append((entry_id, record['command'], record['payload']))
+            self.flush()
+            segment.remove()
+        self.recovered += len(entries)
+        if entries:
+            logger.warning(f'Recovered {len(entries)} messages from outbox')
+        return entries
+
+    def rotate(self, length: int = 0) -> OutboxSegment:
+        """
+        Start new segment, previous one is removed when all entries are acknowledged.
+
+        :param length: length of the record that did not fit
+        :return: OutboxSegment instance
+        """
+        previous = self.current
+        size = max(self.segment_size, RECORD_HEADER.size + length)
+        segment = OutboxSegment.create(self.path, size)
+        self.segments[segment.name] = segment
+        self.current = segment
+        if previous is not None:
+            previous.flush()
+            if not previous.pending:
+                self.remove(previous)
+        return segment
+
+    def append(self, command: str, payload: Dict[str, Any]) -> OutboxEntryId:
+        """
+        Persist Telegram API command.
+
+        :param command: Telegram API command
+        :param payload: payload of command
+        :return: entry identification
+        """
+        data = dumps({'command': command, 'payload': payload}).encode()
+        segment = self.current
+        if segment is None or not segment.fits(len(data)):
+            segment = self.rotate(len(data))
+        offset = segment.append(data)
+        self.appended += 1
+        if self.fsync == OUTBOX_FSYNC_ALWAYS or (
+            self.fsync == OUTBOX_FSYNC_INTERVAL
+            and time.monotonic() - self.flushed_at >= self.fsync_interval
+        ):
+            self.flush()
+        return segment.name, offset
+
+    def acknowledge(self, entry_id: OutboxEntryId) -> None:
+        """
+        Mark entry as delivered, segment is removed when all its entries are.
+
+        :param entry_id: entry identification
+        :return: None
+        """
+        name, offset = entry_id
+        segment = self.segments.get(name)
+        if segment is None:
+            return
+        segment.acknowledge(offset)
+        self.acknowledged += 1
+        if segment is not self.current and not segment.pending:
+            self.remove(segment)
+
+    def dead_letter(self, command: str, payload: Dict[str, Any], error: str) -> None:
+        """
+        Keep command that will not be sent in the dead letter file of the outbox.
+
+        The entry of the command is acknowledged separately.
+
+        :param command: Telegram API command
+        :param payload: payload of command
+        :param error: description of the last error
+        :return: None
+        """
+        record = {
+            'command': command,
+            'payload': payload,
+            'error': error,
+            'failed_at': time.time(),
+        }
+        path = os.path.join(self.path, DEAD_LETTER_NAME)
+        try:
+            with open(path, 'ab') as f:
+                f.write(dumps(record).encode() + b'\n')
+        except OSError as e:
+            logger.error(f'Failed to write {path}: {e}')
+            return
+        self.dead_lettered += 1
+
+    def remove(self, segment: OutboxSegment) -> None:
+        """
+        Remove segment.
+
+        :param segment: OutboxSegment instance
+        :return: None
+        """
+        self.segments.pop(segment.name, None)
+        segment.remove()
+
+    def flush(self) -> None:
+        """
+        Write appended entries to disk.
+
+        :return: None
+        """
+        for segment in self.segments.values():
+            segment.flush()
+        self.flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Close segments, pending entries are sent by the next process.
+
+        :return: None
+        """
+        for segment in list(self.segments.values()):
+            if segment.pending:
+                segment.flush()
+                segment.close()
+            else:
+                segment.remove()
+        self.segments = {}
+        self.current = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return outbox statistics.
+
+        :return: dict of outbox statistics
+        """
+        return {
+            'segments': len(self.segments),
+            'pending': sum(len(segment.pending) for segment in self.segments.values()),
+            'appended': self.appended,
+            'acknowledged': self.acknowledged,
+            'recovered': self.recovered,
+            'dead_lettered': self.dead_lettered,
+        }
@@ -0,0 +1,219 @@
+"""This file contains long polling ingress of Telegram updates."""
+import asyncio
+import fcntl
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+from webhook_telegram_bot.serializers import loads
+from webhook_telegram_bot.telegram.exceptions import TelegramAPIException
+from webhook_telegram_bot.telegram.message_queue import MessageQueue
+from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
+from webhook_telegram_bot.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[Dict[str, Any]], Awaitable[web.Response]]
+
+
+class TelegramPoller:
+    """This class receives Telegram updates with getUpdates instead of a webhook."""
+
+    def __init__(
+        self,
+        handler: UpdateHandler,
+        telegram_api: TelegramAPI,
+        message_queue: MessageQueue,
+        offset_path: str,
+        limit: int = 100,
+        timeout: int = 30,
+        retry_delay: float = 5,
+    ) -> None:
+        """
+        Construct TelegramPoller class.
+
+        Only one process of the host polls at a time, others wait for the lock.
+
+        :param handler: coroutine function that processes an update
+        :param telegram_api: TelegramAPI instance
+        :param message_queue: MessageQueue instance used to send replies
+        :param offset_path: file to persist offset of the next update
+        :param limit: maximum number of updates returned by one poll
+        :param timeout: seconds of long polling
+        :param retry_delay: seconds to wait after error or while lock is taken
+        :return: None
+        """
+        self.handler = handler
+        self.telegram_api = telegram_api
+        self.message_queue = message_queue
+        self.offset_path = offset_path
+        self.limit = limit
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.lock_fd: Optional[int] = None
+        self.task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        """
+        Start polling task.
+
+        :return: None
+        """
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop polling task and release the lock.
+
+        :return: None
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.release_lock()
+
+    def acquire_lock(self) -> bool:
+        """
+        Try to become the only poller of the host.
+
+        :return: True if lock is acquired
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.offset_path)), exist_ok=True)
+        fd = os.open(f'{self.offset_path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        return True
+
+    def release_lock(self) -> None:
+        """
+        Release poller lock.
+
+        :return: None
+        """
+        if self.lock_fd is not None:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def load_offset(self) -> Optional[int]:
+        """
+        Return persisted offset.
+
+        :return: offset of the next update or None
+        """
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_offset(self, offset: int) -> None:
+        """
+        Persist offset.
+
+        :param offset: offset of the next update
+        :return: None
+        """
+        atomic_write(self.offset_path, str(offset).encode())
+
+    async def run(self) -> None:
+        """
+        Poll updates until cancelled.
+
+        :return: None
+        """
+        while not self.acquire_lock():
+            await asyncio.sleep(self.retry_delay)
+
+        is_webhook_deleted = False
+        offset = self.load_offset()
+        while True:
+            try:
+                if not is_webhook_deleted:
+                    await self.telegram_api.delete_webhook()
+                    is_webhook_deleted = True
+                updates = await self.telegram_api.get_updates(
+                    offset, self.limit, self.timeout
+                )
+            except (
+                TelegramAPIException,
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+            ) as e:
+                logger.error(f'Failed to get updates: {e!r}')
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            if updates:
+                await self.process_updates(updates)
+                offset = max(update['update_id'] for update in updates) + 1
+
+    async def process_updates(self, updates: List[Dict[str, Any]]) -> None:
+        """
+        Process batch of updates.
+
+        Updates of one chat are processed in order, different chats concurrently.
+        The offset is saved after each update, it points to the earliest
+        update of the batch that is not processed yet.
+
+        :param updates: list of updates
+        :return: None
+        """
+        updates_by_chat: Dict[Optional[int], List[Dict[str, Any]]] = {}
+        for update in updates:
+            chat_id = self.telegram_api.get_chat_id(update)
+            updates_by_chat.setdefault(chat_id, []).append(update)
+        pending = {update['update_id'] for update in updates}
+        next_offset = max(pending) + 1
+        await asyncio.gather(
+            *[
+                self.process_chat_updates(chat_updates, pending, next_offset)
+                for chat_updates in updates_by_chat.values()
+            ]
+        )
+
+    async def process_chat_updates(
+        self, updates: List[Dict[str, Any]], pending: Set[int], next_offset: int
+    ) -> None:
+        """
+        Process updates of one chat one after another.
+
+        :param updates: list of updates
+        :param pending: ids of updates of the batch that are not processed yet
+        :param next_offset: offset of the update following the batch
+        :return: None
+        """
+        for update in updates:
+            update_id = update['update_id']
+            try:
+                response = await self.handler(update)
+                await self.reply(response)
+            except Exception:
+                logger.exception(f'Failed to process update {update_id}')
+            previous_offset = min(pending)
+            pending.discard(update_id)
+            offset = min(pending) if pending else next_offset
+            if offset != previous_offset:
+                self.save_offset(offset)
+
+    async def reply(self, response: web.Response) -> None:
+        """
+        Send method returned by handler as webhook response.
+
+        :param response: handler response
+        :return: None
+        """
+        if not isinstance(response.body, bytes):
+            return
+        payload = loads(response.body)
+        method = payload.pop('method', None)
+        if method:
+            await self.message_queue.put(method, payload)
@@ -0,0 +1,263 @@
+"""This file contains rate limiter for outbound Telegram API requests."""
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional, Union, cast
+
+# https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+TELEGRAM_GLOBAL_RATE_LIMIT = 30.0
+TELEGRAM_PRIVATE_CHAT_RATE_LIMIT = 1.0
+TELEGRAM_GROUP_CHAT_RATE_LIMIT = 20.0
+
+MAX_IDLE_CHAT_BUCKETS = 10000
+
+# tokens and monotonic time of the last update
+SHARED_BUCKET_STATE = struct.Struct('dd')
+
+
+class TokenBucket:
+    """This class implements token bucket algorithm with reservations."""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        """
+        Construct TokenBucket class.
+
+        :param rate: number of tokens added to the bucket per second
+        :param capacity: maximum number of tokens in the bucket
+        :return: None
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """
+        Add tokens accumulated since the last update.
+
+        :param now: current monotonic time
+        :return: None
+        """
+        elapsed = max(now - self.updated_at, 0.0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Take one token and return delay before it may be used.
+
+        The bucket may go into debt, so concurrent callers are queued
+        one after another without polling.
+
+        :param now: current monotonic time
+        :return: delay in seconds
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def is_idle(self, now: Optional[float] = None) -> bool:
+        """
+        Return True if bucket is full, i.e. it can be dropped without losing state.
+
+        :param now: current monotonic time
+        :return: True if bucket is full
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class SharedTokenBucket:
+    """This class implements token bucket shared between processes of the host."""
+
+    def __init__(self, path: str, rate: float, capacity: float = 1.0) -> None:
+        """
+        Construct SharedTokenBucket class.
+
+        State of the bucket is stored in a memory-mapped file (e.g. in /dev/shm)
+        guarded by an exclusive file lock.
+
+        :param path: path to the file with bucket state
+        :param rate: number of tokens added to the bucket per second
+        :param capacity: maximum number of tokens in the bucket
+        :return: None
+        """
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+        self.fd: Optional[int] = None
+        self.buffer: Optional[mmap.mmap] = None
+        self.pid: Optional[int] = None
+
+    def _open(self) -> mmap.mmap:
+        """
+        Map state file into memory of the current process.
+
+        The file is reopened after fork, so every worker has its own lock.
+
+        :return: memory map of the state file
+        """
+        if self.buffer is not None and self.pid == os.getpid():
+            return self.buffer
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < SHARED_BUCKET_STATE.size:
+                os.ftruncate(fd, SHARED_BUCKET_STATE.size)
+                os.pwrite(
+                    fd, SHARED_BUCKET_STATE.pack(self.capacity, time.monotonic()), 0
+                )
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self.fd = fd
+        self.buffer = mmap.mmap(fd, SHARED_BUCKET_STATE.size)
+        self.pid = os.getpid()
+        return self.buffer
+
+    def close(self) -> None:
+        """
+        Unmap and close state file.
+
+        :return: None
+        """
+        if self.buffer is not None and self.pid == os.getpid():
+            self.buffer.close()
+        if self.fd is not None and self.pid == os.getpid():
+            os.close(self.fd)
+        self.buffer = None
+        self.fd = None
+
+    def _take(self, now: float) -> float:
+        """
+        Refill bucket, take one token from it and return remaining tokens.
+
+        :param now: current monotonic time
+        :return: number of tokens left in the bucket
+        """
+        buffer = self._open()
+        fcntl.flock(cast(int, self.fd), fcntl.LOCK_EX)
+        try:
+            tokens, updated_at = SHARED_BUCKET_STATE.unpack_from(buffer)
+            if updated_at > now:
+                # the clock was reset, e.g. the host was rebooted
+                updated_at = now
+            elapsed = now - updated_at
+            tokens = min(self.capacity, tokens + elapsed * self.rate) - 1
+            SHARED_BUCKET_STATE.pack_into(buffer, 0, tokens, now)
+            return cast(float, tokens)
+        finally:
+            fcntl.flock(cast(int, self.fd), fcntl.LOCK_UN)
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Take one token and return delay before it may be used.
+
+        :param now: current monotonic time
+        :return: delay in seconds
+        """
+        now = time.monotonic() if now is None else now
+        tokens = self._take(now)
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self.rate
+
+
+class TelegramRateLimiter:
+    """This class paces outbound requests according to Telegram limits."""
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE_LIMIT,
+        private_chat_rate: float = TELEGRAM_PRIVATE_CHAT_RATE_LIMIT,
+        group_chat_rate: float = TELEGRAM_GROUP_CHAT_RATE_LIMIT,
+        shared_state_path: Optional[str] = None,
+    ) -> None:
+        """
+        Construct TelegramRateLimiter class.
+
+        :param global_rate: messages per second for the whole bot
+        :param private_chat_rate: messages per second for a private chat
+        :param group_chat_rate: messages per minute for a group chat
+        :param shared_state_path: file to share global limit between workers
+        :return: None
+        """
+        self.global_bucket: Union[TokenBucket, SharedTokenBucket]
+        if shared_state_path:
+            self.global_bucket = SharedTokenBucket(
+                shared_state_path, global_rate, capacity=global_rate
+            )
+        else:
+            self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.private_chat_rate = private_chat_rate
+        self.group_chat_rate = group_chat_rate / 60
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+
+    def get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        """
+        Return token bucket of chat.
+
+        Group chats have negative identifiers.
+
+        :param chat_id: chat identification number
+        :return: TokenBucket instance
+        """
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_IDLE_CHAT_BUCKETS:
+                self.drop_idle_chat_buckets()
+            rate = self.group_chat_rate if chat_id < 0 else self.private_chat_rate
+            bucket = TokenBucket(rate)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def drop_idle_chat_buckets(self) -> None:
+        """
+        Drop buckets of chats that have no pending messages.
+
+        :return: None
+        """
+        now = time.monotonic()
+        self.chat_buckets = {
+            chat_id: bucket
+            for chat_id, bucket in self.chat_buckets.items()
+            if not bucket.is_idle(now)
+        }
+
+    def close(self) -> None:
+        """
+        Release resources of shared bucket.
+
+        :return: None
+        """
+        if isinstance(self.global_bucket, SharedTokenBucket):
+            self.global_bucket.close()
+
+    @staticmethod
+    async def wait(bucket: Union[TokenBucket, SharedTokenBucket]) -> None:
+        """
+        Wait until token of bucket becomes available.
+
+        :param bucket: TokenBucket instance
+        :return: None
+        """
+        delay = bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def acquire(self, chat_id: Optional[int] = None) -> None:
+        """
+        Wait until request to chat is allowed.
+
+        :param chat_id: chat identification number or None for non-chat requests
+        :return: None
+        """
+        if chat_id is not None:
+            await self.wait(self.get_chat_bucket(chat_id))
+        await self.wait(self.global_bucket)
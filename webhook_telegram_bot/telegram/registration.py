@@ -0,0 +1,265 @@
+"""This file contains single-owner registration of Telegram webhook."""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import socket
+from typing import Any, Dict, List, Optional
+
+from webhook_telegram_bot.database.backends.base import BaseCoordinationWrapper
+from webhook_telegram_bot.telegram.telegram_api import TelegramAPI
+from webhook_telegram_bot.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_LEASE_NAME = 'telegram_webhook'
+
+
+class WebhookRegistration:
+    """This class registers webhook once per deployment instead of once per worker."""
+
+    def __init__(
+        self,
+        telegram_api: TelegramAPI,
+        url: str,
+        lock_path: str,
+        max_connections: Optional[int] = None,
+        allowed_updates: Optional[List[str]] = None,
+        secret_token: Optional[str] = None,
+        db: Optional[BaseCoordinationWrapper] = None,
+        lease_ttl: float = 60,
+        retry_delay: float = 0.1,
+    ) -> None:
+        """
+        Construct WebhookRegistration class.
+
+        The worker holding the lock of the host is the owner and calls setWebhook.
+        With db, hosts also compete for a lease, so only one of them calls it.
+        Every worker holds a shared lock of the host, the last stopped worker
+        deletes webhook. With db the webhook is never deleted, because a host
+        can not tell a shutdown of the whole fleet from its own one.
+        The owner renews the lease every third of lease_ttl and registers
+        webhook when it takes over the lease of a stopped host.
+        Hash of the secret token is stored next to lock_path, because
+        getWebhookInfo does not return it.
+
+        :param telegram_api: TelegramAPI instance
+        :param url: https url where telegram will send updates to bot
+        :param lock_path: file to elect the owner among workers of the host
+        :param max_connections: maximum number of simultaneous update deliveries
+        :param allowed_updates: types of updates the bot receives
+        :param secret_token: token sent by Telegram in every webhook request
+        :param db: BaseCoordinationWrapper implementation instance to elect one host
+        :param lease_ttl: seconds before the lease of the host expires
+        :param retry_delay: seconds between attempts to take the lock of workers
+        :return: None
+        """
+        self.telegram_api = telegram_api
+        self.url = url
+        self.lock_path = lock_path
+        self.max_connections = max_connections
+        self.allowed_updates = allowed_updates
+        self.secret_token = secret_token
+        self.db = db
+        self.lease_ttl = lease_ttl
+        self.retry_delay = retry_delay
+        self.owner_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.owner_fd: Optional[int] = None
+        self.workers_fd: Optional[int] = None
+        self.has_lease = False
+        self.lease_task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_owner(self) -> bool:
+        """
+        Return True if the worker is the owner of the host.
+
+        :return: True if the worker owns the webhook lock
+        """
+        return self.owner_fd is not None
+
+    def acquire_owner_lock(self) -> bool:
+        """
+        Try to become the owner of the host.
+
+        :return: True if lock is acquired
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.owner_fd = fd
+        return True
+
+    async def acquire_workers_lock(self) -> None:
+        """
+        Take shared lock of workers of the host without blocking the event loop.
+
+        It waits while the last worker of the previous deployment deletes webhook.
+
+        :return: None
+        """
+        fd = os.open(f'{self.lock_path}.workers', os.O_RDWR | os.O_CREAT, 0o600)
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(self.retry_delay)
+            except BaseException:
+                os.close(fd)
+                raise
+        self.workers_fd = fd
+
+    def get_secret_token_hash(self) -> Optional[str]:
+        """
+        Return hash of the secret token.
+
+        :return: sha256 hex digest or None if there is no secret token
+        """
+        if self.secret_token is None:
+            return None
+        return hashlib.sha256(self.secret_token.encode()).hexdigest()
+
+    def load_secret_token_hash(self) -> Optional[str]:
+        """
+        Return hash of the secret token of the registered webhook.
+
+        :return: sha256 hex digest or None if it is not stored
+        """
+        try:
+            with open(f'{self.lock_path}.secret') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def save_secret_token_hash(self) -> None:
+        """
+        Store hash of the secret token of the registered webhook.
+
+        :return: None
+        """
+        secret_token_hash = self.get_secret_token_hash()
+        path = f'{self.lock_path}.secret'
+        if secret_token_hash is None:
+            if os.path.exists(path):
+                os.unlink(path)
+        else:
+            atomic_write(path, secret_token_hash.encode())
+
+    def is_registered(self, webhook_info: Dict[str, Any]) -> bool:
+        """
+        Return True if webhook is already registered with the same parameters.
+
+        :param webhook_info: WebhookInfo object
+        :return: True if setWebhook is not needed
+        """
+        if self.load_secret_token_hash() != self.get_secret_token_hash():
+            return False
+        if webhook_info.get('url') != self.url:
+            return False
+        if (
+            self.max_connections is not None
+            and webhook_info.get('max_connections') != self.max_connections
+        ):
+            return False
+        if self.allowed_updates is not None and sorted(
+            webhook_info.get('allowed_updates') or []
+        ) != sorted(self.allowed_updates):
+            return False
+        return True
+
+    async def register(self) -> bool:
+        """
+        Register webhook if the worker is elected.
+
+        :return: True if the worker is the owner
+        """
+        await self.acquire_workers_lock()
+
+        if not self.acquire_owner_lock():
+            return False
+        if self.db is not None:
+            self.has_lease = await self.db.acquire_lease(
+                WEBHOOK_LEASE_NAME, self.owner_id, self.lease_ttl
+            )
+            self.lease_task = asyncio.create_task(self.renew_lease())
+            if not self.has_lease:
+                logger.info('Webhook is registered by other host')
+                return True
+
+        await self.set_webhook()
+        return True
+
+    async def set_webhook(self) -> None:
+        """
+        Call setWebhook unless webhook is registered with the same parameters.
+
+        :return: None
+        """
+        webhook_info = await self.telegram_api.get_webhook_info()
+        if self.is_registered(webhook_info):
+            logger.info('Webhook is already registered')
+            self.telegram_api.active = True
+        else:
+            await self.telegram_api.set_webhook(
+                self.url,
+                max_connections=self.max_connections,
+                allowed_updates=self.allowed_updates,
+                secret_token=self.secret_token,
+            )
+            self.save_secret_token_hash()
+
+    async def renew_lease(self) -> None:
+        """
+        Renew the lease of the host or take it over until cancelled.
+
+        :return: None
+        """
+        assert self.db is not None  # nosec
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                has_lease = await self.db.acquire_lease(
+                    WEBHOOK_LEASE_NAME, self.owner_id, self.lease_ttl
+                )
+                if has_lease and not self.has_lease:
+                    logger.info('Webhook lease is taken over from other host')
+                    await self.set_webhook()
+                elif self.has_lease and not has_lease:
+                    logger.warning('Webhook lease is taken by other host')
+                self.has_lease = has_lease
+            except Exception as e:
+                logger.error(f'Failed to renew webhook lease: {e!r}')
+
+    async def unregister(self) -> None:
+        """
+        Release locks, delete webhook if it is the last worker of the host.
+
+        :return: None
+        """
+        if self.lease_task is not None:
+            self.lease_task.cancel()
+            await asyncio.gather(self.lease_task, return_exceptions=True)
+            self.lease_task = None
+        if self.owner_fd is not None:
+            os.close(self.owner_fd)
+            self.owner_fd = None
+        if self.workers_fd is None:
+            return
+        # the shared lock is released first, so of several workers stopping
+        # at the same time the last one always gets the exclusive lock
+        fcntl.flock(self.workers_fd, fcntl.LOCK_UN)
+        try:
+            fcntl.flock(self.workers_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            pass
+        else:
+            if self.db is None:
+                await self.telegram_api.delete_webhook()
+        finally:
+            os.close(self.workers_fd)
+            self.workers_fd = None
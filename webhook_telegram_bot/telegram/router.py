@@ -0,0 +1,120 @@
+"""This file contains router of Telegram commands."""
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+CommandHandler = Callable[
+    [web.Application, int, str], Awaitable[Optional[web.Response]]
+]
+
+
+class TrieNode:
+    """This class represents node of the prefix tree of commands."""
+
+    __slots__ = ('children', 'handler')
+
+    def __init__(self) -> None:
+        """
+        Construct TrieNode class.
+
+        :return: None
+        """
+        self.children: Dict[str, 'TrieNode'] = {}
+        self.handler: Optional[CommandHandler] = None
+
+
+class CommandRouter:
+    """This class dispatches Telegram commands to their handlers."""
+
+    def __init__(self) -> None:
+        """
+        Construct CommandRouter class.
+
+        Exact commands are looked up in a dict, parameterized commands
+        like /edit_webhook_<id> are matched by the longest prefix in a trie,
+        so the cost of dispatch does not depend on the number of commands.
+
+        :return: None
+        """
+        self.commands: Dict[str, CommandHandler] = {}
+        self.prefixes = TrieNode()
+        self.fallbacks: List[CommandHandler] = []
+
+    def add_command(self, command: str, handler: CommandHandler) -> None:
+        """
+        Register handler of the command.
+
+        :param command: command text
+        :param handler: coroutine function called with app, chat_id and text
+        :return: None
+        """
+        if command in self.commands:
+            raise ValueError(f'Command {command} is already registered')
+        self.commands[command] = handler
+
+    def add_prefix_command(self, prefix: str, handler: CommandHandler) -> None:
+        """
+        Register handler of the commands starting with prefix.
+
+        :param prefix: command prefix
+        :param handler: coroutine function called with app, chat_id and text
+        :return: None
+        """
+        node = self.prefixes
+        for char in prefix:
+            node = node.children.setdefault(char, TrieNode())
+        if node.handler is not None:
+            raise ValueError(f'Command prefix {prefix} is already registered')
+        node.handler = handler
+
+    def add_fallback(self, handler: CommandHandler) -> None:
+        """
+        Register handler called for commands without route.
+
+        It is meant for plugins which do not register their commands,
+        the handler returns None if the command is not known.
+
+        :param handler: coroutine function called with app, chat_id and text
+        :return: None
+        """
+        self.fallbacks.append(handler)
+
+    def resolve(self, text: str) -> Optional[CommandHandler]:
+        """
+        Return handler of the command.
+
+        :param text: incoming text from Telegram chat
+        :return: handler or None if command is not registered
+        """
+        handler = self.commands.get(text)
+        if handler is not None:
+            return handler
+        node = self.prefixes
+        for char in text:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            if node.handler is not None:
+                handler = node.handler
+        return handler
+
+    async def dispatch(
+        self, app: web.Application, chat_id: int, text: str
+    ) -> Optional[web.Response]:
+        """
+        Call handler of the command.
+
+        :param app: application instance
+        :param chat_id: chat identification number
+        :param text: incoming text from Telegram chat
+        :return: bot response or None if command is unknown
+        """
+        handler = self.resolve(text)
+        if handler is not None:
+            return await handler(app, chat_id, text)
+        for fallback in self.fallbacks:
+            resp = await fallback(app, chat_id, text)
+            if resp is not None:
+                return resp
+        return None
@@ -1,8 +1,15 @@
 """This file contains Telegram routes."""
 from aiohttp import web
 
-from webhook_telegram_bot.telegram.constants import TELEGRAM_WEBHOOK_ROUTE
+from webhook_telegram_bot.helpers import get_telegram_webhook_token
+from webhook_telegram_bot.telegram.constants import (
+    TELEGRAM_WEBHOOK_ROUTE,
+    TELEGRAM_WEBHOOK_ROUTE_NAME,
+)
 from webhook_telegram_bot.telegram.handlers import telegram_request_handler
+from webhook_telegram_bot.telegram.middlewares import (
+    telegram_secret_token_middleware,
+)
 
 
 def init_telegram_routes(app: web.Application) -> None:
@@ -12,12 +19,14 @@ def init_telegram_routes(app: web.Application) -> None:
     :param app: application instance
     :return: None
     """
+    telegram_webhook_token = get_telegram_webhook_token(app)
+    app.middlewares.append(telegram_secret_token_middleware)
     app.add_routes(
         [
             web.post(
-                TELEGRAM_WEBHOOK_ROUTE,
+                f'{TELEGRAM_WEBHOOK_ROUTE}/{telegram_webhook_token}',
                 telegram_request_handler,
-                name='telegram-webhook',
+                name=TELEGRAM_WEBHOOK_ROUTE_NAME,
             ),
         ]
     )
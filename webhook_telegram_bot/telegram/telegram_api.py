@@ -1,24 +1,37 @@
 """This file contains TelegramAPI class."""
-import json
+import asyncio
 import logging
 import time
-from multiprocessing import Lock
 from typing import Any, Dict, List, Optional, Union, cast
 
 import aiohttp
 from aiohttp import web
 
+from webhook_telegram_bot.serializers import dumps, loads
+from webhook_telegram_bot.telegram.circuit_breaker import CircuitBreaker
+from webhook_telegram_bot.telegram.exceptions import TelegramAPIException
+from webhook_telegram_bot.telegram.metrics import CommandMetrics
+from webhook_telegram_bot.telegram.rate_limiter import TelegramRateLimiter
 from webhook_telegram_bot.utils import deep_get
 
 logger = logging.getLogger(__name__)
-lock = Lock()
 
 
 class TelegramAPI:
     """This class wraps Telegram API."""
 
     def __init__(
-        self, telegram_api_endpoint: str, token: str, disable_notification: bool = True
+        self,
+        telegram_api_endpoint: str,
+        token: str,
+        disable_notification: bool = True,
+        rate_limiter: Optional[TelegramRateLimiter] = None,
+        connection_limit: int = 100,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5,
+        timeout: float = 15,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ) -> None:
         """
         Construct TelegramAPI class.
@@ -26,46 +39,205 @@ class TelegramAPI:
         :param telegram_api_endpoint: Telegram server url
         :param token: token of Telegram bot
         :param disable_notification: send message in silent mode
+        :param rate_limiter: TelegramRateLimiter instance
+        :param connection_limit: maximum number of simultaneous connections
+        :param keepalive_timeout: seconds to keep idle connection open
+        :param dns_cache_ttl: seconds to cache resolved addresses
+        :param connect_timeout: seconds to wait for connection
+        :param timeout: seconds to wait for the whole request
+        :param circuit_breaker: CircuitBreaker instance
         :return: None
         """
         self.telegram_api_endpoint = telegram_api_endpoint
         self.token = token
         self.disable_notification = disable_notification
+        self.rate_limiter = rate_limiter or TelegramRateLimiter()
+        self.connection_limit = connection_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.client_timeout = aiohttp.ClientTimeout(
+            total=timeout, sock_connect=connect_timeout
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics: Dict[str, CommandMetrics] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
         self.active = False
 
-    async def command(self, command: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def start(self) -> None:
+        """
+        Open HTTP session shared by all requests to Telegram API.
+
+        :return: None
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.client_timeout,
+                headers={'Content-Type': 'application/json'},
+                json_serialize=dumps,
+            )
+
+    async def close(self) -> None:
+        """
+        Close HTTP session and release rate limiter.
+
+        :return: None
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.rate_limiter.close()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Return HTTP session, opening it if needed.
+
+        :return: aiohttp.ClientSession instance
+        """
+        self.start()
+        return cast(aiohttp.ClientSession, self.session)
+
+    async def command(
+        self,
+        command: str,
+        payload: Dict[str, Any],
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ) -> Dict[str, Any]:
         """
         Send command to Telegram API.
 
         :param command: any command to Telegram API
         :param payload: payload of command
+        :param timeout: request timeout overriding the session one
         :return: response data of Telegram server
+        :raises TelegramAPIException: if Telegram API returns an error
+        :raises TelegramCircuitOpenException: if Telegram API is failing
         """
-        lock.acquire()
+        self.circuit_breaker.check()
+        chat_id = payload.get('chat_id')
+        await self.rate_limiter.acquire(chat_id if isinstance(chat_id, int) else None)
+
+        metrics = self.get_command_metrics(command)
+        started_at = time.monotonic()
         try:
-            headers = {'Content-Type': 'application/json'}
-            async with aiohttp.ClientSession() as session:
-                url = f'{self.telegram_api_endpoint}/bot{self.token}/{command}'
-                async with session.post(url, json=payload, headers=headers) as response:
-                    data = await response.json()
-                    logger.debug(f'Telegram response: {json.dumps(data)}')
-                    return cast(Dict[str, Any], data)
+            data = await self.request(command, payload, timeout)
+        except TelegramAPIException as e:
+            metrics.observe_error(str(e.error_code))
+            if e.error_code is not None and e.error_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        except asyncio.TimeoutError:
+            metrics.observe_error('timeout')
+            self.circuit_breaker.record_failure()
+            raise
+        except aiohttp.ClientError as e:
+            metrics.observe_error(type(e).__name__)
+            self.circuit_breaker.record_failure()
+            raise
         finally:
-            # Avoid too many requests in multithreading environment.
-            # https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
-            time.sleep(0.8)
-            lock.release()
+            metrics.latency.observe(time.monotonic() - started_at)
+        self.circuit_breaker.record_success()
+        return data
+
+    async def request(
+        self,
+        command: str,
+        payload: Dict[str, Any],
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ) -> Dict[str, Any]:
+        """
+        Make HTTP request to Telegram API.
+
+        :param command: any command to Telegram API
+        :param payload: payload of command
+        :param timeout: request timeout overriding the session one
+        :return: response data of Telegram server
+        :raises TelegramAPIException: if Telegram API returns an error
+        """
+        session = self.get_session()
+        url = f'{self.telegram_api_endpoint}/bot{self.token}/{command}'
+        kwargs: Dict[str, Any] = {'timeout': timeout} if timeout else {}
+        async with session.post(url, json=payload, **kwargs) as response:
+            if response.status >= 500:
+                raise TelegramAPIException(response.status, response.reason)
+            data = await response.json(loads=loads)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'Telegram response: {dumps(data)}')
+            if data.get('ok') is False:
+                raise TelegramAPIException(
+                    data.get('error_code'),
+                    data.get('description'),
+                    deep_get(data, 'parameters.retry_after'),
+                )
+            return cast(Dict[str, Any], data)
+
+    def get_command_metrics(self, command: str) -> CommandMetrics:
+        """
+        Return metrics of Telegram API command.
 
-    async def set_webhook(self, url_webhook: str) -> None:
+        :param command: any command to Telegram API
+        :return: CommandMetrics instance
+        """
+        metrics = self.metrics.get(command)
+        if metrics is None:
+            metrics = self.metrics[command] = CommandMetrics()
+        return metrics
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return Telegram API statistics.
+
+        :return: dict with circuit breaker state and metrics of every command
+        """
+        return {
+            'circuit_breaker': self.circuit_breaker.get_stats(),
+            'commands': {
+                command: metrics.as_dict() for command, metrics in self.metrics.items()
+            },
+        }
+
+    async def set_webhook(
+        self,
+        url_webhook: str,
+        max_connections: Optional[int] = None,
+        allowed_updates: Optional[List[str]] = None,
+        secret_token: Optional[str] = None,
+    ) -> None:
         """
         Set webhook.
 
         :param url_webhook: https url where telegram will send updates to bot
+        :param max_connections: maximum number of simultaneous update deliveries
+        :param allowed_updates: types of updates the bot receives
+        :param secret_token: token sent by Telegram in every webhook request
         :return: None
         """
-        await self.command('setWebhook', {'url': url_webhook})
+        payload: Dict[str, Any] = {'url': url_webhook}
+        if secret_token is not None:
+            payload['secret_token'] = secret_token
+        if max_connections is not None:
+            payload['max_connections'] = max_connections
+        if allowed_updates is not None:
+            payload['allowed_updates'] = allowed_updates
+        await self.command('setWebhook', payload)
         self.active = True
 
+    async def get_webhook_info(self) -> Dict[str, Any]:
+        """
+        Return current webhook status.
+
+        :return: WebhookInfo object
+        """
+        data = await self.command('getWebhookInfo', {})
+        return cast(Dict[str, Any], data.get('result') or {})
+
     async def delete_webhook(self) -> None:
         """
         Delete webhook.
@@ -75,6 +247,27 @@ class TelegramAPI:
         await self.command('setWebhook', {'url': ''})
         self.active = False
 
+    async def get_updates(
+        self, offset: Optional[int] = None, limit: int = 100, timeout: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Receive incoming updates using long polling.
+
+        :param offset: identifier of the first update to be returned
+        :param limit: maximum number of updates to be returned
+        :param timeout: seconds to wait for updates
+        :return: list of updates
+        """
+        payload: Dict[str, Any] = {'limit': limit, 'timeout': timeout}
+        if offset is not None:
+            payload['offset'] = offset
+        client_timeout = aiohttp.ClientTimeout(
+            total=timeout + (self.client_timeout.total or 0),
+            sock_connect=self.client_timeout.sock_connect,
+        )
+        data = await self.command('getUpdates', payload, timeout=client_timeout)
+        return cast(List[Dict[str, Any]], data.get('result', []))
+
     async def send_message(self, **kwargs: Union[str, int, bool]) -> Dict[str, Any]:
         """
         Send text message.
@@ -98,7 +291,7 @@ class TelegramAPI:
         :param kwargs:
         :return:
         """
-        return web.json_response({'method': 'sendMessage', **kwargs})
+        return web.json_response({'method': 'sendMessage', **kwargs}, dumps=dumps)
 
     @staticmethod
     def get_text(data: Dict[str, Any]) -> Optional[str]:
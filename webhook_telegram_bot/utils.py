@@ -1,4 +1,6 @@
 """This file contains utils methods."""
+import os
+import tempfile
 from functools import reduce
 from typing import Any, Dict, Optional
 
@@ -16,3 +18,25 @@ def deep_get(obj: Optional[Dict[str, Any]], path: str) -> Any:
         path.split('.'),
         obj,
     )
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Write data to file atomically, so readers never see partially written file.
+
+    :param path: path to file
+    :param data: file content
+    :return: None
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise